@@ -0,0 +1,85 @@
+# apps/common/bulk.py
+"""
+Shared pieces of the bulk importers (reviews, products): streaming JSONL /
+CSV readers, batching, per-import counters and bulk_create upsert options.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.db import connection
+
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, file_format):
+    """
+    Yields (line number, row dict or None, error) for every record of a
+    JSONL or CSV text stream, without reading the whole file.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty CSV cells mean "not given"
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f'Invalid JSON: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Expected a JSON object.'
+            continue
+        yield line_number, row, None
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_options(unique_fields, update_fields):
+    """
+    bulk_create() arguments for "insert or update on conflict". MySQL's
+    ON DUPLICATE KEY UPDATE can't name the conflicting columns.
+    """
+    options = {'update_conflicts': True, 'update_fields': list(update_fields)}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = list(unique_fields)
+    return options
+
+
+class ImportStats:
+    def __init__(self, max_errors=100):
+        self.read = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.max_errors = max_errors
+        self.errors = []  # (line number, message), first `max_errors` only
+
+    def add_error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            'read': self.read, 'created': self.created, 'updated': self.updated,
+            'skipped': self.skipped, 'invalid': self.invalid,
+        }
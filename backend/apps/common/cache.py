@@ -0,0 +1,159 @@
+# apps/common/cache.py
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version:{}'
+RESPONSE_KEY = 'catalog:response:{}:{}:{}:{}'
+HITS_KEY = 'catalog:stats:hits'
+MISSES_KEY = 'catalog:stats:misses'
+
+
+# ===============================================
+#  PER-MODEL VERSION COUNTERS
+# ===============================================
+
+def _new_version():
+    # Time based, so that a counter evicted from the cache never restarts
+    # at a value that older cached responses were stored under.
+    return int(time.time() * 1000)
+
+
+def get_versions(*labels):
+    """
+    Current version of every model label (e.g. 'products.product').
+    Cached responses are keyed on these, so bumping one invalidates them.
+    """
+    keys = {VERSION_KEY.format(label): label for label in labels}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, label in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[label] = found[key]
+    return versions
+
+
+def bump_version(*labels):
+    """
+    Invalidates every cached response that depends on one of `labels`.
+    """
+    for label in labels:
+        key = VERSION_KEY.format(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+# ===============================================
+#  HIT / MISS COUNTERS
+# ===============================================
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats():
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+# ===============================================
+#  VIEWSET MIXIN
+# ===============================================
+
+def normalized_query(request):
+    """
+    Query string with keys and values sorted and empty values dropped, so
+    `?a=1&b=` and `?a=1` share one cache entry.
+    """
+    params = request.query_params
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(params)
+        for value in sorted(params.getlist(key))
+        if value != ''
+    )
+
+
+class CachedResponseMixin:
+    """
+    Caches successful GET responses of the actions in `cache_actions`.
+
+    The cache key is built from the host, path, normalized query string and
+    the version counters of `cache_dependencies`; post_save/post_delete signals
+    bump those counters, so stale entries are never read again and simply
+    age out. Responses carry an `X-Cache: HIT|MISS` header.
+
+    Combined with ConditionalGetMixin (listed after this mixin), the ETag /
+    Last-Modified validators are cached too, so a conditional request that
+    hits the cache is answered with 304 without touching the database.
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_dependencies = ()
+    cache_timeout = settings.CATALOG_CACHE_TIMEOUT
+
+    def get_cache_key(self, request):
+        versions = get_versions(*self.cache_dependencies)
+        version = '.'.join(str(versions[label]) for label in self.cache_dependencies)
+        location = f'{request.get_host()}{request.path}?{normalized_query(request)}'
+        digest = hashlib.md5(location.encode('utf-8')).hexdigest()
+        return RESPONSE_KEY.format(self.basename, self.action, version, digest)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.method != 'GET' or self.action not in self.cache_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _count(HITS_KEY)
+            validators = entry.get('validators') or {}
+            response = None
+            if validators and hasattr(self, 'get_not_modified_response'):
+                response = self.get_not_modified_response(request, validators)
+            if response is None:
+                response = Response(entry['data'], status=entry['status'])
+                for header in ('ETag', 'Last-Modified'):
+                    if validators.get(header):
+                        response[header] = validators[header]
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, {
+                'data': response.data,
+                'status': response.status_code,
+                'validators': getattr(response, 'validators', None),
+            }, self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
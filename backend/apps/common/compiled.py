@@ -0,0 +1,301 @@
+# apps/common/compiled.py
+"""
+Compiled read path for list endpoints.
+
+A ModelSerializer builds a model instance per row and then walks its fields
+one `to_representation` call at a time. For read-only lists the same output
+can be produced straight from `values_list()` tuples: the serializer's fields
+are resolved once into (column, converter) pairs and every row becomes a
+dict with a handful of index lookups.
+
+Serializers that can't be expressed that way (SerializerMethodField,
+StringRelatedField, custom to_representation, ...) raise NotCompilable and
+the view falls back to the regular serializer.
+"""
+
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .sparse import nested_serializer
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def identity(value):
+    return value
+
+
+def uuid_to_str(value):
+    return str(value) if isinstance(value, UUID) else value
+
+
+def converter_for(field):
+    if type(field) in (serializers.CharField, serializers.SlugField, serializers.EmailField):
+        return identity
+    if type(field) in (serializers.IntegerField, serializers.BooleanField) and not getattr(field, 'choices', None):
+        return identity
+    if type(field) is serializers.FloatField:
+        return float
+    if type(field) is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return uuid_to_str
+    if isinstance(field, PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return field.pk_field.to_representation
+        return identity
+    return field.to_representation
+
+
+class CompiledSerializer:
+    """
+    The readable fields of one (possibly ?fields=-pruned) serializer over
+    `model`, compiled to `columns` for values_list() and a row renderer.
+    Nested foreign keys share the parent's row (`columns` is shared), nested
+    reverse relations are fetched with one extra query per page.
+    """
+
+    def __init__(self, serializer, model, prefix='', columns=None):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise NotCompilable(f'{type(serializer).__name__} overrides to_representation')
+        self.model = model
+        self.prefix = prefix
+        self.columns = [] if columns is None else columns
+        self.renderers = []
+        self.children = []
+        self.pk_index = self.column(model._meta.pk.attname)
+        field_sources = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in field_sources:
+                self.renderers.append((name, self.compile_property(field, field_sources[name])))
+                continue
+            if field.source == '*' or len(field.source_attrs) != 1:
+                raise NotCompilable(f'{type(serializer).__name__}.{name}')
+            self.renderers.append((name, self.compile_field(name, field, field.source_attrs[0])))
+
+    def column(self, name):
+        lookup = f'{self.prefix}{name}'
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def compile_property(self, field, sources):
+        """
+        A field computed by model code from the columns in `sources`: a model
+        property, or the related row's __str__ for a StringRelatedField.
+        The code runs on a namespace holding just those columns.
+        """
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            model_field = None
+
+        if model_field is not None and model_field.is_relation:
+            if not isinstance(field, serializers.StringRelatedField) or not model_field.concrete:
+                raise NotCompilable(f'{self.model.__name__}.{field.source}')
+            method = model_field.related_model.__str__
+            fk_index = self.column(model_field.attname)
+            indexes = [(source, self.column(f'{field.source}__{source}')) for source in sources]
+
+            def render(row, context):
+                if row[fk_index] is None:
+                    return None
+                return method(SimpleNamespace(**{source: row[index] for source, index in indexes}))
+            return render
+
+        prop = getattr(self.model, field.source, None)
+        if not isinstance(prop, property):
+            raise NotCompilable(f'{self.model.__name__}.{field.source} is not a property')
+        indexes = [(source, self.column(source)) for source in sources]
+        convert = field.to_representation
+
+        def render(row, context):
+            value = prop.fget(SimpleNamespace(**{source: row[index] for source, index in indexes}))
+            return None if value is None else convert(value)
+        return render
+
+    def compile_field(self, name, field, attr):
+        try:
+            model_field = self.model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise NotCompilable(f'{self.model.__name__}.{attr}')
+        child = nested_serializer(field)
+
+        if not model_field.is_relation:
+            index = self.column(attr)
+            if isinstance(field, serializers.FileField):
+                return self.compile_file(field, model_field, index)
+            if hasattr(field, 'to_representation_in_context'):
+                # Fields whose output depends on the request (absolute URLs)
+                represent = field.to_representation_in_context
+                return lambda row, context: None if row[index] is None else represent(row[index], context)
+            convert = converter_for(field)
+            return lambda row, context: None if row[index] is None else convert(row[index])
+
+        if model_field.many_to_many or not model_field.concrete:
+            if child is None or not model_field.one_to_many:
+                raise NotCompilable(f'{self.model.__name__}.{attr}')
+            self.children.append((name, model_field.field.attname, CompiledSerializer(child, model_field.related_model)))
+            return None  # filled in by render_children()
+
+        if child is None:
+            if not isinstance(field, PrimaryKeyRelatedField):
+                raise NotCompilable(f'{self.model.__name__}.{attr}')
+            index = self.column(model_field.attname)
+            convert = converter_for(field)
+            return lambda row, context: None if row[index] is None else convert(row[index])
+
+        # Nested forward FK: joined into the same row
+        nested = CompiledSerializer(child, model_field.related_model, f'{self.prefix}{attr}__', self.columns)
+        if nested.children:
+            raise NotCompilable(f'{self.model.__name__}.{attr} nests a reverse relation')
+        pk_index, renderers = nested.pk_index, nested.renderers
+
+        def render(row, context):
+            if row[pk_index] is None:
+                return None
+            return {key: render(row, context) for key, render in renderers}
+        return render
+
+    def compile_file(self, field, model_field, index):
+        storage = model_field.storage
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+        def render(row, context):
+            name = row[index]
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            request = context.get('request')
+            return request.build_absolute_uri(url) if request is not None else url
+        return render
+
+    # ----------------- rendering -----------------
+
+    def render(self, rows, context=None):
+        context = context or {}
+        renderers = self.renderers
+        data = [
+            # Reverse relations keep their position with a None placeholder
+            {name: render(row, context) if render is not None else None for name, render in renderers}
+            for row in rows
+        ]
+        if self.children and data:
+            self.render_children([row[self.pk_index] for row in rows], data, context)
+        return data
+
+    def render_children(self, pks, data, context):
+        for name, fk_attname, compiled in self.children:
+            grouped = {pk: [] for pk in pks}
+            related_rows = (
+                compiled.model._default_manager
+                .filter(**{f'{fk_attname}__in': pks})
+                .values_list(*compiled.columns, fk_attname)
+            )
+            related_rows = list(related_rows)
+            for row, item in zip(related_rows, compiled.render(related_rows, context)):
+                grouped[row[-1]].append(item)
+            for pk, item in zip(pks, data):
+                item[name] = grouped[pk]
+
+    def values(self, queryset, extra=()):
+        """
+        `queryset` as named rows with this serializer's columns plus `extra`
+        (ordering columns the paginator builds cursors from).
+        """
+        columns = self.columns + [name for name in extra if name not in self.columns]
+        return queryset.prefetch_related(None).values_list(*columns, named=True)
+
+
+# Keys include the ?fields= selection, which clients choose: keep the most
+# recently used compilations only (least recently used are dropped)
+MAX_COMPILED = 256
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def field_signature(serializer):
+    """
+    Field names of `serializer` and its nested serializers; ?fields= pruned
+    variants of one serializer class compile separately.
+    """
+    signature = []
+    for name, field in serializer.fields.items():
+        child = nested_serializer(field)
+        signature.append((name, field_signature(child) if child is not None else None))
+    return tuple(signature)
+
+
+def compile_serializer(serializer, model):
+    """
+    The CompiledSerializer for `serializer` (cached per class and field set),
+    or None if it can't be compiled.
+    """
+    key = (type(serializer), model, field_signature(serializer))
+    with _compiled_lock:
+        if key in _compiled:
+            _compiled.move_to_end(key)
+            return _compiled[key]
+    try:
+        compiled = CompiledSerializer(serializer, model)
+    except NotCompilable:
+        compiled = None
+    with _compiled_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > MAX_COMPILED:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+class CompiledListMixin:
+    """
+    ViewSet mixin: list actions render through the compiled serializer when
+    the serializer allows it, with the same output as the regular path.
+    """
+    compiled_actions = ('list',)
+
+    def get_compiled_serializer(self, queryset):
+        if self.action not in self.compiled_actions:
+            return None
+        return compile_serializer(nested_serializer(self.get_serializer()), queryset.model)
+
+    def ordering_columns(self, queryset):
+        """
+        Plain field names the queryset or the paginator order by.
+        """
+        names = [field for field in queryset.query.order_by if isinstance(field, str)]
+        names += list(getattr(self, 'ordering', None) or ())
+        paginator_ordering = getattr(self.paginator, 'ordering', None) or ()
+        names += [paginator_ordering] if isinstance(paginator_ordering, str) else list(paginator_ordering)
+        names = [name.lstrip('-') for name in names]
+        return [name for name in dict.fromkeys(names) if name not in ('?', 'pk')]
+
+    def list(self, request, *args, **kwargs):
+        return self.list_queryset(self.filter_queryset(self.get_queryset()))
+
+    def list_queryset(self, queryset):
+        compiled = self.get_compiled_serializer(queryset)
+        if compiled is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        rows = compiled.values(queryset, self.ordering_columns(queryset))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.render(page, self.get_serializer_context()))
+        return Response(compiled.render(list(rows), self.get_serializer_context()))
@@ -0,0 +1,132 @@
+# apps/common/conditional.py
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_versions, normalized_query
+
+
+def latest_change(model, field):
+    """
+    Newest value of `field` ('updated_at', or a related one such as
+    'category__updated_at') over the whole table it lives on. A bare MAX
+    is read from the end of an index, without a join or a scan.
+    """
+    *relations, name = field.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._default_manager.order_by().aggregate(latest=Max(name))['latest']
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for the actions in `conditional_actions`.
+
+    Before the serializer runs, a cheap probe finds the newest
+    `last_modified_field` (plus `last_modified_related` fields, e.g. the
+    category's updated_at) of the object, or for lists of the whole table.
+    If the client's If-None-Match / If-Modified-Since still matches, a 304
+    is returned without serializing anything.
+
+    List ETags also carry the version counters of `cache_dependencies`
+    (apps/common/cache.py): a deletion leaves no newer updated_at behind
+    but bumps the counter.
+    """
+    conditional_actions = ('list', 'retrieve')
+    last_modified_field = 'updated_at'
+    last_modified_related = ()
+
+    def get_state(self, request, *args, **kwargs):
+        """
+        (newest modification time, version) of the requested object or list.
+        Lists are not narrowed by their filters: any change to the table
+        changes every list's validators, which is cheaper to find out than
+        which lists the change touched.
+        """
+        fields = (self.last_modified_field, *self.last_modified_related)
+        if self.action != 'retrieve':
+            model = self.get_queryset().model
+            values = [latest_change(model, field) for field in fields]
+            versions = get_versions(*getattr(self, 'cache_dependencies', ()))
+            version = '.'.join(str(value) for value in versions.values())
+        else:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                row = queryset.order_by().aggregate(*[Max(field) for field in fields])
+            except (ValidationError, ValueError, TypeError):
+                # e.g. a malformed pk; the regular handler will answer with 404
+                return None, ''
+            values, version = row.values(), ''
+        values = [value for value in values if value is not None]
+        return (max(values) if values else None), version
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Response headers (ETag, Last-Modified) describing the current state
+        of the requested resource, or {} when it doesn't exist.
+        """
+        last_modified, version = self.get_state(request, *args, **kwargs)
+        if last_modified is None:
+            return {}
+        parts = [
+            self.basename, self.action, request.path, normalized_query(request),
+            last_modified.isoformat(), version,
+        ]
+        digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        timestamp = int(last_modified.timestamp())
+        return {
+            'ETag': quote_etag(digest),
+            'Last-Modified': http_date(timestamp),
+            '_last_modified_ts': timestamp,
+        }
+
+    def get_not_modified_response(self, request, validators):
+        """
+        A 304 response when the request's If-None-Match / If-Modified-Since
+        still match `validators`, else None.
+        """
+        matched = get_conditional_response(
+            request._request,
+            etag=validators.get('ETag'),
+            last_modified=validators.get('_last_modified_ts'),
+        )
+        if matched is None or matched.status_code != status.HTTP_304_NOT_MODIFIED:
+            return None
+        return self.apply_validators(Response(status=status.HTTP_304_NOT_MODIFIED), validators)
+
+    @staticmethod
+    def apply_validators(response, validators):
+        for header in ('ETag', 'Last-Modified'):
+            if validators.get(header):
+                response[header] = validators[header]
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators:
+            response = self.get_not_modified_response(request, validators)
+            if response is not None:
+                return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.apply_validators(response, validators)
+            # CachedResponseMixin stores these next to the cached data
+            response.validators = validators
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
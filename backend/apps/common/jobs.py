@@ -0,0 +1,205 @@
+# apps/common/jobs.py
+"""
+Database-backed background jobs.
+
+    from apps.common.jobs import task
+
+    @task('products.build_image_variants', timeout=300)
+    def build_image_variants(product_id):
+        ...
+
+    build_image_variants.enqueue(product_id=str(product.pk))
+
+Tasks live in the apps' `tasks.py` modules (loaded by the worker). enqueue()
+is a plain INSERT, so a job created inside a transaction only becomes
+visible to workers when that transaction commits.
+
+`manage.py run_worker` claims ready jobs with a conditional UPDATE (works
+on every backend, no row locks held while the job runs), sets a visibility
+timeout (`locked_until`) so the jobs of a crashed worker are retried, and
+retries failures with exponential backoff up to `max_attempts`. Finished
+jobs are deleted; jobs that ran out of attempts stay as `failed`, and the
+task's `on_failure(job)` hook (if any) runs once so the app can record it.
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+RETRY_BASE_DELAY = 10      # seconds, doubled per attempt
+RETRY_MAX_DELAY = 60 * 60
+
+
+class Task:
+    def __init__(self, func, name, timeout=300, max_attempts=5, on_failure=None):
+        self.func = func
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure
+
+    def __call__(self, **payload):
+        return self.func(**payload)
+
+    def enqueue(self, delay=0, **payload):
+        return Job.objects.create(
+            name=self.name,
+            payload=payload,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(name, timeout=300, max_attempts=5, on_failure=None):
+    """
+    Registers the decorated function as a background task. Payloads are
+    passed as keyword arguments and must be JSON serializable.
+    `on_failure(job)` is called when a job of the task is given up on.
+    """
+    def decorator(func):
+        registry[name] = Task(func, name, timeout, max_attempts, on_failure)
+        return registry[name]
+    return decorator
+
+
+def load_tasks():
+    autodiscover_modules('tasks')
+
+
+def ready_jobs(now):
+    # Due queued jobs, and running jobs whose worker missed its visibility timeout
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+class Worker:
+    def __init__(self, name=None, batch_size=10, poll_interval=1.0):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stopping = False
+
+    def claim(self):
+        """
+        Claims up to batch_size ready jobs. Each claim is an UPDATE that only
+        matches while the job is still ready, so two workers never both win.
+        """
+        now = timezone.now()
+        # A job that keeps outliving its lock (e.g. it kills the worker) stops being retried
+        expired = Job.objects.filter(status=Job.RUNNING, locked_until__lt=now, attempts__gte=F('max_attempts'))
+        for job in expired:
+            self.dead_letter(
+                job, Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_until__lt=now),
+                'Visibility timeout expired on the last attempt.',
+            )
+        candidates = list(
+            Job.objects.filter(ready_jobs(now)).order_by('run_at', 'id').values_list('pk', 'name')[:self.batch_size]
+        )
+        claimed = []
+        for pk, name in candidates:
+            timeout = registry[name].timeout if name in registry else 60
+            won = Job.objects.filter(ready_jobs(now), pk=pk).update(
+                status=Job.RUNNING,
+                locked_by=self.name,
+                locked_until=now + timedelta(seconds=timeout),
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+            if won:
+                claimed.append(pk)
+        return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+    def execute(self, job):
+        mine = Job.objects.filter(pk=job.pk, locked_by=self.name)
+        task = registry.get(job.name)
+        if task is not None:
+            # The visibility timeout counts from the start of this job, not the batch claim
+            if not mine.filter(status=Job.RUNNING).update(locked_until=timezone.now() + timedelta(seconds=task.timeout)):
+                return False  # lock expired and another worker took the job
+        try:
+            if task is None:
+                raise LookupError(f'Unknown task {job.name!r}')
+            task.func(**job.payload)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning('Job %s (%s) failed, attempt %s/%s', job.pk, job.name, job.attempts, job.max_attempts)
+            if task is not None and job.attempts < job.max_attempts:
+                mine.update(
+                    status=Job.QUEUED, locked_until=None, last_error=error, updated_at=timezone.now(),
+                    run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+                )
+            else:
+                self.dead_letter(job, mine, error)
+            return False
+        mine.delete()
+        return True
+
+    def dead_letter(self, job, rows, error):
+        """
+        Marks the job failed for good (if `rows` still match it) and runs the
+        task's on_failure hook. A failing hook is logged, never retried.
+        """
+        if not rows.update(status=Job.FAILED, locked_until=None, last_error=error, updated_at=timezone.now()):
+            return False
+        job.status, job.last_error = Job.FAILED, error
+        task = registry.get(job.name)
+        if task is not None and task.on_failure is not None:
+            try:
+                task.on_failure(job)
+            except Exception:
+                logger.exception('on_failure of job %s (%s) failed', job.pk, job.name)
+        return True
+
+    def run(self, burst=False):
+        """
+        Processes jobs until stopped (SIGTERM/SIGINT finish the current job
+        first), or with burst=True until no job is ready.
+        """
+        load_tasks()
+        processed = 0
+        while not self.stopping:
+            close_old_connections()
+            jobs = self.claim()
+            if not jobs:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            for index, job in enumerate(jobs):
+                self.execute(job)
+                processed += 1
+                if self.stopping:
+                    self.release(jobs[index + 1:])
+                    break
+        return processed
+
+    def release(self, jobs):
+        # Claimed but not started: back to the queue right away, attempt not counted
+        Job.objects.filter(pk__in=[job.pk for job in jobs], locked_by=self.name, status=Job.RUNNING).update(
+            status=Job.QUEUED, locked_until=None, attempts=F('attempts') - 1,
+        )
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
@@ -0,0 +1,59 @@
+# backend/apps/common/management/commands/benchmark_serializers.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.common.compiled import compile_serializer
+from apps.common.sparse import plan_projection
+from apps.orders.models import CartItem, OrderItem
+from apps.orders.serializers import CartItemSerializer, OrderItemSerializer
+from apps.products.models import Product
+from apps.products.serializers import ProductListSerializer
+from apps.wishlist.models import WishlistItem
+from apps.wishlist.serializers import WishlistItemSerializer
+
+# (label, serializer class, model) pairs that list endpoints render
+TARGETS = [
+    ('products', ProductListSerializer, Product),
+    ('cart items', CartItemSerializer, CartItem),
+    ('order items', OrderItemSerializer, OrderItem),
+    ('wishlist items', WishlistItemSerializer, WishlistItem),
+]
+
+
+class Command(BaseCommand):
+    help = "Compares rows/sec of the regular DRF serializers with the compiled values_list() path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help="Rows rendered per iteration.")
+        parser.add_argument('--iterations', type=int, default=10)
+
+    def run(self, render, iterations):
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            rows += len(render())
+        elapsed = time.perf_counter() - started
+        return rows / elapsed if elapsed else 0
+
+    def handle(self, *args, **options):
+        limit, iterations = options['rows'], options['iterations']
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        self.stdout.write(f"{'serializer':<18}{'rows':>7}{'drf rows/s':>14}{'compiled rows/s':>18}{'speedup':>10}")
+
+        for label, serializer_class, model in TARGETS:
+            serializer = serializer_class(context=context)
+            # The DRF path gets the same select_related/only() the views use
+            queryset = plan_projection(serializer, model).apply(model.objects.order_by('pk'))[:limit]
+            compiled = compile_serializer(serializer, model)
+            rows = len(queryset)
+            if not rows or compiled is None:
+                self.stdout.write(f"{label:<18}{rows:>7}{'skipped (no rows or not compilable)':>42}")
+                continue
+
+            drf = self.run(lambda: serializer_class(queryset.all(), many=True, context=context).data, iterations)
+            fast = self.run(lambda: compiled.render(list(compiled.values(queryset.all())), context), iterations)
+            self.stdout.write(f"{label:<18}{rows:>7}{drf:>14,.0f}{fast:>18,.0f}{fast / drf:>9.1f}x")
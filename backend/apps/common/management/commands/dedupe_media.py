@@ -0,0 +1,93 @@
+# apps/common/management/commands/dedupe_media.py
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.common.cache import bump_version
+from apps.common.storage import CONTENT_ADDRESSED_NAME, content_name, file_digest
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves product images to content-addressed names (products/<hash[:2]>/<hash>.<ext>), "
+        "storing identical files once, and rewrites Product.image to the new paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Products updated per query.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change, write nothing.")
+        parser.add_argument(
+            '--keep-originals', action='store_true',
+            help="Don't delete the old files after the products point to the new ones.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Product._meta.get_field('image').storage
+        dry_run = options['dry_run']
+        products = (
+            Product.objects.exclude(image='').exclude(image__isnull=True)
+            .only('pk', 'image', 'image_variants', 'updated_at').order_by('pk')
+        )
+
+        seen = {}          # content-addressed name -> size, files kept
+        replaced = set()   # old names no product points to any more
+        batch = []
+        moved = missing = 0
+        saved_bytes = 0
+
+        def flush():
+            if batch and not dry_run:
+                # updated_at too: detail ETags must change with the image URLs
+                Product.objects.bulk_update(batch, ['image', 'image_variants', 'updated_at'])
+            batch.clear()
+
+        for product in products.iterator(chunk_size=options['batch_size']):
+            old_name = product.image.name
+            if CONTENT_ADDRESSED_NAME.search(old_name):
+                continue
+            try:
+                with storage.open(old_name) as source:
+                    size = source.size
+                    new_name = content_name(old_name, file_digest(source))
+                    duplicate = new_name in seen or storage.exists(new_name)
+                    if not dry_run:
+                        new_name = storage.save(old_name, File(source))
+            except OSError:
+                missing += 1
+                self.stderr.write(f"{product.pk}: missing file {old_name}")
+                continue
+
+            if duplicate and old_name not in replaced:
+                saved_bytes += size
+            seen.setdefault(new_name, size)
+            replaced.add(old_name)
+            moved += 1
+
+            product.image.name = new_name
+            product.updated_at = timezone.now()
+            # Same bytes -> same derivatives; keep them without a rebuild
+            if (product.image_variants or {}).get('source') == old_name:
+                product.image_variants['source'] = new_name
+            batch.append(product)
+            if len(batch) >= options['batch_size']:
+                flush()
+        flush()
+
+        deleted = 0
+        if not dry_run:
+            bump_version('products.product')
+            if not options['keep_originals']:
+                still_used = set(
+                    Product.objects.filter(image__in=replaced).values_list('image', flat=True)
+                ) if replaced else set()
+                for name in replaced - still_used - set(seen):
+                    storage.delete(name)
+                    deleted += 1
+
+        prefix = "Dry run: " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{moved} product images renamed to {len(seen)} files "
+            f"({saved_bytes} bytes of duplicates), {deleted} old files deleted, {missing} missing."
+        ))
@@ -0,0 +1,54 @@
+# apps/common/management/commands/run_worker.py
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.common.jobs import Worker
+
+
+def run_process(index, options):
+    worker = Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+    worker.name = f'{worker.name}/{index}'
+    worker.install_signal_handlers()
+    worker.run(burst=options['burst'])
+
+
+class Command(BaseCommand):
+    help = "Runs background jobs from the database queue (image processing, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to start.")
+        parser.add_argument('--batch-size', type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is ready instead of waiting.")
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            worker = Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+            worker.install_signal_handlers()
+            processed = worker.run(burst=options['burst'])
+            self.stdout.write(self.style.SUCCESS(f"Worker {worker.name} processed {processed} jobs."))
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=run_process, args=(index, options), daemon=False)
+            for index in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()  # SIGTERM: children finish their current job
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(processes)} worker processes stopped."))
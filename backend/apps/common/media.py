@@ -0,0 +1,168 @@
+# apps/common/media.py
+"""
+Serves uploaded media from MEDIA_ROOT (only MEDIA_PUBLIC_DIRS).
+
+- The path is checked before anything is read: '.', '..' and empty
+  segments are refused (the URL arrives percent-decoded, so '%2e%2e' and
+  '..%2f' are caught too), and the resolved file, symlinks followed, must
+  lie inside one of the public directories.
+
+- Content-addressed files (apps/common/storage.py, product image variants)
+  never change under their name: `Cache-Control: public, max-age=1 year,
+  immutable`. Other files are cached for an hour and revalidated.
+- ETag / Last-Modified with 304 answers, `Range: bytes=` requests (206/416).
+- With MEDIA_SENDFILE_HEADER set, Django only checks the path and the web
+  server sends the file (X-Accel-Redirect / X-Sendfile), Range included.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .storage import CONTENT_ADDRESSED_NAME
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60 * 60
+# Image variants: <2 hex>/<40 hex>-<width>w.<ext> (apps/products/images.py)
+DERIVED_NAME = re.compile(r'(^|/)(?P<prefix>[0-9a-f]{2})/(?P=prefix)[0-9a-f]{38}-\d+w\.\w+$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def resolve_public_path(path):
+    """
+    Absolute path of the public media file `path` (relative to MEDIA_ROOT),
+    or None if it isn't a plain relative path into MEDIA_PUBLIC_DIRS.
+    """
+    if '\x00' in path or '\\' in path:
+        return None
+    parts = path.split('/')
+    if any(part in ('', '.', '..') for part in parts):
+        return None
+    full_path = os.path.realpath(os.path.join(settings.MEDIA_ROOT, *parts))
+    for directory in settings.MEDIA_PUBLIC_DIRS:
+        root = os.path.realpath(os.path.join(settings.MEDIA_ROOT, directory))
+        if full_path.startswith(root + os.sep):
+            return full_path
+    return None
+
+
+def is_immutable(path):
+    return bool(CONTENT_ADDRESSED_NAME.search(path) or DERIVED_NAME.search(path))
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, None to send the
+    whole file (no/unsupported header), or ValueError if unsatisfiable.
+    """
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start, end = int(first), int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of `file` from its current position,
+    for FileResponse's chunked streaming.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+@require_safe
+def serve_media(request, path):
+    full_path = resolve_public_path(path)
+    if full_path is None:
+        raise Http404('Not found.')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found.')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found.')
+
+    immutable = is_immutable(path)
+    etag = f'"{os.path.basename(path).split(".")[0]}"' if immutable else f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+    cache_control = (
+        f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if immutable
+        else f'public, max-age={MUTABLE_MAX_AGE}'
+    )
+
+    def with_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = cache_control
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return with_headers(not_modified)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    sendfile_header = settings.MEDIA_SENDFILE_HEADER
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header.lower() == 'x-sendfile':
+            response[sendfile_header] = full_path
+        else:
+            response[sendfile_header] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + path
+        return with_headers(response)
+
+    # If-Range with an old validator: the client's partial copy is stale, send everything
+    if_range = request.headers.get('If-Range')
+    byte_range = None
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return with_headers(response)
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return with_headers(response)
@@ -1,6 +1,7 @@
 # apps/common/models.py
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.conf import settings # User model ko get karne ke liye
 
 class BaseModel(models.Model):
@@ -25,4 +26,37 @@ class BaseModel(models.Model):
     )
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class Job(models.Model):
+    """
+    One unit of background work for the database-backed queue in
+    apps/common/jobs.py (run by `manage.py run_worker`).
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed'))
+
+    name = models.CharField(max_length=100)  # registered task name, e.g. 'products.build_image_variants'
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Earliest time the job may run (retries are pushed back with a backoff)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Visibility timeout: a running job whose lock expired (worker died) is picked up again
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_ready_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_lock_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
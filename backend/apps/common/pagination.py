@@ -0,0 +1,197 @@
+# apps/common/pagination.py
+
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def seek_filter(ordering, values):
+    """
+    Rows strictly after `values` in `ordering`:
+    (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... with < for descending fields.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder cuts datetimes to milliseconds; cursor positions must
+    keep the full microsecond value to compare equal to the stored one.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over the active ordering plus `id` as a
+    tiebreaker, e.g. (created_at, id) or (price, id).
+
+    Every page is a `WHERE (f1, id) > (v1, v2) ... LIMIT n` query, so deep
+    pages cost the same as the first one and no COUNT(*) is run. Cursors are
+    opaque base64 tokens returned in `next` / `previous`.
+
+    Clients that still need page numbers (and `count`) can send `?page=N`,
+    which switches that request to the regular PageNumberPagination.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Used when neither the view nor an OrderingFilter provides an ordering.
+    ordering = ('-created_at',)
+    tiebreaker = 'id'
+
+    page_number_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number = None
+        if self.page_query_param in request.query_params:
+            self.page_number = self.page_number_class()
+            self.page_number.page_size = self.page_size
+            return self.page_number.paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+
+        reverse = bool(cursor and cursor['reverse'])
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            try:
+                queryset = queryset.filter(self.seek_filter(ordering, cursor['values']))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.page_number is not None:
+            return self.page_number.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ----------------- ordering -----------------
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Same lookup order as DRF's CursorPagination (OrderingFilter, then the
+        view's `ordering`, then ours), with the `id` tiebreaker appended so
+        that every position in the result set is unique.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', None) or []:
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        ordering = list(ordering)
+        if not any(field.lstrip('-') in (self.tiebreaker, 'pk') for field in ordering):
+            descending = ordering[-1].startswith('-')
+            ordering.append(f'-{self.tiebreaker}' if descending else self.tiebreaker)
+        return tuple(ordering)
+
+    def reversed_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def seek_filter(self, ordering, values):
+        return seek_filter(ordering, values)
+
+    # ----------------- cursors -----------------
+
+    def position(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(row, dict):
+                value = row[name]
+            else:
+                value = row
+                for part in name.split('__'):
+                    value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, row, reverse):
+        payload = {'o': list(self.ordering), 'v': self.position(row), 'r': int(reverse)}
+        token = urlsafe_b64encode(json.dumps(payload, cls=CursorJSONEncoder).encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            values, reverse = payload['v'], bool(payload['r'])
+            valid = tuple(payload['o']) == self.ordering and len(values) == len(self.ordering)
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': values, 'reverse': reverse}
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,222 @@
+# apps/common/sparse.py
+"""
+Sparse fieldsets for read endpoints:
+
+    ?fields=id,name,category.name     only these (dotted names reach nested serializers)
+    ?exclude=description,seller       everything except these
+
+The chosen fields are removed from the serializer *and* drive the queryset:
+only() the columns the remaining fields read, select_related() the nested
+foreign keys and Prefetch() the nested reverse relations, so a smaller
+payload also means fewer columns and joins in SQL.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_field_spec(value):
+    """
+    'id,category.name,category.slug' -> {'id': {}, 'category': {'name': {}, 'slug': {}}}
+    An empty dict means "the whole field".
+    """
+    spec = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        node = spec
+        for part in item.split('.'):
+            node = node.setdefault(part.strip(), {})
+    return spec
+
+
+def nested_serializer(field):
+    if isinstance(field, ListSerializer):
+        field = field.child
+    return field if isinstance(field, BaseSerializer) else None
+
+
+def prune_fields(serializer, include=None, exclude=None, path=''):
+    """
+    Removes the fields not in `include` / in `exclude` from `serializer`
+    and, for dotted names, from its nested serializers.
+    """
+    fields = serializer.fields
+    unknown = sorted(f'{path}{name}' for name in {*(include or {}), *(exclude or {})} if name not in fields)
+    if unknown:
+        raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+
+    for name in list(fields):
+        if include is not None and name not in include:
+            fields.pop(name)
+            continue
+        sub_include = (include or {}).get(name) or None
+        sub_exclude = (exclude or {}).get(name)
+        if sub_exclude == {}:
+            fields.pop(name)
+            continue
+        if sub_include or sub_exclude:
+            child = nested_serializer(fields[name])
+            if child is None:
+                raise ValidationError({'fields': f"'{path}{name}' has no nested fields."})
+            prune_fields(child, sub_include, sub_exclude or None, f'{path}{name}.')
+
+
+class Projection:
+    """
+    What a serializer reads from `model`: the columns for only() (None when a
+    field can't be traced to columns, i.e. load everything), select_related()
+    paths and (lookup, queryset, to_attr) to prefetch.
+    """
+
+    def __init__(self):
+        self.only = set()
+        self.select = set()
+        self.prefetch = []
+
+    def add_sources(self, model, source, columns):
+        """
+        Columns read by model code: a property on `model`, or the related
+        row's __str__ when `source` is a foreign key (StringRelatedField).
+        """
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is not None and model_field.is_relation:
+            self.select.add(source)
+            columns = [source, *(f'{source}__{column}' for column in columns)]
+        if self.only is not None:
+            self.only.update(columns)
+
+    def add_related(self, name, child):
+        self.select.add(name)
+        self.select.update(f'{name}__{path}' for path in child.select)
+        if self.only is not None and child.only is not None:
+            self.only.update(f'{name}__{field}' for field in child.only)
+        self.prefetch.extend((f'{name}__{lookup}', queryset, to_attr) for lookup, queryset, to_attr in child.prefetch)
+
+    def apply(self, queryset, extra_fields=()):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        if self.only is not None:
+            queryset = queryset.only(*sorted({queryset.model._meta.pk.name, *self.only, *extra_fields}))
+        for lookup, related_queryset, to_attr in self.prefetch:
+            queryset = queryset.prefetch_related(Prefetch(lookup, queryset=related_queryset, to_attr=to_attr))
+        return queryset
+
+
+def plan_projection(serializer, model):
+    """
+    Builds the Projection for the readable fields of `serializer`.
+
+    Serializer fields backed by model code can list the columns it reads in
+    `Meta.field_sources`, e.g. {'discount_percent': ('price', 'sale_price')}
+    for a property, {'user': ('email', 'role')} for a StringRelatedField
+    (columns of the related model). Any other non-column field switches
+    only() off for that model.
+
+    `Meta.related_querysets` maps a nested field to (reverse relation,
+    function refining its prefetch queryset), e.g. ordering and slicing it
+    to embed only the first N rows. Those rows are prefetched into the
+    field's `source` attribute (a sliced prefetch needs its own to_attr).
+    """
+    projection = Projection()
+    field_sources = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+
+    related_querysets = getattr(getattr(serializer, 'Meta', None), 'related_querysets', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in field_sources:
+            projection.add_sources(model, field.source, field_sources[name])
+            continue
+        if field.source == '*' or len(field.source_attrs) != 1:
+            projection.only = None
+            continue
+
+        attr, refine, to_attr = field.source_attrs[0], None, None
+        if name in related_querysets:
+            (attr, refine), to_attr = related_querysets[name], field.source
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            projection.only = None
+            continue
+        child = nested_serializer(field)
+
+        if not model_field.is_relation:
+            if projection.only is not None:
+                projection.only.add(attr)
+        elif model_field.concrete and not model_field.many_to_many:
+            # Forward FK / one-to-one
+            if projection.only is not None:
+                projection.only.add(attr)
+            if child is not None:
+                projection.add_related(attr, plan_projection(child, model_field.related_model))
+            elif not isinstance(field, PrimaryKeyRelatedField):
+                projection.select.add(attr)
+        else:
+            # Reverse FK / many-to-many: one extra query for all rows
+            related_queryset = model_field.related_model._default_manager.all()
+            if child is not None:
+                child_projection = plan_projection(child, model_field.related_model)
+                if child_projection.only is not None and model_field.one_to_many:
+                    # The prefetch needs the FK back to this model
+                    child_projection.only.add(model_field.field.name)
+                related_queryset = child_projection.apply(related_queryset)
+            if refine is not None:
+                related_queryset = refine(related_queryset)
+            projection.prefetch.append((attr, related_queryset, to_attr))
+    return projection
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin adding ?fields= / ?exclude= to the actions in
+    `sparse_actions`, for the serializer and the queryset alike.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def get_field_spec(self):
+        params = self.request.query_params
+        include = parse_field_spec(params.get(FIELDS_PARAM, ''))
+        exclude = parse_field_spec(params.get(EXCLUDE_PARAM, ''))
+        return include or None, exclude or None
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action in self.sparse_actions:
+            include, exclude = self.get_field_spec()
+            if include or exclude:
+                prune_fields(nested_serializer(serializer), include, exclude)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.sparse_actions:
+            queryset = self.sparse_queryset(queryset)
+        return queryset
+
+    def sparse_queryset(self, queryset):
+        """
+        Restricts `queryset` to what the (pruned) serializer will read. The
+        ordering columns stay loaded, keyset cursors are built from them.
+        """
+        projection = plan_projection(nested_serializer(self.get_serializer()), queryset.model)
+        ordering = [
+            field.lstrip('-') for field in queryset.query.order_by
+            if isinstance(field, str) and '__' not in field and field.lstrip('-') != '?'
+        ]
+        ordering += [field.lstrip('-') for field in getattr(self, 'ordering', None) or ()]
+        model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+        return projection.apply(queryset, [field for field in ordering if field in model_fields])
@@ -0,0 +1,63 @@
+# apps/common/storage.py
+"""
+Content-addressed file storage.
+
+Uploads are stored under the SHA-256 of their bytes instead of the client's
+filename:
+
+    products/pexels-844867.jpg  ->  products/3f/3fa94c...e1.jpg
+
+so the same photo uploaded twice is stored once (the second save finds the
+file and writes nothing), and a stored name never changes content, which is
+what lets apps.common.media serve it as immutable.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage, storages
+
+# <dir>/<2 hex>/<64 hex>.<ext>
+CONTENT_ADDRESSED_NAME = re.compile(r'(^|/)(?P<prefix>[0-9a-f]{2})/(?P=prefix)[0-9a-f]{62}\.\w+$')
+
+
+def file_digest(content, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(chunk_size) if hasattr(content, 'chunks') else iter(lambda: content.read(chunk_size), b''):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def content_name(name, digest):
+    """
+    'products/photo.JPG' + digest -> 'products/3f/3fa94c....jpg'
+    """
+    directory, filename = posixpath.split(name.replace('\\', '/'))
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, **kwargs):
+        # Two concurrent saves of one file write identical bytes
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = content_name(self.generate_filename(name), file_digest(content))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def product_image_storage():
+    # Resolved lazily so settings.STORAGES (and test overrides) apply
+    return storages['product_images']
@@ -0,0 +1,160 @@
+# apps/common/testing.py
+"""
+Helpers for the query-plan regression tests in the app `tests.py` modules.
+"""
+
+import re
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Tables large enough in production that a full scan is a regression.
+WATCHED_TABLES = (
+    'products_product',
+    'products_review',
+    'orders_order',
+    'orders_orderitem',
+    'orders_cartitem',
+    'wishlist_wishlistitem',
+    'products_similarproduct',
+)
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?P<table>\w+)(?: AS \w+)?$')
+
+
+def explain(sql):
+    """
+    Returns [(table, is_full_scan, description)] for one SELECT statement
+    on the current database.
+    """
+    plan = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for row in cursor.fetchall():
+                detail = row[-1]
+                match = SQLITE_FULL_SCAN.match(detail)
+                table = match.group('table') if match else ''
+                plan.append((table, bool(match), detail))
+        else:
+            cursor.execute(f'EXPLAIN {sql}')
+            columns = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                row = dict(zip(columns, row))
+                table = row.get('table') or ''
+                plan.append((table, row.get('type') == 'ALL', str(row)))
+    return plan
+
+
+def analyze_tables():
+    """
+    Refreshes planner statistics, as production databases have them; without
+    stats the planners guess and the plans don't reflect real traffic.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+        else:
+            cursor.execute(f"ANALYZE TABLE {', '.join(WATCHED_TABLES)}")
+
+
+class QueryPlanAssertionsMixin:
+    """
+    `with self.assertNoFullScans(): self.client.get(url)` captures every
+    SELECT the block runs, EXPLAINs it, and fails if one of the
+    WATCHED_TABLES is read with a full table scan.
+
+    Assert the response status inside the block too: an error response
+    that stops before its queries has no full scans either.
+    """
+    watched_tables = WATCHED_TABLES
+    # Regexes of statements that are allowed to scan (matched against the SQL)
+    allowed_full_scans = ()
+
+    def setUp(self):
+        super().setUp()
+        # Cached responses would hide the queries we want to look at
+        cache.clear()
+
+    @contextmanager
+    def assertNoFullScans(self):
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, "No SELECT statements were captured.")
+
+        offenders = []
+        for sql in selects:
+            if any(re.search(pattern, sql) for pattern in self.allowed_full_scans):
+                continue
+            plan = explain(sql)
+            scans = [step for step in plan if step[1] and step[0] in self.watched_tables]
+            if scans:
+                details = '\n    '.join(step[2] for step in plan)
+                offenders.append(f"{sql}\n    {details}")
+        if offenders:
+            self.fail("Full table scan in query plan:\n\n" + '\n\n'.join(offenders))
+
+
+def seed_catalog(products=300, categories=6, buyers=20, reviews_per_product=2, orders=40, cart_size=10):
+    """
+    Creates a seller, buyers, categories, products, reviews, orders and carts
+    with bulk inserts, so plans are checked against non-trivial tables.
+    Returns a dict with the created seller, buyer, products and cart.
+    """
+    from apps.orders.models import Cart, CartItem, Order, OrderItem
+    from apps.products.models import Category, Product, Review
+    from apps.users.models import User
+    from ecommerce_api.roles import Role
+
+    seller = User.objects.create_user(email='plan-seller@example.com', username='plan-seller', password=None, role=Role.SELLER)
+    buyers = [
+        User.objects.create_user(email=f'plan-buyer{i}@example.com', username=f'plan-buyer{i}', password=None, role=Role.BUYER)
+        for i in range(buyers)
+    ]
+    # Saved one by one: Category.save() maintains the tree path
+    category_objs = [
+        Category.objects.create(name=f'Plan category {i}', slug=f'plan-category-{i}') for i in range(categories)
+    ]
+    product_objs = Product.objects.bulk_create([
+        Product(
+            name=f'Plan product {i}',
+            description='Seeded product for query plan tests.',
+            price=Decimal(100 + i),
+            category=category_objs[i % categories],
+            seller=seller,
+            stock=10,
+            is_active=i % 10 != 0,
+        )
+        for i in range(products)
+    ])
+    Review.objects.bulk_create([
+        Review(product=product, user=buyers[i], rating=1 + (i + j) % 5)
+        for j, product in enumerate(product_objs)
+        for i in range(reviews_per_product)
+    ])
+    order_objs = Order.objects.bulk_create([
+        Order(user=buyers[i % len(buyers)], total_amount=Decimal('200.00')) for i in range(orders)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product_objs[(i * 7 + k) % products], quantity=1, price_at_purchase=Decimal('100.00'))
+        for i, order in enumerate(order_objs)
+        for k in range(2)
+    ])
+    carts = Cart.objects.bulk_create([Cart(user=buyer) for buyer in buyers])
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=product_objs[(i * cart_size + k) % products])
+        for i, cart in enumerate(carts)
+        for k in range(cart_size)
+    ])
+    analyze_tables()
+    return {
+        'seller': seller,
+        'buyer': buyers[0],
+        'categories': category_objs,
+        'products': product_objs,
+        'cart': carts[0],
+    }
@@ -1,3 +1,123 @@
-from django.test import TestCase
+# backend/apps/common/tests.py
 
-# Create your tests here.
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+IMMUTABLE_NAME = 'products/3f/3f' + 'a' * 62 + '.jpg'
+
+
+class MediaTestCase(SimpleTestCase):
+    """
+    A throwaway MEDIA_ROOT with one public file, one private file next to
+    the public directory and one file outside MEDIA_ROOT altogether.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.media_root = os.path.join(self.root, 'media')
+        self.content = bytes(range(256)) * 4
+        self.write(os.path.join(self.media_root, 'products', 'photo.jpg'), self.content)
+        self.write(os.path.join(self.media_root, IMMUTABLE_NAME), self.content)
+        self.write(os.path.join(self.media_root, 'private', 'notes.txt'), b'private')
+        self.write(os.path.join(self.root, 'settings.py'), b'SECRET_KEY = "x"')
+        settings = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_HEADER='')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+    def get(self, path, **headers):
+        response = self.client.get(path, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+
+class MediaPathTests(MediaTestCase):
+    def test_traversal_is_refused(self):
+        paths = [
+            '/media/products/../private/notes.txt',
+            '/media/products/../../settings.py',
+            '/media/products/..%2f..%2fsettings.py',
+            '/media/products/%2e%2e/%2e%2e/settings.py',
+            '/media/products/%2E%2E%2Fprivate%2Fnotes.txt',
+            '/media/products/..\\..\\settings.py',
+            '/media/products/./photo.jpg',
+            '/media/products//photo.jpg',
+            '/media//etc/passwd',
+            '/media/%2Fetc%2Fpasswd',
+            '/media/private/notes.txt',
+            '/media/products',
+        ]
+        for path in paths:
+            response, body = self.get(path)
+            self.assertEqual(response.status_code, 404, path)
+            self.assertNotIn(b'SECRET_KEY', body)
+
+    def test_symlink_out_of_public_dir_is_refused(self):
+        os.symlink(os.path.join(self.root, 'settings.py'), os.path.join(self.media_root, 'products', 'link.py'))
+        self.assertEqual(self.get('/media/products/link.py')[0].status_code, 404)
+
+    def test_public_file_is_served(self):
+        response, body = self.get('/media/products/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+
+class MediaHeaderTests(MediaTestCase):
+    def test_cache_control(self):
+        response, _ = self.get(f'/media/{IMMUTABLE_NAME}')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], '"3f' + 'a' * 62 + '"')
+        response, _ = self.get('/media/products/photo.jpg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_not_modified(self):
+        response, _ = self.get('/media/products/photo.jpg')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        response, body = self.get('/media/products/photo.jpg', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, body), (304, b''))
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get('/media/products/photo.jpg', HTTP_IF_MODIFIED_SINCE=last_modified)[0].status_code, 304)
+
+    def test_ranges(self):
+        url = '/media/products/photo.jpg'
+        response, body = self.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[10:20])
+        self.assertEqual((response['Content-Range'], response['Content-Length']), ('bytes 10-19/1024', '10'))
+
+        response, body = self.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual((response.status_code, body), (206, self.content[-5:]))
+        response, body = self.get(url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(body, self.content[1000:])
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+
+        response, _ = self.get(url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */1024'))
+        # Unsupported (multi-range) headers get the whole file
+        response, body = self.get(url, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+    def test_if_range(self):
+        url = '/media/products/photo.jpg'
+        etag = self.get(url)[0]['ETag']
+        self.assertEqual(self.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)[0].status_code, 206)
+        response, body = self.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+    def test_sendfile(self):
+        with override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect', MEDIA_SENDFILE_PREFIX='/protected-media/'):
+            response, body = self.get('/media/products/photo.jpg')
+            self.assertEqual((response['X-Accel-Redirect'], body), ('/protected-media/products/photo.jpg', b''))
+            self.assertEqual(self.get('/media/products/../private/notes.txt')[0].status_code, 404)
+
+    def test_only_safe_methods(self):
+        self.assertEqual(self.client.post('/media/products/photo.jpg').status_code, 405)
@@ -1,3 +1,23 @@
-from django.shortcuts import render
+# apps/common/views.py
 
-# Create your views here.
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import get_stats, reset_stats
+
+
+class CacheStatsAPIView(APIView):
+    """
+    Hit/miss counters of the catalog response cache (staff only).
+    - GET: current counters.
+    - DELETE: reset the counters.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
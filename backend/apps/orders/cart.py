@@ -0,0 +1,378 @@
+# apps/orders/cart.py
+"""
+Lazily created carts.
+
+A user's Cart row is only created by their first write (adding an item).
+Reads of a user without a cart answer with an empty cart and no INSERT.
+
+The user -> cart id mapping never changes once a cart exists (the cart
+only goes away with its user), so it is cached per user. Cart reads and
+item updates then filter on the cached cart_id instead of joining on the
+user. "No cart yet" is not cached: the first add may run in another
+process, and a cached miss would hide the new cart there. A missing cart
+is one indexed lookup per read.
+
+The cached ids are only dropped (post_delete of the cart) in the cache of
+the process that deleted it, so deployments with more than one process
+need a shared CACHE_BACKEND (Redis, Memcached); the per-process
+LocMemCache default is for a single process only.
+
+Adding a product is one INSERT ... ON CONFLICT / ON DUPLICATE KEY statement
+that increments the existing row in the database (add_to_cart), so
+concurrent adds of the same product neither lose updates nor create a
+second row (unique constraint cartitem_cart_product_uniq).
+
+/cart/batch/ applies a list of add / set / remove operations (or re-adds
+the lines of a past order) with at most three statements in one
+transaction (apply_cart_changes).
+
+Visitors who aren't logged in get a GuestCart: {product_id: quantity} in a
+signed cookie, so anonymous traffic (bots included) never writes Cart rows
+or cache entries. Login / signup merge it into the user's cart with one
+upsert (merge_guest_cart).
+"""
+
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils.functional import cached_property
+
+from apps.common.bulk import upsert_options
+
+from apps.products.models import Product
+
+from .models import Cart, CartItem, summarize_totals
+
+CART_ID_KEY = 'orders:cart-id:{}'
+CART_ID_TIMEOUT = 24 * 60 * 60
+
+
+def cart_id_key(user_id):
+    return CART_ID_KEY.format(user_id)
+
+
+def get_cart_id(user):
+    """
+    Pk of the user's cart, or None if they have none yet.
+    """
+    key = cart_id_key(user.pk)
+    cart_id = cache.get(key)
+    if cart_id is None:
+        cart_id = Cart.objects.filter(user=user).values_list('pk', flat=True).first()
+        if cart_id is not None:
+            cache.set(key, cart_id, CART_ID_TIMEOUT)
+    return cart_id
+
+
+def get_or_create_cart_id(user):
+    """
+    Pk of the user's cart, creating the cart on the first write.
+    """
+    cart_id = get_cart_id(user)
+    if cart_id is None:
+        # user is unique: a concurrent first add ends up with the same row
+        cart, _ = Cart.objects.get_or_create(user=user)
+        cart_id = cart.pk
+        cache.set(cart_id_key(user.pk), cart_id, CART_ID_TIMEOUT)
+    return cart_id
+
+
+def forget_cart_id(user_id):
+    cache.delete(cart_id_key(user_id))
+
+
+def empty_cart(user):
+    """
+    What CartSerializer returns for a cart without items, for users who
+    have no Cart row.
+    """
+    return {
+        'id': None,
+        'user': user.pk,
+        'items': [],
+        'item_count': 0,
+        'subtotal': '0.00',
+        'discount': '0.00',
+        'total': '0.00',
+        'sellers': [],
+        'created_at': None,
+    }
+
+
+# ===============================================
+#  ADD TO CART (UPSERT)
+# ===============================================
+
+def insert_values(item):
+    """
+    Columns and database values of a new CartItem, the same way Django's
+    INSERT prepares them (UUID pk, auto_now timestamps).
+    """
+    fields = CartItem._meta.local_concrete_fields
+    return (
+        [field.column for field in fields],
+        [field.get_db_prep_save(field.pre_save(item, True), connection) for field in fields],
+    )
+
+
+def upsert_sql(columns, rows, caps):
+    """
+    INSERT of `rows` cart items where each conflicting (cart, product) row
+    gets the new quantity added to it instead. With `caps`, the quantity of
+    each product is limited by a CASE on its product_id.
+    """
+    qn = connection.ops.quote_name
+    table = qn(CartItem._meta.db_table)
+    quantity, updated_at, product_id = qn('quantity'), qn('updated_at'), qn('product_id')
+    row = f"({', '.join(['%s'] * len(columns))})"
+    insert = (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+        f"VALUES {', '.join([row] * rows)}"
+    )
+
+    if connection.vendor == 'mysql':
+        # MySQL 8.0.19+ names the new row with an alias, VALUES() is deprecated there
+        if not connection.mysql_is_mariadb and connection.mysql_version >= (8, 0, 19):
+            insert, new = f'{insert} AS new', lambda column: f'new.{column}'
+        else:
+            new = lambda column: f'VALUES({column})'
+        least, conflict = 'LEAST', 'ON DUPLICATE KEY UPDATE'
+    else:
+        # SQLite and PostgreSQL
+        new = lambda column: f'excluded.{column}'
+        least = 'MIN' if connection.vendor == 'sqlite' else 'LEAST'
+        conflict = f"ON CONFLICT ({qn('cart_id')}, {product_id}) DO UPDATE SET"
+
+    total = f'{table}.{quantity} + {new(quantity)}'
+    if caps:
+        total = f"{least}({total}, CASE {new(product_id)} {'WHEN %s THEN %s ' * caps}END)"
+    return f'{insert} {conflict} {quantity} = {total}, {updated_at} = {new(updated_at)}'
+
+
+def add_many_to_cart(cart_id, quantities, max_quantities=None):
+    """
+    Adds {product_id: quantity} to the cart in one statement: new rows, or
+    `quantity = quantity + n` on the existing ones. With `max_quantities`
+    ({product_id: stock}) no row ends up holding more than that.
+    """
+    max_quantities = max_quantities or {}
+    quantities = {
+        product_id: min(quantity, max_quantities.get(product_id, quantity))
+        for product_id, quantity in quantities.items()
+    }
+    if not quantities:
+        return
+    if connection.vendor not in ('mysql', 'sqlite', 'postgresql'):
+        for product_id, quantity in quantities.items():
+            add_to_cart_fallback(cart_id, product_id, quantity, max_quantities.get(product_id))
+        return
+
+    params = []
+    for product_id, quantity in quantities.items():
+        columns, values = insert_values(CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity))
+        params += values
+    product_field = CartItem._meta.get_field('product')
+    caps = [(product_id, cap) for product_id, cap in max_quantities.items() if product_id in quantities]
+    for product_id, cap in caps:
+        params += [product_field.get_db_prep_save(product_id, connection), cap]
+    with connection.cursor() as cursor:
+        cursor.execute(upsert_sql(columns, len(quantities), len(caps)), params)
+
+
+def add_to_cart(cart_id, product_id, quantity, max_quantity=None):
+    """
+    Adds `quantity` of one product to the cart (see add_many_to_cart), at
+    most `max_quantity` (e.g. the product's stock) in total.
+    """
+    add_many_to_cart(
+        cart_id, {product_id: quantity}, {product_id: max_quantity} if max_quantity is not None else None,
+    )
+
+
+def add_to_cart_fallback(cart_id, product_id, quantity, max_quantity=None):
+    # Other databases: UPDATE with an F() increment, INSERT if there was no row
+    total = F('quantity') + quantity
+    if max_quantity is not None:
+        total = Least(total, max_quantity)
+    items = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+    if items.update(quantity=total):
+        return
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+    except IntegrityError:
+        # Another request inserted it first
+        items.update(quantity=total)
+
+
+# ===============================================
+#  BATCH CHANGES
+# ===============================================
+
+def reduce_operations(operations):
+    """
+    (op, product_id, quantity) in request order -> {product_id: (kind, quantity)},
+    kind 'add' (increment) or 'set' (absolute, 0 removes), e.g.
+    add 2, add 3 -> ('add', 5); set 4, add 1 -> ('set', 5); remove, add 1 -> ('set', 1).
+    """
+    changes = {}
+    for op, product_id, quantity in operations:
+        previous = changes.get(product_id)
+        if op == 'remove':
+            changes[product_id] = ('set', 0)
+        elif op == 'set':
+            changes[product_id] = ('set', quantity)
+        elif previous is None:
+            changes[product_id] = ('add', quantity)
+        else:
+            changes[product_id] = (previous[0], previous[1] + quantity)
+    return changes
+
+
+def apply_cart_changes(cart_id, changes, stocks):
+    """
+    Applies reduced changes in one transaction: one DELETE for removals, one
+    bulk upsert for absolute quantities, one increment upsert for adds.
+    Quantities are capped at `stocks` ({product_id: stock}).
+    """
+    removed = [product_id for product_id, (kind, quantity) in changes.items() if kind == 'set' and not quantity]
+    set_to = {
+        product_id: min(quantity, stocks[product_id])
+        for product_id, (kind, quantity) in changes.items() if kind == 'set' and quantity
+    }
+    added = {product_id: quantity for product_id, (kind, quantity) in changes.items() if kind == 'add'}
+    with transaction.atomic():
+        if removed:
+            CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+        if set_to:
+            CartItem.objects.bulk_create(
+                [CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity) for product_id, quantity in set_to.items()],
+                **upsert_options(['cart', 'product'], ['quantity', 'updated_at']),
+            )
+        if added:
+            add_many_to_cart(cart_id, added, {product_id: stocks[product_id] for product_id in added})
+
+
+# ===============================================
+#  GUEST CARTS (SIGNED COOKIE)
+# ===============================================
+
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_SALT = 'orders.guest-cart'
+GUEST_CART_MAX_AGE = 30 * 24 * 60 * 60
+# ~40 bytes per product; keeps the cookie well under the 4 KB browser limit
+GUEST_CART_MAX_ITEMS = 50
+
+
+def guest_cart_products():
+    """
+    Products a guest cart shows and a login merges: active and in stock.
+    """
+    return Product.objects.filter(is_active=True, stock__gt=0)
+
+
+class GuestCart:
+    """
+    A visitor's cart kept in a signed cookie as "<product hex>:<quantity>,...".
+    The signature makes it tamper-proof (not secret). Items and totals have
+    the same shape as a Cart's; item ids are the product ids.
+    """
+
+    def __init__(self, quantities=None):
+        self.quantities = dict(quantities or {})
+
+    @classmethod
+    def from_request(cls, request):
+        value = request.get_signed_cookie(
+            GUEST_CART_COOKIE, default='', salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE,
+        )
+        quantities = {}
+        for entry in value.split(',')[:GUEST_CART_MAX_ITEMS] if value else ():
+            try:
+                product_id, quantity = entry.split(':')
+                product_id, quantity = uuid.UUID(product_id), int(quantity)
+            except ValueError:
+                continue
+            if quantity > 0:
+                quantities[product_id] = quantity
+        return cls(quantities)
+
+    def save(self, request, response):
+        if not self.quantities:
+            if GUEST_CART_COOKIE in request.COOKIES:
+                response.delete_cookie(GUEST_CART_COOKIE, samesite='Lax')
+            return
+        value = ','.join(f'{product_id.hex}:{quantity}' for product_id, quantity in self.quantities.items())
+        response.set_signed_cookie(
+            GUEST_CART_COOKIE, value, salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE,
+            httponly=True, samesite='Lax', secure=request.is_secure(),
+        )
+
+    def overflows(self, changes):
+        new = [
+            product_id for product_id, (kind, quantity) in changes.items()
+            if product_id not in self.quantities and (kind == 'add' or quantity)
+        ]
+        return len(self.quantities) + len(new) > GUEST_CART_MAX_ITEMS
+
+    def apply(self, changes, stocks):
+        """
+        Same changes and stock capping as apply_cart_changes(), on the cookie.
+        """
+        for product_id, (kind, quantity) in changes.items():
+            if kind == 'add':
+                quantity += self.quantities.get(product_id, 0)
+            quantity = min(quantity, stocks.get(product_id, 0))
+            if quantity > 0:
+                self.quantities[product_id] = quantity
+            else:
+                self.quantities.pop(product_id, None)
+        self.__dict__.pop('items', None)
+        self.__dict__.pop('totals', None)
+
+    @cached_property
+    def items(self):
+        """
+        Unsaved CartItems with product, category and seller: one query.
+        Products deleted, deactivated or sold out since they were added are
+        left out (of the totals too), as merge_guest_cart would drop them.
+        """
+        products = guest_cart_products().filter(pk__in=list(self.quantities)).select_related('category', 'seller')
+        products = {product.pk: product for product in products}
+        return [
+            CartItem(id=product_id, product=products[product_id], quantity=quantity)
+            for product_id, quantity in self.quantities.items() if product_id in products
+        ]
+
+    @cached_property
+    def totals(self):
+        sellers = {}
+        for item in self.items:
+            product = item.product
+            seller = sellers.setdefault(product.seller_id, defaultdict(
+                int, seller_id=product.seller_id, seller=product.seller.username,
+            ))
+            seller['item_count'] += item.quantity
+            seller['subtotal'] += product.price * item.quantity
+            seller['total'] += (product.sale_price or product.price) * item.quantity
+        return summarize_totals(sorted(sellers.values(), key=lambda seller: seller['seller']))
+
+
+def merge_guest_cart(request, user, response):
+    """
+    Moves the visitor's cookie cart into the user's Cart on login / signup:
+    one product query and one increment upsert (quantities add up, capped
+    at stock), then clears the cookie on `response`.
+    """
+    guest = GuestCart.from_request(request)
+    if not guest.quantities:
+        return
+    stocks = dict(guest_cart_products().filter(pk__in=list(guest.quantities)).values_list('pk', 'stock'))
+    quantities = {product_id: quantity for product_id, quantity in guest.quantities.items() if product_id in stocks}
+    if quantities:
+        add_many_to_cart(get_or_create_cart_id(user), quantities, stocks)
+    GuestCart().save(request, response)
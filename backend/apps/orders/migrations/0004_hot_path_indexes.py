@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_cart_created_by_cart_updated_by_cartitem_created_by_and_more"),
+        ("products", "0006_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cartitem",
+            index=models.Index(
+                fields=["cart", "product"], name="cartitem_cart_product_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at"], name="order_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_hot_path_indexes"),
+        ("products", "0013_similar_products"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(fields=["created_at"], name="orderitem_created_idx"),
+        ),
+    ]
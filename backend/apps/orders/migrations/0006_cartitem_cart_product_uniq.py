@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # Rows of the same product in one cart (concurrent adds) become one, quantities summed
+    CartItem = apps.get_model("orders", "CartItem")
+    duplicates = (
+        CartItem.objects.order_by()
+        .values("cart_id", "product_id")
+        .annotate(rows=Count("id"), quantity=Sum("quantity"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        items = CartItem.objects.filter(cart_id=duplicate["cart_id"], product_id=duplicate["product_id"])
+        keep = items.order_by("created_at", "id").first()
+        items.exclude(pk=keep.pk).delete()
+        CartItem.objects.filter(pk=keep.pk).update(quantity=duplicate["quantity"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_recommendation_indexes"),
+        ("products", "0014_product_updated_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        # Added before the old index goes: MySQL keeps an index on cart_id for the foreign key
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="cartitem_cart_product_uniq"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="cartitem",
+            name="cartitem_cart_product_idx",
+        ),
+    ]
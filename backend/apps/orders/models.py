@@ -1,7 +1,21 @@
 # apps/orders/models.py
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.db import models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
 from apps.common.models import BaseModel
 
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def money(value):
+    return (value or Decimal('0')).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
 class Cart(BaseModel):
     # OneToOneField: Har user ka ek hi cart hoga
     user = models.OneToOneField('users.User', on_delete=models.CASCADE, related_name='cart')
@@ -9,11 +23,85 @@ class Cart(BaseModel):
     def __str__(self):
         return f"Cart for {self.user.username}"
 
+    @cached_property
+    def totals(self):
+        """
+        Item count, subtotal (list prices), discount and total of the cart,
+        overall and per seller, from a single GROUP BY query.
+        """
+        return summarize_totals(
+            {
+                'seller_id': row['product__seller_id'],
+                'seller': row['product__seller__username'],
+                'item_count': row['item_count'],
+                'subtotal': row['subtotal'],
+                'total': row['total'],
+            }
+            for row in self.items.totals_by_seller()
+        )
+
+
+def summarize_totals(sellers):
+    """
+    Per-seller rows (seller_id, seller, item_count, subtotal, total) ->
+    the `totals` dict of a cart, with discounts and the overall sums.
+    """
+    sellers = [
+        dict(seller, subtotal=money(seller['subtotal']), total=money(seller['total']))
+        for seller in sellers
+    ]
+    for seller in sellers:
+        seller['discount'] = seller['subtotal'] - seller['total']
+    subtotal = sum((seller['subtotal'] for seller in sellers), Decimal('0.00'))
+    total = sum((seller['total'] for seller in sellers), Decimal('0.00'))
+    return {
+        'item_count': sum(seller['item_count'] for seller in sellers),
+        'subtotal': subtotal,
+        'discount': subtotal - total,
+        'total': total,
+        'sellers': sellers,
+    }
+
+
+def line_subtotal():
+    return ExpressionWrapper(F('quantity') * F('product__price'), output_field=MONEY)
+
+
+def line_total():
+    # Same unit price checkout charges: sale_price if set, else price
+    return ExpressionWrapper(F('quantity') * Coalesce('product__sale_price', 'product__price'), output_field=MONEY)
+
+
+class CartItemQuerySet(models.QuerySet):
+    def totals_by_seller(self):
+        return (
+            self.order_by().values('product__seller_id', 'product__seller__username')
+            .annotate(item_count=Sum('quantity'), subtotal=Sum(line_subtotal()), total=Sum(line_total()))
+            .order_by('product__seller__username')
+        )
+
+    def summary(self):
+        """
+        {'item_count', 'total'} of these items in one aggregate query.
+        """
+        totals = self.order_by().aggregate(item_count=Sum('quantity'), total=Sum(line_total()))
+        return {'item_count': totals['item_count'] or 0, 'total': money(totals['total'])}
+
+
 class CartItem(BaseModel):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # One row per product in a cart; adding again increments it
+            # (apps/orders/cart.py add_to_cart). Also the (cart, product) lookup index.
+            models.UniqueConstraint(fields=['cart', 'product'], name='cartitem_cart_product_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
 
@@ -27,6 +115,12 @@ class Order(BaseModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     # Yahan aap shipping/billing address ke liye Foreign Key ya fields add kar sakte hain
 
+    class Meta:
+        indexes = [
+            # A buyer's order history, newest first
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
@@ -36,5 +130,11 @@ class OrderItem(BaseModel):
     quantity = models.PositiveIntegerField()
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # New order lines since the last recommendations refresh
+            models.Index(fields=['created_at'], name='orderitem_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} in order {self.order.id}"
\ No newline at end of file
@@ -1,7 +1,8 @@
 # backend/apps/orders/serializers.py
 
 from rest_framework import serializers
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, Order, OrderItem, money
+from .cart import add_to_cart, reduce_operations
 from apps.products.models import Product
 from apps.products.serializers import ProductListSerializer # To show product details in cart
 
@@ -16,22 +17,69 @@ class CartItemSerializer(serializers.ModelSerializer):
     """
     # Use ProductListSerializer to show nested product details
     product = ProductListSerializer(read_only=True)
+    # Matches `sellers[].seller_id` of the cart, for grouping items by seller
+    seller_id = serializers.IntegerField(source='product.seller_id', read_only=True)
+    line_total = serializers.SerializerMethodField()
     
     class Meta:
         model = CartItem
-        fields = ['id', 'product', 'quantity']
+        fields = ['id', 'product', 'seller_id', 'quantity', 'line_total']
+
+    def get_line_total(self, obj):
+        return str(money((obj.product.sale_price or obj.product.price) * obj.quantity))
+
+
+class CartSellerSerializer(serializers.Serializer):
+    seller_id = serializers.IntegerField()
+    seller = serializers.CharField()
+    item_count = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=14, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class CartSummarySerializer(serializers.Serializer):
+    """
+    Header badge: number of units and payable total, without the items.
+    """
+    item_count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
 
 class CartSerializer(serializers.ModelSerializer):
     """
     The main serializer for the shopping cart.
-    Includes a list of all cart items.
+    Includes a list of all cart items, and the totals computed by the
+    database (Cart.totals), overall and per seller.
+    Pass carts with their items prefetched (apps/orders/views.py).
     """
     # 'items' is the related_name from the CartItem model's ForeignKey to Cart
     items = CartItemSerializer(many=True, read_only=True)
+    item_count = serializers.IntegerField(source='totals.item_count', read_only=True)
+    subtotal = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.subtotal', read_only=True)
+    discount = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.discount', read_only=True)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.total', read_only=True)
+    sellers = CartSellerSerializer(many=True, read_only=True, source='totals.sellers')
     
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'items', 'created_at']
+        fields = ['id', 'user', 'items', 'item_count', 'subtotal', 'discount', 'total', 'sellers', 'created_at']
+
+
+class GuestCartSerializer(serializers.Serializer):
+    """
+    CartSerializer's output for a visitor's cookie cart (apps/orders/cart.py
+    GuestCart): id, user and created_at are null, item ids are product ids.
+    """
+    items = CartItemSerializer(many=True, read_only=True)
+    item_count = serializers.IntegerField(source='totals.item_count', read_only=True)
+    subtotal = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.subtotal', read_only=True)
+    discount = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.discount', read_only=True)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, source='totals.total', read_only=True)
+    sellers = CartSellerSerializer(many=True, read_only=True, source='totals.sellers')
+
+    def to_representation(self, instance):
+        return {'id': None, 'user': None, **super().to_representation(instance), 'created_at': None}
 
 
 # ===============================================
@@ -50,31 +98,111 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ['product_id', 'quantity']
 
-    def validate_product_id(self, value):
+    def validate(self, attrs):
         """
-        Check if the product exists and is active.
+        Check if the product exists, is active and in stock; its stock
+        caps the quantity the cart can hold.
         """
-        if not Product.objects.filter(pk=value, is_active=True).exists():
-            raise serializers.ValidationError("Product does not exist or is inactive.")
-        return value
+        stock = (
+            Product.objects.filter(pk=attrs['product_id'], is_active=True)
+            .values_list('stock', flat=True).first()
+        )
+        if stock is None:
+            raise serializers.ValidationError({'product_id': "Product does not exist or is inactive."})
+        if not stock:
+            raise serializers.ValidationError({'product_id': "Product is out of stock."})
+        attrs['stock'] = stock
+        return attrs
 
     def save(self, **kwargs):
-        cart = self.context['cart']
-        product_id = self.validated_data['product_id']
-        quantity = self.validated_data['quantity']
-
-        try:
-            # If item already exists in the cart, just update the quantity
-            cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
-            cart_item.quantity += quantity
-            # You can add logic here to check if quantity exceeds stock
-            cart_item.save()
-            self.instance = cart_item
-        except CartItem.DoesNotExist:
-            # If it's a new item, create a new CartItem instance
-            self.instance = CartItem.objects.create(cart=cart, **self.validated_data)
-        
-        return self.instance
+        """
+        Adds the product to the cart with one upsert (increments an existing
+        row, capped at the stock). The view passes the cart's pk:
+        save(cart_id=...). Nothing is returned; the view reads the cart next.
+        """
+        data = self.validated_data
+        add_to_cart(kwargs['cart_id'], data['product_id'], data['quantity'], max_quantity=data['stock'])
+
+# Bounds the statement size (one upsert row per product)
+MAX_BATCH_OPERATIONS = 100
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """
+    One change of a /cart/batch/ request: add (increments, default 1),
+    set (absolute quantity, 0 removes) or remove.
+    """
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'add':
+            attrs.setdefault('quantity', 1)
+            if attrs['quantity'] < 1:
+                raise serializers.ValidationError({'quantity': "Must be at least 1 when adding."})
+        elif attrs['op'] == 'set' and 'quantity' not in attrs:
+            raise serializers.ValidationError({'quantity': "This field is required."})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Either `operations` (applied in order, all or nothing) or `order_id`
+    (adds every line of one of the user's orders again; products no longer
+    available are skipped and listed). All products are checked with one
+    query; validated_data holds the reduced `changes`, the products'
+    `stocks` and the `skipped` product ids.
+    """
+    operations = CartOperationSerializer(many=True, required=False, allow_empty=False, max_length=MAX_BATCH_OPERATIONS)
+    order_id = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        if ('operations' in attrs) == ('order_id' in attrs):
+            raise serializers.ValidationError("Send either operations or order_id.")
+        if 'order_id' in attrs:
+            if not self.context['request'].user.is_authenticated:
+                raise serializers.ValidationError({'order_id': "Log in to add a past order to the cart."})
+            lines = list(
+                OrderItem.objects.filter(order_id=attrs['order_id'], order__user=self.context['request'].user)
+                .order_by('created_at', 'id').values_list('product_id', 'quantity')[:MAX_BATCH_OPERATIONS]
+            )
+            if not lines:
+                raise serializers.ValidationError({'order_id': "Order not found."})
+            operations = [{'op': 'add', 'product_id': product_id, 'quantity': quantity} for product_id, quantity in lines]
+        else:
+            operations = attrs['operations']
+
+        products = {
+            pk: (is_active, stock)
+            for pk, is_active, stock in Product.objects.filter(
+                pk__in={operation['product_id'] for operation in operations},
+            ).values_list('pk', 'is_active', 'stock')
+        }
+        errors, skipped, valid = [], [], []
+        for operation in operations:
+            error = {}
+            is_active, stock = products.get(operation['product_id'], (False, 0))
+            if operation['product_id'] not in products:
+                error = {'product_id': ["Product does not exist."]}
+            elif operation['op'] != 'remove' and operation['quantity'] and not (is_active and stock):
+                error = {'product_id': ["Product is inactive or out of stock."]}
+            errors.append(error)
+            if error:
+                skipped.append(operation['product_id'])
+            else:
+                valid.append(operation)
+        if 'operations' in attrs and any(errors):
+            raise serializers.ValidationError({'operations': errors})
+
+        return {
+            'changes': reduce_operations(
+                (operation['op'], operation['product_id'], operation.get('quantity', 0)) for operation in valid
+            ),
+            'stocks': {pk: stock for pk, (_, stock) in products.items()},
+            'skipped': list(dict.fromkeys(skipped)),
+        }
+
 
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     """
@@ -108,4 +236,6 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user', 'items', 'status', 'created_at', 'total_amount']
-        read_only_fields = ['user', 'total_amount', 'status', 'created_at', 'items']
\ No newline at end of file
+        read_only_fields = ['user', 'total_amount', 'status', 'created_at', 'items']
+        # Columns User.__str__ reads (used for ?fields= projection / compiled lists)
+        field_sources = {'user': ('email', 'role')}
\ No newline at end of file
@@ -0,0 +1,16 @@
+# backend/apps/orders/signals.py
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .cart import forget_cart_id
+from .models import Cart
+
+
+@receiver(post_delete, sender=Cart)
+def forget_deleted_cart(sender, instance, **kwargs):
+    """
+    The cached cart id would point at a missing row; the next write
+    creates a new cart.
+    """
+    forget_cart_id(instance.user_id)
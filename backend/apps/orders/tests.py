@@ -1,3 +1,523 @@
-from django.test import TestCase
+# backend/apps/orders/tests.py
 
-# Create your tests here.
+import threading
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.common.testing import QueryPlanAssertionsMixin, seed_catalog
+
+
+class OrderQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    EXPLAINs the queries of the order and cart endpoints and fails when one
+    of them falls back to a full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_catalog()
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.data['buyer'])
+
+    def test_order_history(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/sales/orders/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_cart(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/sales/cart/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_cart_summary(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/sales/cart/summary/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_add_existing_cart_item(self):
+        product = self.data['products'][1]
+        with self.assertNoFullScans():
+            response = self.client.post('/api/v1/sales/cart/add-item/', {'product_id': str(product.pk), 'quantity': 1})
+            self.assertEqual(response.status_code, 201, response.content)
+
+
+    def test_cart_batch(self):
+        products = self.data['products']
+        operations = [
+            {'op': 'add', 'product_id': str(products[1].pk), 'quantity': 2},
+            {'op': 'set', 'product_id': str(products[2].pk), 'quantity': 3},
+            {'op': 'remove', 'product_id': str(products[3].pk)},
+        ]
+        with self.assertNoFullScans():
+            response = self.client.post('/api/v1/sales/cart/batch/', {'operations': operations}, format='json')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_guest_cart(self):
+        guest = APIClient()
+        guest.post('/api/v1/sales/cart/add-item/', {'product_id': str(self.data['products'][1].pk), 'quantity': 1})
+        with self.assertNoFullScans():
+            response = guest.get('/api/v1/sales/cart/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+
+class CartUpsertConcurrencyTests(TransactionTestCase):
+    """
+    Many threads add the same product to one cart at once (each thread has
+    its own database connection). Every add must count and the cart must
+    keep a single row for the product.
+    """
+    threads = 8
+    adds_per_thread = 25
+
+    def setUp(self):
+        from apps.orders.models import Cart
+        from apps.products.models import Product
+        from apps.users.models import User
+        from ecommerce_api.roles import Role
+
+        seller = User.objects.create_user(email='race-seller@example.com', username='race-seller', password=None, role=Role.SELLER)
+        buyer = User.objects.create_user(email='race-buyer@example.com', username='race-buyer', password=None, role=Role.BUYER)
+        self.product = Product.objects.create(
+            name='Race product', description='Added to one cart concurrently.', price=Decimal('10.00'),
+            seller=seller, stock=10000,
+        )
+        self.cart = Cart.objects.create(user=buyer)
+
+    def run_concurrently(self, add):
+        """
+        Runs `add()` adds_per_thread times in each thread, all threads
+        starting together. Returns the errors raised in the threads.
+        """
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.adds_per_thread):
+                    add()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return errors
+
+    def test_no_lost_updates(self):
+        from apps.orders.cart import add_to_cart
+        from apps.orders.models import CartItem
+
+        errors = self.run_concurrently(lambda: add_to_cart(self.cart.pk, self.product.pk, 1))
+        self.assertEqual(errors, [])
+        items = CartItem.objects.filter(cart=self.cart, product=self.product)
+        self.assertEqual(items.count(), 1)
+        self.assertEqual(items.get().quantity, self.threads * self.adds_per_thread)
+
+    def test_stock_cap(self):
+        from apps.orders.cart import add_to_cart
+        from apps.orders.models import CartItem
+
+        stock = self.threads * self.adds_per_thread // 2
+        errors = self.run_concurrently(lambda: add_to_cart(self.cart.pk, self.product.pk, 1, max_quantity=stock))
+        self.assertEqual(errors, [])
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=self.product).quantity, stock)
+
+
+# ===============================================
+#  BEHAVIOUR
+# ===============================================
+class ShopTestCase(TestCase):
+    """
+    A seller with three products and two buyers, for the cart and order API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.products.models import Category, Product
+        from apps.users.models import User
+        from ecommerce_api.roles import Role
+
+        cls.seller = User.objects.create_user(email='shop-seller@example.com', username='shop-seller', password=None, role=Role.SELLER)
+        cls.buyer = User.objects.create_user(email='shop-buyer@example.com', username='shop-buyer', password='pass12345', role=Role.BUYER)
+        cls.other_buyer = User.objects.create_user(email='shop-buyer2@example.com', username='shop-buyer2', password=None, role=Role.BUYER)
+        category = Category.objects.create(name='Shop phones', slug='shop-phones')
+        cls.phone = Product.objects.create(
+            name='Phone', description='-', price=Decimal('100.00'), sale_price=Decimal('80.00'),
+            category=category, seller=cls.seller, stock=5,
+        )
+        cls.case = Product.objects.create(name='Case', description='-', price=Decimal('10.50'), category=category, seller=cls.seller, stock=50)
+        cls.charger = Product.objects.create(name='Charger', description='-', price=Decimal('25.00'), category=category, seller=cls.seller, stock=0)
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+
+class OrderListTests(ShopTestCase):
+    def test_compiled_list_matches_serializer(self):
+        from unittest import mock
+        from apps.orders.models import Order, OrderItem
+        from apps.orders.views import OrderViewSet
+
+        for user in (self.buyer, self.buyer, self.other_buyer):
+            order = Order.objects.create(user=user, total_amount=Decimal('90.50'))
+            OrderItem.objects.create(order=order, product=self.phone, quantity=1, price_at_purchase=Decimal('80.00'))
+            OrderItem.objects.create(order=order, product=self.case, quantity=1, price_at_purchase=Decimal('10.50'))
+
+        for params in ({}, {'fields': 'id,items.product.name,total_amount'}):
+            compiled = self.client.get('/api/v1/sales/orders/', params).json()
+            with mock.patch.object(OrderViewSet, 'compiled_actions', ()):
+                regular = self.client.get('/api/v1/sales/orders/', params).json()
+            self.assertEqual(compiled, regular)
+            # Only the buyer's own orders
+            self.assertEqual(len(compiled['results']), 2)
+
+
+class CartTotalsTests(ShopTestCase):
+    def add(self, product, quantity=1):
+        response = self.client.post('/api/v1/sales/cart/add-item/', {'product_id': str(product.pk), 'quantity': quantity}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def make_other_sellers_product(self):
+        from apps.products.models import Product
+        from apps.users.models import User
+        from ecommerce_api.roles import Role
+
+        seller = User.objects.create_user(email='another-seller@example.com', username='another-seller', password=None, role=Role.SELLER)
+        return Product.objects.create(
+            name='Cable', description='-', price=Decimal('5.25'), category=self.case.category, seller=seller, stock=9,
+        )
+
+    def test_totals_overall_and_per_seller(self):
+        cable = self.make_other_sellers_product()
+        self.add(self.phone, 2)
+        self.add(self.case, 3)
+        cart = self.add(cable, 2)
+
+        self.assertEqual(
+            [(item['product']['name'], item['quantity'], item['line_total']) for item in cart['items']],
+            [('Phone', 2, '160.00'), ('Case', 3, '31.50'), ('Cable', 2, '10.50')],
+        )
+        self.assertEqual(cart['items'][2]['seller_id'], cable.seller_id)
+        self.assertEqual(
+            (cart['item_count'], cart['subtotal'], cart['discount'], cart['total']), (7, '242.00', '40.00', '202.00'),
+        )
+        self.assertEqual(cart['sellers'], [
+            {'seller_id': cable.seller_id, 'seller': 'another-seller', 'item_count': 2,
+             'subtotal': '10.50', 'discount': '0.00', 'total': '10.50'},
+            {'seller_id': self.seller.pk, 'seller': 'shop-seller', 'item_count': 5,
+             'subtotal': '231.50', 'discount': '40.00', 'total': '191.50'},
+        ])
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json(), cart)
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 7, 'total': '202.00'})
+
+    def test_price_changes_show_up_in_totals(self):
+        self.add(self.case, 2)
+        self.case.price = Decimal('12.00')
+        self.case.save()
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 2, 'total': '24.00'})
+
+    def test_query_count_does_not_grow_with_items(self):
+        # The cart, its items JOINed with product and category, the totals
+        self.add(self.phone)
+        with self.assertNumQueries(3):
+            self.client.get('/api/v1/sales/cart/')
+        self.add(self.case)
+        self.add(self.make_other_sellers_product())
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.client.get('/api/v1/sales/cart/').json()['items']), 3)
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/sales/cart/summary/')
+
+
+class LazyCartTests(ShopTestCase):
+    def test_reads_create_no_cart(self):
+        from apps.orders.models import Cart
+
+        data = self.client.get('/api/v1/sales/cart/').json()
+        self.assertEqual((data['id'], data['items'], data['total']), (None, [], '0.00'))
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 0, 'total': '0.00'})
+        # Invalid adds don't create one either
+        response = self.client.post('/api/v1/sales/cart/add-item/', {'product_id': str(self.charger.pk), 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_missing_cart_is_not_cached(self):
+        from apps.orders.models import Cart, CartItem
+
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+        # e.g. the first add-item ran in another worker process
+        cart = Cart.objects.create(user=self.buyer)
+        CartItem.objects.create(cart=cart, product=self.case, quantity=2)
+        data = self.client.get('/api/v1/sales/cart/').json()
+        self.assertEqual((data['id'], data['item_count']), (str(cart.pk), 2))
+
+    def test_cart_id_is_cached(self):
+        from django.core.cache import cache
+        from apps.orders.cart import cart_id_key
+        from apps.orders.models import Cart
+
+        self.client.post('/api/v1/sales/cart/add-item/', {'product_id': str(self.case.pk), 'quantity': 1}, format='json')
+        cart = Cart.objects.get(user=self.buyer)
+        self.assertEqual(cache.get(cart_id_key(self.buyer.pk)), cart.pk)
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/sales/cart/summary/')
+        cart.delete()
+        self.assertIsNone(cache.get(cart_id_key(self.buyer.pk)))
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['id'], None)
+
+
+class CorsTests(ShopTestCase):
+    def test_only_listed_origins_get_credentials(self):
+        response = self.client.get('/api/v1/sales/cart/', HTTP_ORIGIN='http://localhost:5173')
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:5173')
+        self.assertEqual(response['Access-Control-Allow-Credentials'], 'true')
+        response = self.client.get('/api/v1/sales/cart/', HTTP_ORIGIN='https://evil.example.com')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
+        self.assertNotIn('Access-Control-Allow-Credentials', response)
+
+
+class GuestCartTests(ShopTestCase):
+    """
+    Anonymous visitors: the cart lives in the signed guest_cart cookie.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def add(self, product, quantity=1):
+        return self.client.post('/api/v1/sales/cart/add-item/', {'product_id': str(product.pk), 'quantity': quantity}, format='json')
+
+    def test_cart_is_kept_in_a_signed_cookie(self):
+        from apps.orders.cart import GUEST_CART_COOKIE
+        from apps.orders.models import Cart, CartItem
+
+        response = self.add(self.phone, 2)
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[GUEST_CART_COOKIE]
+        self.assertTrue(cookie['httponly'])
+        self.assertIn(self.phone.pk.hex, cookie.value)
+        self.add(self.case, 1)
+
+        data = self.client.get('/api/v1/sales/cart/').json()
+        self.assertEqual(
+            [(item['id'], item['quantity'], item['line_total']) for item in data['items']],
+            [(str(self.phone.pk), 2, '160.00'), (str(self.case.pk), 1, '10.50')],
+        )
+        self.assertEqual((data['id'], data['item_count'], data['total']), (None, 3, '170.50'))
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 3, 'total': '170.50'})
+        self.assertFalse(Cart.objects.exists() or CartItem.objects.exists())
+
+    def test_tampered_cookie_is_ignored(self):
+        from apps.orders.cart import GUEST_CART_COOKIE
+
+        self.add(self.phone, 1)
+        value = self.client.cookies[GUEST_CART_COOKIE].value
+        self.client.cookies[GUEST_CART_COOKIE] = value.replace(f'{self.phone.pk.hex}:1', f'{self.phone.pk.hex}:9')
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+        self.client.cookies[GUEST_CART_COOKIE] = f'{self.phone.pk.hex}:1'
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+
+    def test_update_and_remove(self):
+        from apps.orders.cart import GUEST_CART_COOKIE
+
+        self.add(self.phone, 1)
+        self.add(self.case, 1)
+        # Capped at the phone's stock (5)
+        response = self.client.patch(f'/api/v1/sales/cart/update-item/{self.phone.pk}/', {'quantity': 9}, format='json')
+        self.assertEqual([item['quantity'] for item in response.json()['items']], [5, 1])
+
+        response = self.client.delete(f'/api/v1/sales/cart/remove-item/{self.phone.pk}/')
+        self.assertEqual((response.status_code, response.content), (204, b''))
+        self.assertNotIn(self.phone.pk.hex, response.cookies[GUEST_CART_COOKIE].value)
+        self.assertEqual(self.client.delete(f'/api/v1/sales/cart/remove-item/{self.phone.pk}/').status_code, 404)
+
+        # The last item removed: the cookie is deleted
+        response = self.client.delete(f'/api/v1/sales/cart/remove-item/{self.case.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.cookies[GUEST_CART_COOKIE]['max-age'], 0)
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+
+    def test_capacity(self):
+        from unittest import mock
+
+        with mock.patch('apps.orders.cart.GUEST_CART_MAX_ITEMS', 1):
+            self.assertEqual(self.add(self.phone).status_code, 201)
+            self.assertEqual(self.add(self.phone).status_code, 201)
+            response = self.add(self.case)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.client.get('/api/v1/sales/cart/').json()['items']), 1)
+
+    def test_unavailable_products_are_left_out(self):
+        from apps.products.models import Product
+
+        self.add(self.phone, 2)
+        self.add(self.case, 1)
+        Product.objects.filter(pk=self.phone.pk).update(is_active=False)
+        data = self.client.get('/api/v1/sales/cart/').json()
+        self.assertEqual([item['id'] for item in data['items']], [str(self.case.pk)])
+        self.assertEqual((data['item_count'], data['total']), (1, '10.50'))
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 1, 'total': '10.50'})
+
+        Product.objects.filter(pk=self.case.pk).update(stock=0)
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+        # Reactivated: still in the cookie, so it shows up again
+        Product.objects.filter(pk=self.phone.pk).update(is_active=True)
+        self.assertEqual(self.client.get('/api/v1/sales/cart/summary/').json(), {'item_count': 2, 'total': '160.00'})
+
+    def test_login_merges_into_the_users_cart(self):
+        from apps.orders.cart import GUEST_CART_COOKIE
+        from apps.orders.models import Cart, CartItem
+
+        cart = Cart.objects.create(user=self.buyer)
+        CartItem.objects.create(cart=cart, product=self.phone, quantity=4)
+        self.add(self.phone, 3)
+        self.add(self.case, 2)
+
+        response = self.client.post('/api/v1/auth/login/', {'email': 'shop-buyer@example.com', 'password': 'pass12345'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[GUEST_CART_COOKIE]['max-age'], 0)
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=cart).values_list('product__name', 'quantity')),
+            {'Phone': 5, 'Case': 2},  # 4 + 3 capped at stock
+        )
+        self.assertEqual(self.client.get('/api/v1/sales/cart/').json()['items'], [])
+
+    def test_signup_merges_into_a_new_cart(self):
+        from apps.orders.models import CartItem
+
+        self.add(self.case, 2)
+        response = self.client.post('/api/v1/auth/signup/', {
+            'username': 'new-buyer', 'email': 'new-buyer@example.com', 'password': 'pass12345',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(CartItem.objects.filter(cart__user__email='new-buyer@example.com').values_list('product__name', 'quantity')),
+            [('Case', 2)],
+        )
+
+
+class CartBatchTests(ShopTestCase):
+    url = '/api/v1/sales/cart/batch/'
+
+    def batch(self, *operations, client=None, **data):
+        if operations:
+            data['operations'] = [
+                {'op': op, 'product_id': str(product.pk), **({'quantity': quantity} if quantity is not None else {})}
+                for op, product, quantity in operations
+            ]
+        return (client or self.client).post(self.url, data, format='json')
+
+    def quantities(self, data):
+        return {item['product']['name']: item['quantity'] for item in data['items']}
+
+    def test_reduce_operations(self):
+        from apps.orders.cart import reduce_operations
+
+        self.assertEqual(reduce_operations([('add', 'a', 2), ('add', 'a', 3)]), {'a': ('add', 5)})
+        self.assertEqual(reduce_operations([('set', 'a', 4), ('add', 'a', 1)]), {'a': ('set', 5)})
+        self.assertEqual(reduce_operations([('add', 'a', 2), ('remove', 'a', 0)]), {'a': ('set', 0)})
+        self.assertEqual(reduce_operations([('remove', 'a', 0), ('add', 'a', 1)]), {'a': ('set', 1)})
+        self.assertEqual(reduce_operations([('add', 'a', 1), ('set', 'b', 2)]), {'a': ('add', 1), 'b': ('set', 2)})
+
+    def test_operations_are_merged_and_applied(self):
+        response = self.batch(('add', self.phone, 2), ('add', self.phone, None), ('set', self.case, 4), ('add', self.case, 1))
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(self.quantities(data), {'Phone': 3, 'Case': 5})
+        self.assertEqual((data['skipped'], data['total']), ([], '292.50'))
+
+        data = self.batch(('add', self.phone, 1), ('remove', self.phone, None), ('set', self.case, 0)).json()
+        self.assertEqual(data['items'], [])
+        data = self.batch(('remove', self.phone, None), ('add', self.phone, 2)).json()
+        self.assertEqual(self.quantities(data), {'Phone': 2})
+
+    def test_quantities_are_capped_at_stock(self):
+        self.batch(('add', self.phone, 4))
+        data = self.batch(('add', self.phone, 3), ('set', self.case, 80)).json()
+        self.assertEqual(self.quantities(data), {'Phone': 5, 'Case': 50})
+
+    def test_invalid_requests(self):
+        from apps.orders.models import CartItem
+
+        response = self.batch(('add', self.case, 1), ('add', self.charger, 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['operations'], [{}, {'product_id': ['Product is inactive or out of stock.']}])
+        # All or nothing
+        self.assertFalse(CartItem.objects.exists())
+
+        for data in ({'operations': []}, {}, {'operations': [{'op': 'add'}]},
+                     {'operations': [{'op': 'set', 'product_id': str(self.case.pk)}]},
+                     {'operations': [{'op': 'add', 'product_id': '00000000-0000-0000-0000-000000000000'}]}):
+            self.assertEqual(self.client.post(self.url, data, format='json').status_code, 400, data)
+        # Removing an out-of-stock product is fine
+        self.assertEqual(self.batch(('remove', self.charger, None)).status_code, 200)
+
+    def test_operation_limit(self):
+        from apps.orders.serializers import MAX_BATCH_OPERATIONS
+
+        response = self.batch(*[('add', self.case, 1)] * MAX_BATCH_OPERATIONS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(response.json()), {'Case': min(MAX_BATCH_OPERATIONS, self.case.stock)})
+        self.assertEqual(self.batch(*[('add', self.case, 1)] * (MAX_BATCH_OPERATIONS + 1)).status_code, 400)
+
+    def test_only_removals_create_no_cart(self):
+        from apps.orders.models import Cart
+
+        data = self.batch(('remove', self.case, None)).json()
+        self.assertEqual((data['id'], data['items'], data['skipped']), (None, [], []))
+        self.assertFalse(Cart.objects.exists())
+
+    def test_buy_again(self):
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product
+
+        retired = Product.objects.create(
+            name='Retired', description='-', price=Decimal('1.00'), category=self.case.category,
+            seller=self.seller, stock=3, is_active=False,
+        )
+        order = Order.objects.create(user=self.buyer, total_amount=Decimal('0'))
+        for product, quantity in ((self.phone, 1), (self.case, 2), (self.charger, 1), (retired, 1)):
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, price_at_purchase=product.price)
+
+        response = self.client.post(self.url, {'order_id': str(order.pk)}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(self.quantities(data), {'Phone': 1, 'Case': 2})
+        self.assertEqual(data['skipped'], [str(self.charger.pk), str(retired.pk)])
+
+        other = APIClient()
+        other.force_authenticate(self.other_buyer)
+        response = other.post(self.url, {'order_id': str(order.pk)}, format='json')
+        self.assertEqual((response.status_code, response.json()), (400, {'order_id': ['Order not found.']}))
+        self.assertEqual(APIClient().post(self.url, {'order_id': str(order.pk)}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'order_id': str(order.pk), 'operations': []}, format='json').status_code, 400)
+
+    def test_guest_batch(self):
+        from apps.orders.cart import GUEST_CART_COOKIE
+        from apps.orders.models import Cart
+
+        guest = APIClient()
+        response = self.batch(('add', self.phone, 9), ('set', self.case, 2), client=guest)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(GUEST_CART_COOKIE, response.cookies)
+        self.assertEqual(self.quantities(response.json()), {'Phone': 5, 'Case': 2})
+        data = self.batch(('remove', self.phone, None), client=guest).json()
+        self.assertEqual(self.quantities(data), {'Case': 2})
+        self.assertEqual(self.quantities(guest.get('/api/v1/sales/cart/').json()), {'Case': 2})
+        self.assertFalse(Cart.objects.exists())
@@ -1,78 +1,206 @@
 # backend/apps/orders/views.py
 
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db.models import Prefetch
 
 from .models import Cart, CartItem, Order, OrderItem
 from .serializers import (
     CartSerializer, 
     AddCartItemSerializer, 
     UpdateCartItemSerializer,
+    CartSummarySerializer,
+    CartBatchSerializer,
+    GuestCartSerializer,
     OrderSerializer # Make sure OrderSerializer is imported
 )
+from .cart import (
+    GUEST_CART_MAX_ITEMS, GuestCart, apply_cart_changes, empty_cart, forget_cart_id, get_cart_id,
+    get_or_create_cart_id,
+)
 from apps.products.models import Product
+from apps.common.pagination import KeysetPagination
+from apps.common.sparse import SparseFieldsMixin
+from apps.common.compiled import CompiledListMixin
 
 # ===============================================
 #  CART VIEWSET
 # ===============================================
+def cart_data(cart_id, request):
+    """
+    Serialized cart in a fixed number of queries: the cart by pk, the items
+    with their product and category in one JOIN, the totals in one GROUP BY.
+    """
+    cart = Cart.objects.filter(pk=cart_id).prefetch_related(Prefetch(
+        'items', queryset=CartItem.objects.select_related('product__category').order_by('created_at', 'id'),
+    )).first()
+    if cart is None:
+        # Deleted under a cached id
+        forget_cart_id(request.user.pk)
+        return empty_cart(request.user)
+    return CartSerializer(cart, context={'request': request}).data
+
+
 class CartViewSet(viewsets.ViewSet):
     """
     A ViewSet for viewing and managing the user's shopping cart.
     Accessible at `/api/v1/sales/cart/`.
+    Every response carries the server-computed totals; /cart/summary/ has
+    only the item count and total (header badge).
+    The Cart row is created by the first add-item; until then reads return
+    an empty cart without touching the database (apps/orders/cart.py).
+    Anonymous visitors get the same API on a signed-cookie GuestCart (item
+    ids are product ids); it is merged into their cart on login / signup.
     """
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.AllowAny]
+
+    def guest_response(self, request, guest, status_code=status.HTTP_200_OK, **extra):
+        data = GuestCartSerializer(guest, context={'request': request}).data
+        data.update(extra)
+        response = Response(data, status=status_code)
+        guest.save(request, response)
+        return response
+
+    def check_guest_capacity(self, guest, changes):
+        if guest.overflows(changes):
+            raise serializers.ValidationError(
+                {'error': f'A guest cart holds at most {GUEST_CART_MAX_ITEMS} products. Log in to add more.'}
+            )
 
     def list(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data)
+        if not request.user.is_authenticated:
+            return self.guest_response(request, GuestCart.from_request(request))
+        cart_id = get_cart_id(request.user)
+        if cart_id is None:
+            return Response(empty_cart(request.user))
+        return Response(cart_data(cart_id, request))
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        if not request.user.is_authenticated:
+            return Response(CartSummarySerializer(GuestCart.from_request(request).totals).data)
+        cart_id = get_cart_id(request.user)
+        if cart_id is None:
+            summary = {'item_count': 0, 'total': 0}
+        else:
+            summary = CartItem.objects.filter(cart_id=cart_id).summary()
+        return Response(CartSummarySerializer(summary).data)
 
     @action(detail=False, methods=['post'], url_path='add-item')
     def add_item(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = AddCartItemSerializer(data=request.data, context={'cart': cart})
+        serializer = AddCartItemSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            serializer.save()
+            if not request.user.is_authenticated:
+                data = serializer.validated_data
+                guest = GuestCart.from_request(request)
+                changes = {data['product_id']: ('add', data['quantity'])}
+                self.check_guest_capacity(guest, changes)
+                guest.apply(changes, {data['product_id']: data['stock']})
+                return self.guest_response(request, guest, status.HTTP_201_CREATED)
+            # Invalid adds never create a cart
+            cart_id = get_or_create_cart_id(request.user)
+            serializer.save(cart_id=cart_id)
             # Return the updated cart state
-            return Response(CartSerializer(cart, context={'request': request}).data, status=status.HTTP_201_CREATED)
+            return Response(cart_data(cart_id, request), status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Many changes in one request, returning the cart once:
+            {"operations": [{"op": "add", "product_id": ..., "quantity": 2},
+                            {"op": "set", "product_id": ..., "quantity": 5},
+                            {"op": "remove", "product_id": ...}]}
+        or "buy again": {"order_id": ...} adds that order's lines.
+        Products are validated with one query and the changes are written
+        in one transaction with bulk statements (apps/orders/cart.py).
+        """
+        serializer = CartBatchSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data['changes']
+        skipped = [str(product_id) for product_id in serializer.validated_data['skipped']]
+        if not request.user.is_authenticated:
+            guest = GuestCart.from_request(request)
+            self.check_guest_capacity(guest, changes)
+            guest.apply(changes, serializer.validated_data['stocks'])
+            return self.guest_response(request, guest, skipped=skipped)
+        # Only removals: nothing to do without a cart, and no cart to create for it
+        if any(kind == 'add' or quantity for kind, quantity in changes.values()):
+            cart_id = get_or_create_cart_id(request.user)
+        else:
+            cart_id = get_cart_id(request.user)
+        if cart_id is None:
+            data = empty_cart(request.user)
+        else:
+            apply_cart_changes(cart_id, changes, serializer.validated_data['stocks'])
+            data = cart_data(cart_id, request)
+        data['skipped'] = skipped
+        return Response(data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['patch'], url_path='update-item/(?P<item_pk>[^/.]+)')
     def update_item(self, request, item_pk=None):
+        if not request.user.is_authenticated:
+            return self.update_guest_item(request, item_pk)
+        cart_id = get_cart_id(request.user)
         try:
-            cart_item = CartItem.objects.get(pk=item_pk, cart__user=request.user)
+            cart_item = CartItem.objects.get(pk=item_pk, cart_id=cart_id)
         except CartItem.DoesNotExist:
             return Response({'error': 'Cart item not found.'}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = UpdateCartItemSerializer(cart_item, data=request.data)
         if serializer.is_valid(raise_exception=True):
             serializer.save()
-            return Response(CartSerializer(cart_item.cart, context={'request': request}).data, status=status.HTTP_200_OK)
+            return Response(cart_data(cart_id, request), status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['delete'], url_path='remove-item/(?P<item_pk>[^/.]+)')
     def remove_item(self, request, item_pk=None):
-        try:
-            cart_item = CartItem.objects.get(pk=item_pk, cart__user=request.user)
-            cart_item.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except CartItem.DoesNotExist:
+        if not request.user.is_authenticated:
+            guest = GuestCart.from_request(request)
+            product_id = guest_product_id(guest, item_pk)
+            if product_id is None:
+                return Response({'error': 'Cart item not found.'}, status=status.HTTP_404_NOT_FOUND)
+            guest.apply({product_id: ('set', 0)}, {})
+            # Same empty 204 as for users; only the cookie changes
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+            guest.save(request, response)
+            return response
+        deleted, _ = CartItem.objects.filter(pk=item_pk, cart_id=get_cart_id(request.user)).delete()
+        if not deleted:
             return Response({'error': 'Cart item not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def update_guest_item(self, request, item_pk):
+        guest = GuestCart.from_request(request)
+        product_id = guest_product_id(guest, item_pk)
+        if product_id is None:
+            return Response({'error': 'Cart item not found.'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = UpdateCartItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stock = Product.objects.filter(pk=product_id, is_active=True).values_list('stock', flat=True).first()
+        guest.apply({product_id: ('set', serializer.validated_data['quantity'])}, {product_id: stock or 0})
+        return self.guest_response(request, guest)
+
+
+def guest_product_id(guest, item_pk):
+    # Guest cart items are keyed by product id
+    return next((product_id for product_id in guest.quantities if str(product_id) == item_pk), None)
 
 
 # ===============================================
 #  ORDER VIEWSET (THIS WAS MISSING)
 # ===============================================
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SparseFieldsMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     API endpoint for Orders.
-    - Users can only view their own orders.
+    - Users can only view their own orders (?fields= / ?exclude= supported).
     - Buyers can create orders (checkout).
     - Orders cannot be modified or deleted by users after creation.
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     # We only allow GET (list, retrieve) and POST (create)
     http_method_names = ['get', 'post', 'head', 'options']
@@ -91,10 +219,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         """
         # This is a simplified version. A real checkout would involve
         # payment processing, address validation, etc.
-        cart = Cart.objects.get(user=self.request.user)
-        cart_items = cart.items.all()
+        # Carts are created lazily: no cart yet is an empty cart
+        cart_id = get_cart_id(self.request.user)
+        cart_items = CartItem.objects.filter(cart_id=cart_id).select_related('product')
 
-        if not cart_items:
+        if cart_id is None or not cart_items:
             raise serializers.ValidationError("Your cart is empty.")
 
         # Calculate total amount
@@ -123,4 +252,4 @@ class OrderViewSet(viewsets.ModelViewSet):
         OrderItem.objects.bulk_create(order_items_to_create)
 
         # Clear the cart
-        cart.items.all().delete()
\ No newline at end of file
+        CartItem.objects.filter(cart_id=cart_id).delete()
\ No newline at end of file
@@ -0,0 +1,260 @@
+# backend/apps/products/autocomplete.py
+"""
+Search-box suggestions from an in-process prefix index.
+
+Har worker process product names aur category names ka ek sorted array
+rakhta hai; a lookup is two bisects plus a scan of the matching range, so it
+never touches the database:
+
+    "iph" -> [("iph", ...) .. ("iph\uffff", ...)) -> best `limit` by popularity
+
+Every name is indexed from the start of each of its first KEY_WORDS words
+("apple iphone 15" matches "app", "iph" and "15"), keys are cut to KEY_LENGTH
+characters and only the MAX_PRODUCTS most popular products are kept, which
+bounds memory at a few tens of MB for any catalog size.
+
+- Popularity: units ordered + reviews for products, active products for categories.
+- The index is built on the first lookup in the process and fully reloaded
+  every `reload_interval` seconds (popularity, deletes, the MAX_PRODUCTS cut).
+- In between, every `refresh_interval` seconds the rows whose updated_at is
+  newer than the last seen one are re-read and patched in (copy-on-write,
+  so lookups in other threads never see a half-updated array).
+"""
+
+import bisect
+import heapq
+import threading
+import time
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+
+from apps.orders.models import OrderItem
+from .models import Category, Product
+from .search import tokenize
+
+KEY_WORDS = 3
+KEY_LENGTH = 32
+MAX_PRODUCTS = 50000
+# Ranges longer than this (one or two letter prefixes) are ranked once and memoized
+SCAN_LIMIT = 256
+MAX_MEMO = 2048
+# updated_at is set before commit; re-read a little behind the watermark
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def normalize(text):
+    return ' '.join(tokenize(text))
+
+
+def index_keys(name):
+    """
+    'Apple iPhone 15 (Blue)' -> {'apple iphone 15 blue', 'iphone 15 blue', '15 blue'}
+    """
+    words = tokenize(name)
+    return {' '.join(words[start:])[:KEY_LENGTH] for start in range(min(len(words), KEY_WORDS))}
+
+
+class PrefixIndex:
+    """
+    Sorted (key, id) array over entries {id: (weight, payload)}. Never
+    modified in place: with_changes() returns a patched copy.
+    """
+    # Above this many changed rows a full sort is cheaper than list inserts
+    RESORT_THRESHOLD = 1000
+
+    def __init__(self, entries, keys=None):
+        self.entries = entries
+        if keys is None:
+            keys = sorted((key, pk) for pk, (_, payload) in entries.items() for key in index_keys(payload['name']))
+        self.keys = keys
+        self.memo = {}
+
+    def with_changes(self, changed, removed):
+        entries = dict(self.entries)
+        touched = set(changed) | set(removed)
+        if len(touched) > self.RESORT_THRESHOLD:
+            for pk in removed:
+                entries.pop(pk, None)
+            entries.update(changed)
+            return PrefixIndex(entries)
+
+        keys = list(self.keys)
+        for pk in touched:
+            old = entries.pop(pk, None)
+            for key in index_keys(old[1]['name']) if old else ():
+                index = bisect.bisect_left(keys, (key, pk))
+                if index < len(keys) and keys[index] == (key, pk):
+                    del keys[index]
+        for pk, entry in changed.items():
+            entries[pk] = entry
+            for key in index_keys(entry[1]['name']):
+                bisect.insort(keys, (key, pk))
+        return PrefixIndex(entries, keys)
+
+    def lookup(self, prefix, limit):
+        keys = self.keys
+        prefix = prefix[:KEY_LENGTH]
+        start = bisect.bisect_left(keys, (prefix,))
+        end = bisect.bisect_left(keys, (prefix + '\uffff',))
+        if end - start <= SCAN_LIMIT:
+            return self.best(keys[start:end], limit)
+        best = self.memo.get(prefix)
+        if best is None or len(best) < limit:
+            if len(self.memo) >= MAX_MEMO:
+                self.memo.clear()
+            best = self.memo[prefix] = self.best(keys[start:end], max(limit, 20))
+        return best[:limit]
+
+    def best(self, keys, limit):
+        entries = self.entries
+        pks = {pk for _, pk in keys}
+        top = heapq.nsmallest(limit, pks, key=lambda pk: (-entries[pk][0], entries[pk][1]['name']))
+        return [entries[pk][1] for pk in top]
+
+
+EMPTY = PrefixIndex({})
+
+
+# ===============================================
+#  LOADING
+# ===============================================
+
+def product_entry(product, popularity):
+    return popularity, {'id': str(product['pk']), 'name': product['name']}
+
+
+def category_entry(category, popularity):
+    return popularity, {'id': str(category['pk']), 'name': category['name'], 'slug': category['slug']}
+
+
+def category_popularity(category_ids=None):
+    categories = Category.objects.all() if category_ids is None else Category.objects.filter(pk__in=category_ids)
+    return dict(
+        categories.annotate(popularity=Count('products', filter=Q(products__is_active=True)))
+        .values_list('pk', 'popularity')
+    )
+
+
+class Autocomplete:
+    refresh_interval = 30
+    reload_interval = 60 * 60
+
+    def __init__(self):
+        self.products = self.categories = EMPTY
+        self.loaded_at = self.checked_at = None
+        self.watermark = None
+        self.units = {}  # units ordered per indexed product, counted on reload
+        self._lock = threading.Lock()
+
+    def suggest(self, query, limit=8, category_limit=3):
+        prefix = normalize(query)
+        if not prefix:
+            return {'products': [], 'categories': []}
+        self.ensure_fresh()
+        return {
+            'products': self.products.lookup(prefix, limit),
+            'categories': self.categories.lookup(prefix, category_limit),
+        }
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self.loaded_at is None:
+            with self._lock:  # the first request of the process waits for the load
+                if self.loaded_at is None:
+                    self.reload()
+            return
+        if now - self.checked_at < self.refresh_interval:
+            return
+        # Someone else is already refreshing: answer from the current arrays
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if now - self.loaded_at > self.reload_interval:
+                self.reload()
+            elif now - self.checked_at >= self.refresh_interval:
+                self.refresh()
+        finally:
+            self._lock.release()
+
+    def reload(self):
+        started = time.monotonic()
+        watermark = self.latest_change()
+        ordered = dict(
+            OrderItem.objects.order_by().values('product_id').annotate(units=Sum('quantity'))
+            .values_list('product_id', 'units')
+        )
+        products = {}
+        rows = Product.objects.filter(is_active=True).values('pk', 'name', 'review_count')
+        for row in rows.iterator(chunk_size=5000):
+            products[row['pk']] = product_entry(row, ordered.get(row['pk'], 0) + row['review_count'])
+        if len(products) > MAX_PRODUCTS:
+            keep = heapq.nlargest(MAX_PRODUCTS, products, key=lambda pk: products[pk][0])
+            products = {pk: products[pk] for pk in keep}
+        units = {pk: ordered[pk] for pk in products if pk in ordered}
+
+        popularity = category_popularity()
+        categories = {
+            row['pk']: category_entry(row, popularity.get(row['pk'], 0))
+            for row in Category.objects.values('pk', 'name', 'slug')
+        }
+        self.products, self.categories = PrefixIndex(products), PrefixIndex(categories)
+        self.units, self.watermark = units, watermark
+        self.loaded_at = self.checked_at = started
+
+    def refresh(self):
+        started = time.monotonic()
+        if self.watermark is None:
+            self.reload()
+            return
+        since = self.watermark - REFRESH_OVERLAP
+        watermark = self.latest_change()
+
+        entries = self.products.entries
+        changed, removed = {}, []
+        rows = Product.objects.filter(updated_at__gt=since).values('pk', 'name', 'review_count', 'is_active')
+        for row in rows.iterator(chunk_size=5000):
+            pk = row['pk']
+            # Units ordered only change on reload; reviews come with the row
+            entry = product_entry(row, self.units.get(pk, 0) + row['review_count'])
+            if not row['is_active']:
+                if pk in entries:
+                    removed.append(pk)
+            elif pk in entries:
+                if entries[pk] != entry:
+                    changed[pk] = entry
+            elif len(entries) + len(changed) < MAX_PRODUCTS:
+                changed[pk] = entry
+        if changed or removed:
+            self.products = self.products.with_changes(changed, removed)
+
+        rows = list(Category.objects.filter(updated_at__gt=since).values('pk', 'name', 'slug'))
+        if rows:
+            popularity = category_popularity([row['pk'] for row in rows])
+            self.categories = self.categories.with_changes(
+                {row['pk']: category_entry(row, popularity.get(row['pk'], 0)) for row in rows}, [],
+            )
+        self.watermark = max(filter(None, [self.watermark, watermark]))
+        self.checked_at = started
+
+    def latest_change(self):
+        latest = [
+            model.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+            for model in (Product, Category)
+        ]
+        return max(filter(None, latest), default=None)
+
+    def forget_product(self, pk):
+        """
+        Deleted rows leave no updated_at behind; drop them from this
+        process's index right away (other processes catch up on reload).
+        """
+        if pk in self.products.entries:
+            self.products = self.products.with_changes({}, [pk])
+
+    def forget_category(self, pk):
+        if pk in self.categories.entries:
+            self.categories = self.categories.with_changes({}, [pk])
+
+
+autocomplete = Autocomplete()
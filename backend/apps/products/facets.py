@@ -0,0 +1,122 @@
+# backend/apps/products/facets.py
+"""
+Facet counts for the catalog sidebar.
+
+Each facet is counted "disjunctively": the facet's own filter is left out,
+so e.g. with `?category_name=Phones` the category facet still shows how
+many products every *other* category would give. Facets whose remaining
+filters are identical share one aggregate query.
+"""
+
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+from .filters import ProductFilter
+from .search import search_products
+
+# Same ranges as the price filter in frontend/src/components/Sidebar.jsx.
+# Bounds are inclusive, exactly like the min_price (gte) / max_price (lte) filters.
+PRICE_BUCKETS = [
+    (None, 1000),
+    (1000, 5000),
+    (5000, 10000),
+    (10000, None),
+]
+
+# "4 stars & up", "3 stars & up", ... (matches the min_rating filter)
+RATING_BUCKETS = [4, 3, 2, 1]
+
+CATEGORY_PARAMS = ('category_name', 'category', 'include_descendants')
+PRICE_PARAMS = ('min_price', 'max_price')
+RATING_PARAMS = ('min_rating',)
+
+
+def price_condition(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lte=high)
+    return condition
+
+
+class ProductFacets:
+    """
+    Computes category / price / rating counts for the product list request
+    handled by `view`, honouring the same filters and search as the list.
+    """
+    category_params = CATEGORY_PARAMS
+    price_params = PRICE_PARAMS
+    rating_params = RATING_PARAMS
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+        self.params = request.query_params
+
+    def filtered_queryset(self, exclude=()):
+        """
+        The list queryset with every filter applied except `exclude`.
+        """
+        params = self.params.copy()
+        for name in exclude:
+            params.pop(name, None)
+        filterset = ProductFilter(params, queryset=self.view.get_queryset(), request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = search_products(filterset.qs, params.get('search', '').strip())
+        return queryset.order_by()
+
+    def active(self, names):
+        return tuple(name for name in names if self.params.get(name, '') != '')
+
+    def get_counts(self):
+        # Aggregates are grouped by the filters they leave out; facets with
+        # no active filter of their own land in the same query as `total`.
+        aggregates = {(): {'total': Count('pk')}}
+        price_key = self.active(self.price_params)
+        rating_key = self.active(self.rating_params)
+        price_aggregates = aggregates.setdefault(price_key, {})
+        for index, (low, high) in enumerate(PRICE_BUCKETS):
+            price_aggregates[f'price_{index}'] = Count('pk', filter=price_condition(low, high))
+        rating_aggregates = aggregates.setdefault(rating_key, {})
+        for stars in RATING_BUCKETS:
+            rating_aggregates[f'rating_{stars}'] = Count('pk', filter=Q(average_rating__gte=stars))
+
+        counts = {}
+        for exclude, expressions in aggregates.items():
+            counts.update(self.filtered_queryset(exclude).aggregate(**expressions))
+        return counts
+
+    def get_categories(self):
+        rows = (
+            self.filtered_queryset(self.active(self.category_params))
+            .filter(category__isnull=False)
+            .values('category_id', 'category__name', 'category__slug')
+            .annotate(count=Count('pk'))
+            .order_by('-count', 'category__name')
+        )
+        return [
+            {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+
+    def to_representation(self):
+        counts = self.get_counts()
+        return {
+            'total': counts['total'],
+            'categories': self.get_categories(),
+            'price': [
+                {'min_price': low, 'max_price': high, 'count': counts[f'price_{index}']}
+                for index, (low, high) in enumerate(PRICE_BUCKETS)
+            ],
+            'rating': [
+                {'min_rating': stars, 'count': counts[f'rating_{stars}']}
+                for stars in RATING_BUCKETS
+            ],
+        }
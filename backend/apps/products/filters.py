@@ -1,17 +1,118 @@
 # backend/apps/products/filters.py
 
-from django_filters.rest_framework import FilterSet, CharFilter, NumberFilter
-from .models import Product
+from django_filters.rest_framework import BooleanFilter, FilterSet, CharFilter, NumberFilter
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
+from .models import Category, Product, Review
+from .search import search_products
 
 class ProductFilter(FilterSet):
     # Search by category name (exact match)
     category_name = CharFilter(field_name='category__name', lookup_expr='iexact')
+
+    # ?category=<slug>, plus &include_descendants=1 for the whole subtree
+    category = CharFilter(method='filter_category')
+    include_descendants = BooleanFilter(method='filter_include_descendants')
     
     # Price range filters
     min_price = NumberFilter(field_name="price", lookup_expr='gte') # gte = greater than or equal to
     max_price = NumberFilter(field_name="price", lookup_expr='lte') # lte = less than or equal to
 
+    # "4 stars & up" style filter on the denormalized average rating
+    min_rating = NumberFilter(field_name="average_rating", lookup_expr='gte')
+
     class Meta:
         model = Product
         # Yahan wo fields hain jin par hum exact match filter chahte hain
-        fields = ['category_name', 'min_price', 'max_price']
\ No newline at end of file
+        fields = ['category_name', 'category', 'include_descendants', 'min_price', 'max_price', 'min_rating']
+
+    def filter_category(self, queryset, name, value):
+        """
+        Products of the category with slug `value`; with include_descendants,
+        of its whole subtree via the materialized path (Category.path).
+        """
+        category = Category.objects.filter(slug=value).only('pk', 'path').first()
+        if category is None:
+            return queryset.none()
+        if self.form.cleaned_data.get('include_descendants'):
+            return queryset.filter(category__path__startswith=category.path)
+        return queryset.filter(category=category)
+
+    def filter_include_descendants(self, queryset, name, value):
+        # Only modifies ?category=, see filter_category()
+        return queryset
+
+
+class ReviewFilter(FilterSet):
+    # ?rating=5 -> only five star reviews
+    rating = NumberFilter(field_name='rating')
+
+    class Meta:
+        model = Review
+        fields = ['rating']
+
+
+class ReviewSortFilter(OrderingFilter):
+    """
+    `?sort=newest|highest|lowest` for product reviews. Every mode ends in
+    (created_at, id) and is served by an index on (product, ...), so the
+    keyset paginator can seek straight to the next page.
+    Unknown values fall back to newest, like OrderingFilter does.
+    """
+    ordering_param = 'sort'
+    sort_modes = {
+        'newest': ('-created_at', '-id'),
+        'highest': ('-rating', '-created_at', '-id'),
+        'lowest': ('rating', '-created_at', '-id'),
+    }
+    default_sort = 'newest'
+
+    def get_ordering(self, request, queryset, view):
+        mode = request.query_params.get(self.ordering_param, '').strip()
+        return list(self.sort_modes.get(mode, self.sort_modes[self.default_sort]))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.ordering_param,
+            'required': False,
+            'in': 'query',
+            'description': f"One of: {', '.join(self.sort_modes)}",
+            'schema': {'type': 'string', 'enum': list(self.sort_modes)},
+        }]
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    `?search=` backed by the full-text index in apps.products.search.
+    Matching products are annotated with `search_rank`.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+        return search_products(queryset, query)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """
+    Same as OrderingFilter, but while a search is active and the client did
+    not ask for an explicit ordering, results are sorted by relevance.
+    Only querysets that ProductSearchFilter annotated are ranked: a search
+    without any word (?search=" or ?search=-) filters nothing and has no
+    `search_rank` to sort on.
+    """
+    ranked = False
+
+    def get_ordering(self, request, queryset, view):
+        self.ranked = 'search_rank' in queryset.query.annotations
+        return super().get_ordering(request, queryset, view)
+
+    def get_default_ordering(self, view):
+        if self.ranked:
+            return ['-search_rank', '-created_at']
+        return super().get_default_ordering(view)
@@ -0,0 +1,194 @@
+# backend/apps/products/images.py
+"""
+Product image derivatives.
+
+For every uploaded original, resized JPEG and WebP copies are written at
+VARIANT_WIDTHS (never upscaled) under products/derived/. They are named
+after the original's content hash, e.g.
+
+    products/derived/3f/3fa94c...e1-320w.webp
+
+so the same photo always maps to the same files and is only resized once;
+existing derivatives are reused. Product.image_variants records them:
+
+    {'source': 'products/x.jpg', 'hash': '3fa9...', 'width': 2400, 'height': 1600,
+     'variants': [{'width': 160, 'height': 107, 'jpeg': '...', 'webp': '...'}, ...]}
+
+Catalog cards get the LIST_WIDTHS as `srcset`, product detail DETAIL_WIDTHS
+(see ImageVariantsField).
+"""
+
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from apps.common.cache import bump_version
+from .models import Product
+
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+LIST_WIDTHS = (160, 320)
+DETAIL_WIDTHS = (640, 1280)
+
+DERIVED_DIR = 'products/derived'
+# Format -> (Pillow format, save options)
+OUTPUT_FORMATS = {
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+# Decompression bombs: refuse originals larger than this many pixels
+MAX_PIXELS = 50_000_000
+
+
+def content_hash(file, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def derived_name(digest, width, file_format):
+    return f'{DERIVED_DIR}/{digest[:2]}/{digest[:40]}-{width}w.{file_format}'
+
+
+def variant_widths(original_width):
+    widths = [width for width in VARIANT_WIDTHS if width < original_width]
+    # A small original still gets one (re-encoded) variant at its own width
+    return widths or [original_width]
+
+
+def encode(image, file_format):
+    pillow_format, options = OUTPUT_FORMATS[file_format]
+    if file_format == 'jpeg' and image.mode != 'RGB':
+        # JPEG has no alpha: flatten transparent images onto white
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(field_file):
+    """
+    Writes the missing derivatives of `field_file` (a Product.image) to its
+    storage and returns the image_variants dict. Raises ValueError for files
+    Pillow can't read.
+    """
+    # Derivative names are content-derived already; plain storage, same MEDIA_ROOT
+    storage = default_storage
+    try:
+        with field_file.open('rb') as source:
+            digest = content_hash(source)
+            with Image.open(source) as original:
+                if original.width * original.height > MAX_PIXELS:
+                    raise ValueError(f'Image too large ({original.width}x{original.height}).')
+                original = ImageOps.exif_transpose(original)
+                original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        # Missing file, not an image, truncated data
+        raise ValueError(f'Unreadable image: {exc}')
+
+    variants = []
+    for width in variant_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = None
+        variant = {'width': width, 'height': height}
+        for file_format in OUTPUT_FORMATS:
+            name = derived_name(digest, width, file_format)
+            if not storage.exists(name):
+                if resized is None:
+                    resized = original.resize((width, height), Image.LANCZOS)
+                storage.save(name, ContentFile(encode(resized, file_format)))
+            variant[file_format] = name
+        variants.append(variant)
+
+    return {
+        'source': field_file.name,
+        'hash': digest,
+        'width': original.width,
+        'height': original.height,
+        'variants': variants,
+    }
+
+
+def update_product_images(product):
+    """
+    (Re)builds the derivatives of `product.image` and stores them and the
+    image_status on the row with a single UPDATE (touching updated_at, so
+    detail ETags change); a product without image gets empty variants. Nothing is written if the image was replaced in
+    the meantime (the replacement has its own job).
+    """
+    if product.image:
+        try:
+            image_variants = build_variants(product.image)
+            image_status = Product.IMAGE_READY
+        except ValueError as exc:
+            image_variants = {'source': product.image.name, 'error': str(exc), 'variants': []}
+            image_status = Product.IMAGE_FAILED
+    else:
+        image_variants, image_status = {}, Product.IMAGE_NONE
+    product.image_variants, product.image_status = image_variants, image_status
+    rows = Product.objects.filter(pk=product.pk)
+    if product.image:
+        rows = rows.filter(image=product.image.name)
+    rows.update(image_variants=image_variants, image_status=image_status, updated_at=timezone.now())
+    bump_version('products.product')
+    return image_variants
+
+
+def needs_variants(product):
+    source = product.image.name if product.image else None
+    return (product.image_variants or {}).get('source') != source
+
+
+# ===============================================
+#  SERIALIZER FIELD
+# ===============================================
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only `{src, width, height, srcset, webp_srcset}` for an <img>/<picture>
+    built from Product.image_variants, restricted to `widths`. None while no
+    derivatives exist (clients fall back to `image`).
+    """
+
+    def __init__(self, widths, **kwargs):
+        self.widths = widths
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'image_variants')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return self.to_representation_in_context(value, self.context)
+
+    def to_representation_in_context(self, value, context):
+        """
+        Used by the compiled list path too, which passes the request context
+        per call (see apps/common/compiled.py).
+        """
+        variants = (value or {}).get('variants') or []
+        chosen = [variant for variant in variants if variant['width'] in self.widths] or variants[-1:]
+        if not chosen:
+            return None
+        storage = default_storage
+        request = context.get('request')
+
+        def url(name):
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        largest = chosen[-1]
+        return {
+            'src': url(largest['jpeg']),
+            'width': largest['width'],
+            'height': largest['height'],
+            'srcset': ', '.join(f"{url(variant['jpeg'])} {variant['width']}w" for variant in chosen),
+            'webp_srcset': ', '.join(f"{url(variant['webp'])} {variant['width']}w" for variant in chosen),
+        }
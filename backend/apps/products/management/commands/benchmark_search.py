@@ -0,0 +1,48 @@
+# backend/apps/products/management/commands/benchmark_search.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.products.filters import ProductSearchFilter
+from apps.products.views import ProductViewSet
+
+# The fields the old `SearchFilter` configuration scanned with icontains
+LEGACY_SEARCH_FIELDS = ['name', 'description', 'category__name', 'seller__username']
+
+
+class LegacySearchView:
+    search_fields = LEGACY_SEARCH_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Compares the full-text product search against the old SearchFilter icontains scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=['phone', 'apple iphone', 'samsng'])
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=12)
+
+    def run(self, backend, view, query, iterations, page_size):
+        request = Request(APIRequestFactory().get('/', {'search': query}))
+        queryset = ProductViewSet.queryset.all()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            filtered = backend.filter_queryset(request, queryset, view)
+            total = filtered.count()
+            list(filtered[:page_size])
+        elapsed = (time.perf_counter() - started) / iterations
+        return elapsed * 1000, total
+
+    def handle(self, *args, **options):
+        iterations, page_size = options['iterations'], options['page_size']
+        self.stdout.write(f"{'query':<24}{'legacy ms':>12}{'hits':>8}{'fulltext ms':>14}{'hits':>8}")
+        for query in options['queries']:
+            legacy_ms, legacy_hits = self.run(SearchFilter(), LegacySearchView(), query, iterations, page_size)
+            fulltext_ms, fulltext_hits = self.run(ProductSearchFilter(), None, query, iterations, page_size)
+            self.stdout.write(
+                f"{query:<24}{legacy_ms:>12.2f}{legacy_hits:>8}{fulltext_ms:>14.2f}{fulltext_hits:>8}"
+            )
@@ -0,0 +1,27 @@
+# backend/apps/products/management/commands/build_image_variants.py
+
+from django.core.management.base import BaseCommand
+
+from apps.products.images import needs_variants, update_product_images
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generates the thumbnail / WebP derivatives of product images that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild every product image, not only missing ones.")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image', 'image_variants')
+        built = failed = 0
+        for product in products.iterator(chunk_size=200):
+            if not options['force'] and not needs_variants(product):
+                continue
+            image_variants = update_product_images(product)
+            if image_variants.get('error'):
+                failed += 1
+                self.stderr.write(f"{product.pk}: {image_variants['error']}")
+            else:
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {built} products ({failed} failed)."))
@@ -0,0 +1,30 @@
+# backend/apps/products/management/commands/build_recommendations.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.products.recommendations import rebuild_all, refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the precomputed 'customers also bought / also wishlisted' neighbours "
+        "from orders and wishlist additions since the last run (run from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Recount all orders and wishlists (also drops pairs from removed wishlist items).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['full']:
+            products = rebuild_all()
+            message = f"Rebuilt neighbours of {products} products"
+        else:
+            products = refresh()
+            message = f"Refreshed neighbours of {products} products"
+        self.stdout.write(self.style.SUCCESS(f"{message} in {time.monotonic() - started:.1f}s."))
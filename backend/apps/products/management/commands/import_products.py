@@ -0,0 +1,66 @@
+# backend/apps/products/management/commands/import_products.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.bulk import FORMATS, guess_format
+from apps.products.product_import import ProductImporter
+from apps.users.models import User
+from ecommerce_api.roles import Role
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates or updates a seller's products from a JSONL or CSV file in batches, "
+        "matched on the seller's SKU (fields: sku, name, description, price, sale_price, "
+        "category (slug), stock, is_active)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--seller', required=True, help="Email or id of the seller owning the products.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension (.csv, else jsonl).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows validated and written per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count, write nothing.")
+        parser.add_argument('--max-errors', type=int, default=20, help="Invalid rows to print.")
+
+    def get_seller(self, value):
+        lookup = {'pk': value} if value.isdigit() else {'email__iexact': value}
+        try:
+            seller = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"No user {value}")
+        if seller.role != Role.SELLER:
+            raise CommandError(f"{seller.email} is not a seller")
+        return seller
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        importer = ProductImporter(
+            self.get_seller(options['seller']),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            max_errors=options['max_errors'],
+        )
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats.read} rows read, {stats.created} created, {stats.updated} updated, {stats.invalid} invalid"
+            )
+
+        try:
+            if path == '-':
+                stats = importer.run(sys.stdin, file_format, progress)
+            else:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    stats = importer.run(stream, file_format, progress)
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for line, message in sorted(stats.errors):
+            self.stderr.write(f"line {line}: {message}")
+        summary = ', '.join(f'{key}={value}' for key, value in stats.as_dict().items())
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{summary}"))
@@ -0,0 +1,54 @@
+# backend/apps/products/management/commands/import_reviews.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.bulk import FORMATS, guess_format
+from apps.products.review_import import ON_CONFLICT, ReviewImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports reviews from a JSONL or CSV file in batches "
+        "(fields: product_id, user_id or user_email, rating, comment, created_at)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension (.csv, else jsonl).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows validated and written per batch.")
+        parser.add_argument(
+            '--on-conflict', choices=ON_CONFLICT, default='skip',
+            help="What to do with a review that already exists for the same product and user.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Validate and count, write nothing.")
+        parser.add_argument('--max-errors', type=int, default=20, help="Invalid rows to print.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        importer = ReviewImporter(
+            batch_size=options['batch_size'],
+            on_conflict=options['on_conflict'],
+            dry_run=options['dry_run'],
+            max_errors=options['max_errors'],
+        )
+
+        def progress(stats):
+            self.stdout.write(f"  {stats.read} rows read, {stats.created} created, {stats.invalid} invalid")
+
+        try:
+            if path == '-':
+                stats = importer.run(sys.stdin, file_format, progress)
+            else:
+                with open(path, newline='', encoding='utf-8') as stream:
+                    stats = importer.run(stream, file_format, progress)
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for line, message in sorted(stats.errors):
+            self.stderr.write(f"line {line}: {message}")
+        summary = ', '.join(f'{key}={value}' for key, value in stats.as_dict().items())
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{summary}"))
@@ -0,0 +1,26 @@
+# backend/apps/products/management/commands/rebuild_ratings.py
+
+from django.core.management.base import BaseCommand
+
+from apps.products.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized rating aggregates (sum/count/average/histogram) on Product."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product', action='append', dest='product_ids',
+            help="Only rebuild this product (can be given multiple times).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of products aggregated and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_aggregates(
+            product_ids=options['product_ids'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} products."))
@@ -0,0 +1,23 @@
+# backend/apps/products/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from apps.products.models import Product, ProductSearchDocument
+from apps.products.search import reindex_queryset
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the product full-text search documents (and with them the database index)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of products indexed per upsert.",
+        )
+
+    def handle(self, *args, **options):
+        # Orphans can't exist (documents cascade with products), so a
+        # rebuild is a plain upsert over the whole catalog.
+        indexed = reindex_queryset(Product.objects.all(), batch_size=options['batch_size'])
+        total = ProductSearchDocument.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products ({total} search documents)."))
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DOCUMENT_TABLE = "products_productsearchdocument"
+FTS_TABLE = "products_search_fts"
+
+MYSQL_CREATE = [
+    f"CREATE FULLTEXT INDEX products_search_title_ft ON {DOCUMENT_TABLE} (title)",
+    f"CREATE FULLTEXT INDEX products_search_all_ft ON {DOCUMENT_TABLE} (title, keywords, body)",
+]
+MYSQL_DROP = [
+    f"DROP INDEX products_search_title_ft ON {DOCUMENT_TABLE}",
+    f"DROP INDEX products_search_all_ft ON {DOCUMENT_TABLE}",
+]
+
+# External-content FTS5 table over the document table, kept in sync by triggers.
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"title, keywords, body, content='{DOCUMENT_TABLE}', content_rowid='rowid', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, keywords, body) "
+    f"VALUES (new.rowid, new.title, new.keywords, new.body); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, body) "
+    f"VALUES ('delete', old.rowid, old.title, old.keywords, old.body); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, body) "
+    f"VALUES ('delete', old.rowid, old.title, old.keywords, old.body); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, keywords, body) "
+    f"VALUES (new.rowid, new.title, new.keywords, new.body); END",
+]
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    statements = {"mysql": MYSQL_CREATE, "sqlite": SQLITE_CREATE}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    statements = {"mysql": MYSQL_DROP, "sqlite": SQLITE_DROP}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def populate_search_documents(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductSearchDocument = apps.get_model("products", "ProductSearchDocument")
+    products = Product.objects.select_related("category", "seller").iterator(
+        chunk_size=500
+    )
+    documents = []
+    for product in products:
+        keywords = " ".join(
+            value
+            for value in (
+                product.category.name if product.category_id else "",
+                product.seller.username,
+            )
+            if value
+        )
+        documents.append(
+            ProductSearchDocument(
+                product_id=product.pk,
+                title=product.name,
+                keywords=keywords[:512],
+                body=product.description or "",
+            )
+        )
+    ProductSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_product_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSearchDocument",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("keywords", models.CharField(max_length=512)),
+                ("body", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
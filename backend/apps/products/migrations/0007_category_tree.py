@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    categories = list(Category.objects.only("id", "parent_id"))
+    parents = {category.id: category.parent_id for category in categories}
+
+    def chain(category_id):
+        ids = []
+        while category_id is not None and category_id not in ids:
+            ids.append(category_id)
+            category_id = parents.get(category_id)
+        return reversed(ids)
+
+    for category in categories:
+        ids = list(chain(category.id))
+        category.path = "".join(f"{pk.hex}/" for pk in ids)
+        category.depth = len(ids) - 1
+    Category.objects.bulk_update(categories, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="path",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=700
+            ),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_category_tree"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "rating", "created_at"],
+                name="review_product_rating_idx",
+            ),
+        ),
+    ]
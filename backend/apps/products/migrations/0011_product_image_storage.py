@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:57
+
+import apps.common.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0010_product_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=apps.common.storage.product_image_storage,
+                upload_to="products/",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+def set_image_status(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    products = Product.objects.exclude(image="").exclude(image__isnull=True)
+    for product in products.only("pk", "image_variants").iterator(chunk_size=500):
+        variants = product.image_variants or {}
+        status = "ready" if variants.get("variants") else "failed" if variants.get("error") else "none"
+        if status != "none":
+            Product.objects.filter(pk=product.pk).update(image_status=status)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0011_product_image_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("none", "No image"),
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="none",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(set_image_status, migrations.RunPython.noop),
+    ]
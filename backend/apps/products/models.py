@@ -1,12 +1,29 @@
 # apps/products/models.py
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.common.models import BaseModel # Hamara BaseModel import karein
+from apps.common.storage import product_image_storage
+
+# Star value -> Product column holding the number of reviews with that rating
+RATING_STAR_FIELDS = {star: f'rating_{star}_count' for star in range(1, 6)}
+
+# Materialized path: every ancestor's id (hex) followed by the category's own,
+# each terminated by this separator, e.g. "3f2a.../9c1b.../".
+CATEGORY_PATH_SEPARATOR = '/'
 
 class Category(BaseModel): # BaseModel se inherit karein
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+
+    # Parent badalne par save() path aur depth ko poore subtree me update karta hai.
+    # A subtree is then `path__startswith=<root path>`, one index range scan.
+    path = models.CharField(max_length=700, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name_plural = 'Categories'
@@ -14,6 +31,61 @@ class Category(BaseModel): # BaseModel se inherit karein
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Name as stored, so a rename can be told apart from other saves (search reindex)
+        instance.loaded_name = instance.__dict__.get('name')
+        return instance
+
+    def renamed(self):
+        """
+        True while saving a changed name (post_save handlers run before
+        loaded_name is reset). Unsaved or not loaded-from-db instances count
+        as renamed.
+        """
+        return getattr(self, 'loaded_name', None) != self.name
+
+    def build_path(self):
+        prefix = self.parent.path if self.parent_id else ''
+        return f'{prefix}{self.pk.hex}{CATEGORY_PATH_SEPARATOR}'
+
+    def clean(self):
+        super().clean()
+        if self.parent_id and self.path and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': 'A category cannot be moved under itself or one of its children.'})
+
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        if self.parent_id and old_path and self.parent.path.startswith(old_path):
+            raise ValueError('A category cannot be moved under itself or one of its children.')
+        self.path = self.build_path()
+        self.depth = self.path.count(CATEGORY_PATH_SEPARATOR) - 1
+        if 'update_fields' in kwargs and kwargs['update_fields'] is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'path', 'depth'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.path:
+                self.move_descendants(old_path)
+        self.loaded_name = self.name
+
+    def move_descendants(self, old_path):
+        """
+        Rewrites the path prefix (and depth) of every descendant in one UPDATE.
+        """
+        depth_change = self.path.count(CATEGORY_PATH_SEPARATOR) - old_path.count(CATEGORY_PATH_SEPARATOR)
+        Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+            path=Concat(Value(self.path), Substr('path', len(old_path) + 1), output_field=models.CharField()),
+            depth=F('depth') + depth_change,
+            updated_at=timezone.now(),
+        )
+
+    def get_descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
 class Product(BaseModel): # BaseModel se inherit karein
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -26,10 +98,53 @@ class Product(BaseModel): # BaseModel se inherit karein
     # Product ko User (Seller) se link karna. 'users.User' likhna zaroori hai
     seller = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='products')
     
-    image = models.ImageField(upload_to='products/', null=True, blank=True)
+    # Seller ka apna stock-keeping code; bulk import (product_import.py) upserts on it
+    sku = models.CharField(max_length=64, null=True, blank=True)
+    # Content-addressed: stored as products/<sha256[:2]>/<sha256>.<ext>, duplicates once
+    image = models.ImageField(upload_to='products/', storage=product_image_storage, null=True, blank=True)
+    # Resized JPEG/WebP copies of `image` (apps/products/images.py), built by a
+    # background job after upload; image_status tracks it.
+    IMAGE_NONE = 'none'
+    IMAGE_PENDING = 'pending'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_NONE, 'No image'), (IMAGE_PENDING, 'Pending'), (IMAGE_PROCESSING, 'Processing'),
+        (IMAGE_READY, 'Ready'), (IMAGE_FAILED, 'Failed'),
+    )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_NONE, editable=False)
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
+    # Denormalized rating aggregates. Reviews ke create/update/delete par
+    # apps.products.ratings inhe update karta hai, so list pages never touch
+    # the Review table. `rebuild_ratings` command repairs them in bulk.
+    average_rating = models.FloatField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Hot access paths: public list and its keyset pages (newest first),
+        # seller's my-products, category browsing sorted by price.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+            models.Index(fields=['seller', 'created_at'], name='product_seller_created_idx'),
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            # Rows changed since the autocomplete index was refreshed (apps/products/autocomplete.py)
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
+        constraints = [
+            # NULLs don't collide, so products without a SKU are unaffected
+            models.UniqueConstraint(fields=['seller', 'sku'], name='product_seller_sku_uniq'),
+        ]
+
     def __str__(self):
         return self.name
         
@@ -40,16 +155,12 @@ class Product(BaseModel): # BaseModel se inherit karein
         return 0
 
     @property
-    def average_rating(self):
-        # self.reviews.aggregate(models.Avg('rating'))['rating__avg'] or 0
-        reviews = self.reviews.all()
-        if not reviews:
-            return 0
-        return sum(r.rating for r in reviews) / len(reviews)
-    
-    @property
-    def review_count(self):
-        return self.reviews.count()
+    def rating_histogram(self):
+        """
+        Star histogram as {1: count, ..., 5: count}, read from the
+        denormalized counters (no query against the Review table).
+        """
+        return {star: getattr(self, field) for star, field in RATING_STAR_FIELDS.items()}
 
 class Review(BaseModel): # BaseModel se inherit karein
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
@@ -59,6 +170,64 @@ class Review(BaseModel): # BaseModel se inherit karein
 
     class Meta:
         unique_together = ('product', 'user')
+        indexes = [
+            # Reviews of one product, newest first
+            models.Index(fields=['product', 'created_at'], name='review_product_created_idx'),
+            # Highest / lowest rated first and ?rating= (see ReviewSortFilter)
+            models.Index(fields=['product', 'rating', 'created_at'], name='review_product_rating_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.rating} stars for {self.product.name}'
+
+class ProductSearchDocument(models.Model):
+    """
+    Denormalized search text for one product, maintained by apps.products.search.
+    The database-specific full-text index (MySQL FULLTEXT / SQLite FTS5) is
+    built on top of this table, so searches never join category or seller.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=255)       # product name
+    keywords = models.CharField(max_length=512)    # category name + seller username
+    body = models.TextField(blank=True)            # product description
+
+    def __str__(self):
+        return self.title
+
+class SimilarProduct(models.Model):
+    """
+    Top-K "customers also bought / also wishlisted" neighbours of a product,
+    precomputed offline by apps.products.recommendations (never per request).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_products')
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    # Orders / wishlists containing both products
+    bought_together = models.PositiveIntegerField(default=0)
+    wishlisted_together = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'similar'], name='similar_product_uniq'),
+        ]
+        indexes = [
+            # /products/{id}/similar/: one product's neighbours, best first
+            models.Index(fields=['product', '-score'], name='similar_product_score_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.rating} stars for {self.product.name}'
\ No newline at end of file
+        return f'{self.similar_id} for {self.product_id} ({self.score})'
+
+class RecommendationState(models.Model):
+    """
+    Single row: how far orders and wishlist additions have been folded into
+    SimilarProduct, so refreshes only look at what came after.
+    """
+    orders_until = models.DateTimeField(null=True, blank=True)
+    wishlists_until = models.DateTimeField(null=True, blank=True)
+    full_rebuild_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def load(cls):
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
@@ -0,0 +1,131 @@
+# backend/apps/products/product_import.py
+"""
+Bulk product import / upsert for one seller (catalogs with tens of
+thousands of SKUs).
+
+Rows are streamed from a JSONL or CSV file and handled in batches:
+
+1. validate the batch with ProductImportSerializer (ProductWriteSerializer rules),
+2. resolve the category slugs of the batch with one IN query,
+3. load the seller's existing products for the batch's SKUs with one query,
+4. bulk_create the new SKUs and bulk_update the existing ones.
+
+Like ProductViewSet.perform_create, new products get the seller as `seller`,
+`created_by` and `updated_by`; updated products get `updated_by`. An update
+only touches the columns present in the row, so a "sku,stock" file with the
+required fields can refresh stock without resetting prices.
+
+Bulk writes send no signals, so search documents and the catalog cache are
+refreshed here.
+"""
+
+import json
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.common.bulk import ImportStats, batched, read_rows
+from apps.common.cache import bump_version
+from .models import Category, Product
+from .search import index_products
+from .serializers import ProductImportSerializer
+
+# Row columns copied onto the Product (category is resolved separately)
+IMPORT_FIELDS = ('name', 'description', 'price', 'sale_price', 'stock', 'is_active')
+
+
+class ProductImporter:
+    def __init__(self, seller, batch_size=500, dry_run=False, max_errors=100):
+        self.seller = seller
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = ImportStats(max_errors)
+        self.serializer = ProductImportSerializer()
+
+    def run(self, stream, file_format, progress=None):
+        for batch in batched(read_rows(stream, file_format), self.batch_size):
+            self.import_batch(batch)
+            if progress is not None:
+                progress(self.stats)
+        return self.stats
+
+    # ----------------- one batch -----------------
+
+    def validate(self, batch):
+        """
+        Runs ProductImportSerializer validation on every row of the batch; one
+        serializer instance (fields built once) is reused for all rows.
+        """
+        valid = []
+        for line, row, error in batch:
+            self.stats.read += 1
+            if error is None:
+                try:
+                    valid.append((line, self.serializer.run_validation(row)))
+                    continue
+                except ValidationError as exc:
+                    error = json.dumps(exc.detail)
+            self.stats.add_error(line, error)
+        return valid
+
+    def resolve(self, valid):
+        """
+        Swaps category slugs for Category objects (one query for the batch);
+        rows with an unknown slug are rejected. Later rows for the same SKU win.
+        """
+        slugs = {data['category'] for _, data in valid}
+        categories = {category.slug: category for category in Category.objects.filter(slug__in=slugs)}
+
+        rows = {}
+        for line, data in valid:
+            category = categories.get(data['category'])
+            if category is None:
+                self.stats.add_error(line, f"Unknown category {data['category']}")
+                continue
+            rows[data['sku']] = (line, {**data, 'category': category})
+        return rows
+
+    def import_batch(self, batch):
+        rows = self.resolve(self.validate(batch))
+        if not rows:
+            return
+        existing = {
+            product.sku: product
+            for product in Product.objects.filter(seller=self.seller, sku__in=rows).select_related('category', 'seller')
+        }
+        now = timezone.now()
+        new, updated, update_fields = [], [], {'category', 'updated_by', 'updated_at'}
+
+        for sku, (line, data) in rows.items():
+            product = existing.get(sku)
+            if product is None:
+                product = Product(
+                    seller=self.seller, sku=sku, is_active=True,
+                    created_by=self.seller, updated_by=self.seller,
+                )
+                new.append(product)
+            else:
+                product.updated_by = self.seller
+                product.updated_at = now
+                update_fields.update(field for field in IMPORT_FIELDS if field in data)
+                updated.append(product)
+            product.category = data['category']
+            for field in IMPORT_FIELDS:
+                if field in data:
+                    setattr(product, field, data[field])
+
+        if not self.dry_run:
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(new, batch_size=self.batch_size)
+                    Product.objects.bulk_update(updated, sorted(update_fields), batch_size=self.batch_size)
+                    index_products(new + updated)
+            except IntegrityError as exc:
+                # A SKU inserted concurrently (e.g. by another import); the batch is rolled back
+                for line, _ in rows.values():
+                    self.stats.add_error(line, f'Batch not saved: {exc}')
+                return
+            bump_version('products.product')
+        self.stats.created += len(new)
+        self.stats.updated += len(updated)
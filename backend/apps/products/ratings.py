@@ -0,0 +1,112 @@
+# backend/apps/products/ratings.py
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from apps.common.cache import bump_version
+from .models import Product, Review, RATING_STAR_FIELDS
+
+# average = rating_sum / review_count, evaluated inside the database so that
+# it always reflects the counters as they are after the increment.
+AVERAGE_RATING_EXPRESSION = Case(
+    When(review_count=0, then=Value(0.0)),
+    default=Cast('rating_sum', FloatField()) / Cast('review_count', FloatField()),
+    output_field=FloatField(),
+)
+
+
+def apply_review_change(product_id, old_rating=None, new_rating=None):
+    """
+    Incrementally updates the rating aggregates of one product.
+
+    - Review created: old_rating=None, new_rating=<stars>
+    - Review updated: old_rating=<before>, new_rating=<after>
+    - Review deleted: old_rating=<stars>, new_rating=None
+
+    Counters are changed with F() expressions, so concurrent reviews on the
+    same product never overwrite each other. `updated_at` is touched as well
+    because the product's public representation has changed.
+    """
+    updates = {'updated_at': timezone.now()}
+
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    if count_delta:
+        updates['review_count'] = F('review_count') + count_delta
+    if sum_delta:
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+    if old_rating != new_rating:
+        if old_rating is not None:
+            field = RATING_STAR_FIELDS[old_rating]
+            updates[field] = F(field) - 1
+        if new_rating is not None:
+            field = RATING_STAR_FIELDS[new_rating]
+            updates[field] = F(field) + 1
+
+    with transaction.atomic():
+        products = Product.objects.filter(pk=product_id)
+        products.update(**updates)
+        if count_delta or sum_delta:
+            products.update(average_rating=AVERAGE_RATING_EXPRESSION)
+
+
+def rebuild_rating_aggregates(product_ids=None, batch_size=1000):
+    """
+    Recomputes the rating aggregates from the Review table.
+
+    Products are processed in primary-key batches: one grouped aggregate
+    query plus one bulk_update per batch. Products without reviews are reset
+    to zero, `updated_at` is touched and cached catalog responses are
+    invalidated (bulk_update sends no signals). Returns the number of
+    products that were rewritten.
+    """
+    products = Product.objects.order_by('pk')
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+
+    star_counts = {
+        field: Count('id', filter=Q(rating=star))
+        for star, field in RATING_STAR_FIELDS.items()
+    }
+    fields = ['average_rating', 'review_count', 'rating_sum', *RATING_STAR_FIELDS.values(), 'updated_at']
+    now = timezone.now()
+
+    updated = 0
+    last_pk = None
+    while True:
+        batch = products if last_pk is None else products.filter(pk__gt=last_pk)
+        batch_ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not batch_ids:
+            break
+        last_pk = batch_ids[-1]
+
+        stats = {
+            row['product_id']: row
+            for row in Review.objects.filter(product_id__in=batch_ids)
+            .order_by()
+            .values('product_id')
+            .annotate(review_count=Count('id'), rating_sum=Sum('rating'), **star_counts)
+        }
+
+        rebuilt = []
+        for pk in batch_ids:
+            row = stats.get(pk, {})
+            product = Product(pk=pk, updated_at=now)
+            product.review_count = row.get('review_count', 0)
+            product.rating_sum = row.get('rating_sum') or 0
+            for field in RATING_STAR_FIELDS.values():
+                setattr(product, field, row.get(field, 0))
+            product.average_rating = (
+                product.rating_sum / product.review_count if product.review_count else 0
+            )
+            rebuilt.append(product)
+
+        with transaction.atomic():
+            Product.objects.bulk_update(rebuilt, fields)
+        updated += len(rebuilt)
+
+    if updated:
+        bump_version('products.product')
+    return updated
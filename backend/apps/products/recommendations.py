@@ -0,0 +1,202 @@
+# backend/apps/products/recommendations.py
+"""
+"Customers also bought / also wishlisted" neighbours, computed offline.
+
+Two products co-occur when they are in the same order (OrderItem) or in the
+same user's wishlist (WishlistItem). The co-occurrence matrix is sparse and
+only ever built here, as a dict of Counters per product:
+
+    score(a, b) = ORDER_WEIGHT * orders with a and b + WISHLIST_WEIGHT * wishlists with a and b
+
+and only the TOP_K best neighbours of each product are stored (SimilarProduct).
+/products/{id}/similar/ is then a single index range read.
+
+`manage.py build_recommendations` (cron) refreshes incrementally: only
+products in orders / wishlist additions newer than the last run are
+recounted (over all of their orders and wishlists). `--full` recounts
+everything, which also drops pairs from removed wishlist items.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.cache import bump_version
+from apps.common.export import iterate_rows
+from apps.orders.models import OrderItem
+from apps.wishlist.models import WishlistItem
+from .models import RecommendationState, SimilarProduct
+
+TOP_K = 20
+ORDER_WEIGHT = 1.0
+WISHLIST_WEIGHT = 0.5
+# A basket of n products makes n*(n-1) pairs; bulk buyers' baskets are cut
+MAX_BASKET = 50
+CHUNK_SIZE = 5000
+# Products recounted (and rewritten) together in an incremental refresh
+PRODUCT_BATCH = 500
+# Rows newer than this may belong to transactions still in flight; next run
+REFRESH_LAG = timedelta(minutes=5)
+
+
+def baskets(rows):
+    """
+    (basket key, product id) rows sorted by key -> lists of distinct product ids.
+    """
+    for _, group in groupby(rows, key=itemgetter(0)):
+        products = list(dict.fromkeys(product for _, product in group))
+        if len(products) > 1:
+            yield products[:MAX_BASKET]
+
+
+def order_baskets(items):
+    return baskets(iterate_rows(items, ['order_id', 'product_id'], ordering=('order_id', 'id'), chunk_size=CHUNK_SIZE))
+
+
+def wishlist_baskets(items):
+    return baskets(iterate_rows(items, ['user_id', 'product_id'], ordering=('user_id', 'id'), chunk_size=CHUNK_SIZE))
+
+
+class CooccurrenceCounts:
+    """
+    Sparse co-occurrence rows (product -> Counter of neighbours), for all
+    products or only those in `only`.
+    """
+
+    def __init__(self, only=None):
+        self.only = only
+        self.bought = defaultdict(Counter)
+        self.wishlisted = defaultdict(Counter)
+
+    def add(self, baskets, matrix):
+        only = self.only
+        for basket in baskets:
+            for product in basket:
+                if only is not None and product not in only:
+                    continue
+                row = matrix[product]
+                row.update(basket)
+                row[product] -= 1  # the product itself isn't its neighbour
+                if not row[product]:
+                    del row[product]
+
+    def add_orders(self, items):
+        self.add(order_baskets(items), self.bought)
+
+    def add_wishlists(self, items):
+        self.add(wishlist_baskets(items), self.wishlisted)
+
+    def products(self):
+        return self.bought.keys() | self.wishlisted.keys()
+
+    def top_k(self, product):
+        bought = self.bought.get(product, Counter())
+        wishlisted = self.wishlisted.get(product, Counter())
+        scores = {
+            neighbour: ORDER_WEIGHT * bought[neighbour] + WISHLIST_WEIGHT * wishlisted[neighbour]
+            for neighbour in bought.keys() | wishlisted.keys()
+        }
+        best = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))[:TOP_K]
+        return [
+            SimilarProduct(
+                product_id=product, similar_id=neighbour, score=score,
+                bought_together=bought[neighbour], wishlisted_together=wishlisted[neighbour],
+            )
+            for neighbour, score in best
+        ]
+
+
+def write_neighbours(product_ids, counts):
+    """
+    Replaces the stored neighbours of `product_ids` with the top-K of `counts`.
+    """
+    rows = [row for product in product_ids for row in counts.top_k(product)]
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=product_ids).delete()
+        SimilarProduct.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def rebuild_all():
+    """
+    Recounts every order and wishlist in one pass and rewrites the table.
+    Returns the number of products with neighbours.
+    """
+    cutoff = timezone.now() - REFRESH_LAG
+    counts = CooccurrenceCounts()
+    counts.add_orders(OrderItem.objects.all())
+    counts.add_wishlists(WishlistItem.objects.all())
+
+    products = counts.products()
+    for batch in chunks(products, PRODUCT_BATCH):
+        write_neighbours(batch, counts)
+    # Products that lost all their neighbours
+    stale = set(SimilarProduct.objects.order_by().values_list('product_id', flat=True).distinct()) - products
+    for batch in chunks(stale, PRODUCT_BATCH):
+        SimilarProduct.objects.filter(product_id__in=batch).delete()
+
+    state = RecommendationState.load()
+    state.orders_until = state.wishlists_until = cutoff
+    state.full_rebuild_at = timezone.now()
+    state.save()
+    bump_version('products.product')
+    return len(products)
+
+
+def refresh():
+    """
+    Incremental refresh: recounts only the products touched by orders and
+    wishlist additions since the last run. Falls back to rebuild_all() on
+    the first run. Returns the number of recounted products.
+    """
+    state = RecommendationState.load()
+    if state.orders_until is None or state.wishlists_until is None:
+        return rebuild_all()
+    cutoff = timezone.now() - REFRESH_LAG
+
+    touched = set(
+        OrderItem.objects.filter(created_at__gt=state.orders_until, created_at__lte=cutoff)
+        .order_by().values_list('product_id', flat=True).distinct()
+    )
+    # A new wishlist item pairs with everything else in that user's wishlist
+    users = (
+        WishlistItem.objects.filter(created_at__gt=state.wishlists_until, created_at__lte=cutoff)
+        .order_by().values('user_id')
+    )
+    touched |= set(
+        WishlistItem.objects.filter(user_id__in=users).order_by().values_list('product_id', flat=True).distinct()
+    )
+
+    for batch in chunks(touched, PRODUCT_BATCH):
+        counts = CooccurrenceCounts(only=set(batch))
+        counts.add_orders(OrderItem.objects.filter(
+            order_id__in=OrderItem.objects.filter(product_id__in=batch).values('order_id'),
+        ))
+        counts.add_wishlists(WishlistItem.objects.filter(
+            user_id__in=WishlistItem.objects.filter(product_id__in=batch).order_by().values('user_id'),
+        ))
+        write_neighbours(batch, counts)
+
+    state.orders_until = state.wishlists_until = cutoff
+    state.save(update_fields=['orders_until', 'wishlists_until'])
+    if touched:
+        bump_version('products.product')
+    return len(touched)
+
+
+def similar_product_ids(product_id, limit):
+    return list(
+        SimilarProduct.objects.filter(product_id=product_id)
+        .order_by('-score').values_list('similar_id', flat=True)[:limit]
+    )
+
@@ -0,0 +1,135 @@
+# backend/apps/products/review_import.py
+"""
+Bulk review import (legacy marketplace migration).
+
+Rows are streamed from a JSONL or CSV file and handled in batches:
+
+1. validate the batch with ReviewImportSerializer (ReviewSerializer rules),
+2. resolve products and authors with one IN query each,
+3. bulk_create the reviews, skipping or updating rows that hit the
+   (product, user) unique constraint,
+4. rebuild the rating aggregates of the touched products once per batch.
+
+Bulk writes send no signals, so the catalog cache is bumped here.
+"""
+
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.common.bulk import ImportStats, batched, read_rows, upsert_options
+from apps.common.cache import bump_version
+from apps.users.models import User
+from .models import Product, Review
+from .ratings import rebuild_rating_aggregates
+from .serializers import ReviewImportSerializer
+
+ON_CONFLICT = ('skip', 'update')
+
+
+class ReviewImporter:
+    def __init__(self, batch_size=1000, on_conflict='skip', dry_run=False, max_errors=100):
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+        self.dry_run = dry_run
+        self.stats = ImportStats(max_errors)
+        self.serializer = ReviewImportSerializer()
+
+    def run(self, stream, file_format, progress=None):
+        for batch in batched(read_rows(stream, file_format), self.batch_size):
+            self.import_batch(batch)
+            if progress is not None:
+                progress(self.stats)
+        return self.stats
+
+    # ----------------- one batch -----------------
+
+    def validate(self, batch):
+        """
+        Runs ReviewImportSerializer validation on every row of the batch; one
+        serializer instance (fields built once) is reused for all rows.
+        """
+        valid = []
+        for line, row, error in batch:
+            self.stats.read += 1
+            if error is None:
+                try:
+                    valid.append((line, self.serializer.run_validation(row)))
+                    continue
+                except ValidationError as exc:
+                    error = json.dumps(exc.detail)
+            self.stats.add_error(line, error)
+        return valid
+
+    def resolve(self, valid):
+        """
+        Turns validated rows into Review objects; rows whose product or author
+        doesn't exist are rejected. Later rows for the same (product, user) win.
+        """
+        product_ids = {data['product_id'] for _, data in valid}
+        products = set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+        user_ids = {data['user_id'] for _, data in valid if data.get('user_id')}
+        emails = {data['user_email'].lower() for _, data in valid if not data.get('user_id')}
+        known_ids = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        by_email = {
+            email.lower(): pk
+            for pk, email in User.objects.filter(email__in=emails).values_list('pk', 'email')
+        } if emails else {}
+
+        reviews = {}
+        for line, data in valid:
+            user_id = data.get('user_id') or by_email.get(data['user_email'].lower())
+            if data['product_id'] not in products:
+                self.stats.add_error(line, f"Unknown product {data['product_id']}")
+            elif user_id is None or (data.get('user_id') and user_id not in known_ids):
+                self.stats.add_error(line, 'Unknown user')
+            else:
+                reviews[(data['product_id'], user_id)] = Review(
+                    product_id=data['product_id'], user_id=user_id,
+                    rating=data['rating'], comment=data.get('comment'),
+                    created_at=data.get('created_at'),
+                )
+        return reviews
+
+    def import_batch(self, batch):
+        reviews = self.resolve(self.validate(batch))
+        if not reviews:
+            return
+        product_ids = {product_id for product_id, _ in reviews}
+        existing = set(
+            Review.objects.filter(product_id__in=product_ids, user_id__in={user_id for _, user_id in reviews})
+            .values_list('product_id', 'user_id')
+        )
+        existing &= set(reviews)
+        new = [review for key, review in reviews.items() if key not in existing]
+
+        if self.on_conflict == 'update':
+            self.stats.updated += len(existing)
+            rows = list(reviews.values())
+        else:
+            self.stats.skipped += len(existing)
+            rows = new
+        self.stats.created += len(new)
+        if self.dry_run or not rows:
+            return
+
+        with transaction.atomic():
+            self.write(rows)
+            # created_at is auto_now_add; restore the legacy dates of new rows
+            dated = [review for review in new if review.created_at is not None]
+            if dated:
+                Review.objects.bulk_update(dated, ['created_at'])
+            rebuild_rating_aggregates(product_ids)
+        bump_version('products.review')
+
+    def write(self, rows):
+        created_at = {review.pk: review.created_at for review in rows}
+        if self.on_conflict == 'update':
+            options = upsert_options(['product', 'user'], ['rating', 'comment', 'updated_at'])
+        else:
+            # Rows inserted concurrently since `existing` was read are skipped too
+            options = {'ignore_conflicts': True}
+        Review.objects.bulk_create(rows, batch_size=self.batch_size, **options)
+        for review in rows:
+            review.created_at = created_at[review.pk]
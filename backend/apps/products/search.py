@@ -0,0 +1,319 @@
+# backend/apps/products/search.py
+"""
+Full-text product search.
+
+Har product ka search text ProductSearchDocument table me denormalized rehta
+hai (title / keywords / body). On top of that table every database gets its
+own index:
+
+- MySQL:  FULLTEXT indexes, queried with MATCH ... AGAINST in boolean mode.
+- SQLite: an external-content FTS5 table kept in sync by triggers, ranked with bm25().
+- Others: plain icontains over the document table (no joins, but still a scan).
+
+Query terms are prefix-matched, and terms that don't prefix any known word are
+expanded to their closest vocabulary words so small typos still find results.
+"""
+
+import bisect
+import re
+import threading
+import time
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from apps.common.bulk import upsert_options
+
+from .models import Product, ProductSearchDocument
+
+DOCUMENT_TABLE = ProductSearchDocument._meta.db_table
+SQLITE_FTS_TABLE = 'products_search_fts'
+
+MAX_QUERY_TERMS = 8
+MAX_CORRECTIONS = 3
+MIN_TYPO_LENGTH = 4
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+# ===============================================
+#  INDEXING
+# ===============================================
+
+def build_document(product):
+    """
+    Builds (but does not save) the search document for a product.
+    Expects `category` and `seller` to be loaded or cheap to fetch.
+    """
+    keywords = ' '.join(
+        value for value in (
+            product.category.name if product.category_id else '',
+            product.seller.username,
+        ) if value
+    )
+    return ProductSearchDocument(
+        product_id=product.pk,
+        title=product.name,
+        keywords=keywords[:512],
+        body=product.description or '',
+    )
+
+
+def index_products(products):
+    """
+    Creates or refreshes the search documents of the given products with a
+    single upsert. The database index follows the document table.
+    """
+    documents = [build_document(product) for product in products]
+    if documents:
+        ProductSearchDocument.objects.bulk_create(
+            documents, **upsert_options(['product'], ['title', 'keywords', 'body']),
+        )
+        vocabulary.add_documents(documents)
+    return len(documents)
+
+
+def reindex_queryset(queryset, batch_size=500):
+    """
+    Re-indexes every product of `queryset` in primary-key batches.
+    Returns the number of indexed products.
+    """
+    queryset = queryset.select_related('category', 'seller').order_by('pk')
+    indexed = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        products = list(batch[:batch_size])
+        if not products:
+            break
+        last_pk = products[-1].pk
+        indexed += index_products(products)
+    return indexed
+
+
+# ===============================================
+#  TYPO TOLERANCE
+# ===============================================
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (Levenshtein + adjacent transpositions).
+    Returns `limit + 1` as soon as the distance is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SearchVocabulary:
+    """
+    Sorted list of the words used in product titles and keywords.
+    Loaded lazily per process and fully reloaded after `ttl` seconds; words
+    of documents indexed by this process are added in between.
+    """
+    ttl = 300
+
+    def __init__(self):
+        self._terms = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._terms = None
+
+    def add_documents(self, documents):
+        terms = self._terms
+        if terms is None:
+            return
+        with self._lock:
+            for document in documents:
+                for word in set(tokenize(document.title) + tokenize(document.keywords)):
+                    index = bisect.bisect_left(terms, word)
+                    if index == len(terms) or terms[index] != word:
+                        terms.insert(index, word)
+
+    @property
+    def terms(self):
+        terms = self._terms
+        if terms is None or time.monotonic() - self._loaded_at > self.ttl:
+            with self._lock:
+                words = set()
+                rows = ProductSearchDocument.objects.values_list('title', 'keywords')
+                for title, keywords in rows.iterator(chunk_size=2000):
+                    words.update(tokenize(title))
+                    words.update(tokenize(keywords))
+                terms = sorted(words)
+                self._terms, self._loaded_at = terms, time.monotonic()
+        return terms
+
+    def has_prefix(self, term):
+        terms = self.terms
+        index = bisect.bisect_left(terms, term)
+        return index < len(terms) and terms[index].startswith(term)
+
+    def corrections(self, term, limit=MAX_CORRECTIONS):
+        """
+        Closest vocabulary words to `term`, treating it as a possibly
+        unfinished word. Only words with the same first letter are compared.
+        """
+        terms = self.terms
+        max_distance = 1 if len(term) < 8 else 2
+        start = bisect.bisect_left(terms, term[0])
+        end = bisect.bisect_left(terms, term[0] + '\uffff')
+        scored = []
+        for word in terms[start:end]:
+            distance = min(
+                edit_distance(term, word, max_distance),
+                edit_distance(term, word[:len(term)], max_distance) if len(word) > len(term) else max_distance + 1,
+            )
+            if distance <= max_distance:
+                scored.append((distance, len(word), word))
+        return [word for _, _, word in sorted(scored)[:limit]]
+
+
+vocabulary = SearchVocabulary()
+
+
+def parse_query(query):
+    """
+    Splits a raw search string into AND-ed groups of OR-ed prefix terms,
+    e.g. "aple iphone" -> [['aple', 'apple'], ['iphone']].
+    """
+    groups = []
+    for term in tokenize(query)[:MAX_QUERY_TERMS]:
+        alternatives = [term]
+        if len(term) >= MIN_TYPO_LENGTH and not vocabulary.has_prefix(term):
+            alternatives += vocabulary.corrections(term)
+        groups.append(alternatives)
+    return groups
+
+
+# ===============================================
+#  BACKENDS
+# ===============================================
+
+class BaseSearchBackend:
+    """
+    A backend filters a Product queryset down to matching rows and annotates
+    each row with `search_rank` (higher is more relevant).
+    """
+
+    def search(self, queryset, groups):
+        raise NotImplementedError
+
+
+class MySQLFulltextBackend(BaseSearchBackend):
+    """
+    Uses the FULLTEXT indexes created by migration 0005. Title matches are
+    weighted above keyword/description matches.
+    """
+
+    def build_match(self, groups):
+        return ' '.join('+(%s)' % ' '.join(f'{term}*' for term in group) for group in groups)
+
+    def search(self, queryset, groups):
+        match = self.build_match(groups)
+        product_table = connection.ops.quote_name(Product._meta.db_table)
+        matching_ids = RawSQL(
+            f"SELECT product_id FROM {DOCUMENT_TABLE} "
+            f"WHERE MATCH (title, keywords, body) AGAINST (%s IN BOOLEAN MODE)",
+            [match],
+        )
+        rank = RawSQL(
+            f"SELECT 3 * MATCH (title) AGAINST (%s IN BOOLEAN MODE) "
+            f"+ MATCH (title, keywords, body) AGAINST (%s IN BOOLEAN MODE) "
+            f"FROM {DOCUMENT_TABLE} WHERE product_id = {product_table}.id",
+            [match, match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Uses the FTS5 table created by migration 0005, ranked with bm25()
+    (title x10, keywords x4, description x1).
+    """
+
+    def build_match(self, groups):
+        return ' AND '.join('(%s)' % ' OR '.join(f'"{term}"*' for term in group) for group in groups)
+
+    def search(self, queryset, groups):
+        match = self.build_match(groups)
+        product_table = connection.ops.quote_name(Product._meta.db_table)
+        matching_ids = RawSQL(
+            f"SELECT d.product_id FROM {SQLITE_FTS_TABLE} "
+            f"JOIN {DOCUMENT_TABLE} d ON d.rowid = {SQLITE_FTS_TABLE}.rowid "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s",
+            [match],
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({SQLITE_FTS_TABLE}, 10.0, 4.0, 1.0) FROM {SQLITE_FTS_TABLE} "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND {SQLITE_FTS_TABLE}.rowid = "
+            f"(SELECT d.rowid FROM {DOCUMENT_TABLE} d WHERE d.product_id = {product_table}.id)",
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """
+    Fallback for databases without a supported full-text index.
+    """
+
+    def search(self, queryset, groups):
+        for group in groups:
+            condition = Q()
+            for term in group:
+                condition |= (
+                    Q(search_document__title__icontains=term)
+                    | Q(search_document__keywords__icontains=term)
+                    | Q(search_document__body__icontains=term)
+                )
+            queryset = queryset.filter(condition)
+        first = groups[0][0]
+        return queryset.annotate(search_rank=Case(
+            When(search_document__title__istartswith=first, then=Value(2.0)),
+            When(search_document__title__icontains=first, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+
+
+SEARCH_BACKENDS = {
+    'mysql': MySQLFulltextBackend,
+    'sqlite': SQLiteFTS5Backend,
+}
+
+
+def get_search_backend():
+    return SEARCH_BACKENDS.get(connection.vendor, ContainsSearchBackend)()
+
+
+def search_products(queryset, query):
+    """
+    Filters `queryset` to the products matching `query` and annotates them
+    with `search_rank`. An empty query returns the queryset unchanged.
+    """
+    groups = parse_query(query)
+    if not groups:
+        return queryset
+    return get_search_backend().search(queryset, groups)
@@ -1,7 +1,10 @@
 # apps/products/serializers.py
 
 from rest_framework import serializers
-from .models import Category, Product, Review
+from rest_framework.reverse import reverse
+from .models import RATING_STAR_FIELDS, Category, Product, Review
+from .images import DETAIL_WIDTHS, LIST_WIDTHS, ImageVariantsField
+from apps.users.models import User
 from apps.users.serializers import UserSerializer  # Assuming this path is correct
 from apps.users.serializers import UserSerializer
 # ===============================================
@@ -14,20 +17,56 @@ class CategorySerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'parent']
+        fields = ['id', 'name', 'slug', 'parent', 'depth']
+
+    def validate_parent(self, parent):
+        # Moving a category under its own subtree would make a cycle
+        if parent and self.instance and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('A category cannot be moved under itself or one of its children.')
+        return parent
+
+class ReviewerSerializer(serializers.ModelSerializer):
+    """
+    The public part of a review's author; reviews never need the
+    reviewer's email, phone number or address.
+    """
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name']
 
 class ReviewSerializer(serializers.ModelSerializer):
     """
     Serializer for the Review model. Used for read operations.
-    Includes nested user information.
+    Includes the compact reviewer info.
     """
-    user = UserSerializer(read_only=True)
+    user = ReviewerSerializer(read_only=True)
     
     class Meta:
         model = Review
         fields = ['id', 'user', 'rating', 'comment', 'created_at']
 
 
+class ReviewImportSerializer(ReviewSerializer):
+    """
+    One review row from a bulk import (see apps/products/review_import.py).
+    Same rating/comment rules as ReviewSerializer; product and author are
+    plain ids here and resolved per batch, and the original review date
+    can be kept.
+    """
+    product_id = serializers.UUIDField()
+    user_id = serializers.IntegerField(required=False)
+    user_email = serializers.EmailField(required=False)
+    created_at = serializers.DateTimeField(required=False)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ['product_id', 'user_id', 'user_email', 'rating', 'comment', 'created_at']
+
+    def validate(self, attrs):
+        if not attrs.get('user_id') and not attrs.get('user_email'):
+            raise serializers.ValidationError('Either user_id or user_email is required.')
+        return attrs
+
+
 # ===============================================
 #  PRODUCT SERIALIZERS
 # ===============================================
@@ -52,10 +91,42 @@ class ProductWriteSerializer(serializers.ModelSerializer):
             'sale_price', 
             'category', 
             'stock', 
+            'sku',
             'image', 
             'is_active'
         ]
 
+    def validate_sku(self, sku):
+        # Blank SKU = no SKU; otherwise unique per seller (product_seller_sku_uniq)
+        if not sku:
+            return None
+        request = self.context.get('request')
+        seller = self.instance.seller if self.instance else getattr(request, 'user', None)
+        if seller is not None:
+            duplicates = Product.objects.filter(seller=seller, sku=sku)
+            if self.instance:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError('You already have a product with this SKU.')
+        return sku
+
+
+class ProductImportSerializer(ProductWriteSerializer):
+    """
+    One product row from a seller's bulk import (see apps/products/product_import.py).
+    Same rules as ProductWriteSerializer, but the category is given by slug
+    (resolved per batch) and the seller's SKU is the upsert key.
+    """
+    category = serializers.SlugField()
+    sku = serializers.CharField(max_length=64)
+
+    class Meta(ProductWriteSerializer.Meta):
+        fields = ['sku', 'name', 'description', 'price', 'sale_price', 'category', 'stock', 'is_active']
+
+    def validate_sku(self, sku):
+        # Existing SKUs are updated, not rejected
+        return sku
+
 
 # ----------------- 2. FOR READING DATA (LIST/RETRIEVE) -----------------
 
@@ -69,6 +140,8 @@ class ProductListSerializer(serializers.ModelSerializer):
     average_rating = serializers.FloatField(read_only=True)
     review_count = serializers.IntegerField(read_only=True)
     discount_percent = serializers.IntegerField(read_only=True)
+    # Card-sized derivatives; `image` stays the original upload
+    images = ImageVariantsField(LIST_WIDTHS)
     
     class Meta:
         model = Product
@@ -80,20 +153,39 @@ class ProductListSerializer(serializers.ModelSerializer):
             'sale_price',
             'discount_percent',
             'image', 
+            'images',
+            'image_status',
             'category', 
             'average_rating', 
             'review_count'
         ]
+        # Columns read by model properties (used for ?fields= projection)
+        field_sources = {'discount_percent': ('price', 'sale_price')}
+
+
+# Product detail me sirf itne latest reviews embed hote hain; baaki
+# `reviews_url` (paginated /products/{id}/reviews/) se milte hain.
+EMBEDDED_REVIEWS = 5
+
+
+def latest_reviews(queryset):
+    return queryset.order_by('-created_at', '-id')[:EMBEDDED_REVIEWS]
+
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     """
     A detailed serializer for retrieving a single product.
     Provides full nested information for related models like category, seller, and reviews.
+    `reviews` holds the latest EMBEDDED_REVIEWS only, next to the star histogram
+    and a link to the paginated reviews endpoint.
     """
     # Override fields to use nested serializers for rich, readable output.
     category = CategorySerializer(read_only=True)
     seller = UserSerializer(read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    reviews = ReviewSerializer(many=True, read_only=True, source='latest_reviews')
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    images = ImageVariantsField(DETAIL_WIDTHS)
+    reviews_url = serializers.SerializerMethodField()
 
     # Include calculated properties from the model.
     average_rating = serializers.FloatField(read_only=True)
@@ -114,15 +206,30 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'sale_price',
             'discount_percent',
             'image', 
+            'images',
+            'image_status',
             'stock', 
+            'sku',
             'is_active', 
             'category', 
             'seller', 
             'average_rating', 
             'review_count',
+            'rating_histogram',
             'reviews',
+            'reviews_url',
             'created_at',
             'updated_at',
             'created_by',
             'updated_by',
-        ]
\ No newline at end of file
+        ]
+        field_sources = {
+            'discount_percent': ('price', 'sale_price'),
+            'rating_histogram': tuple(RATING_STAR_FIELDS.values()),
+            'reviews_url': (),
+        }
+        # One prefetch query for the embedded reviews, bounded (see sparse.py)
+        related_querysets = {'reviews': ('reviews', latest_reviews)}
+
+    def get_reviews_url(self, obj):
+        return reverse('product-reviews-list', kwargs={'product_pk': obj.pk}, request=self.context.get('request'))
\ No newline at end of file
@@ -0,0 +1,79 @@
+# backend/apps/products/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.common.cache import bump_version
+from .models import Category, Product, Review
+from .images import needs_variants, update_product_images
+from .tasks import build_product_images
+from .search import index_products, reindex_queryset
+from .autocomplete import autocomplete
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    """
+    Keep the product's search document in sync. Deletes need no handler:
+    the document row cascades with the product.
+    """
+    if raw:
+        return
+    index_products([instance])
+
+
+@receiver(post_save, sender=Product)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    """
+    A new or replaced upload gets its thumbnails / WebP copies from a
+    background job (apps/products/tasks.py); until then image_status is
+    'pending' and clients show the original. Unchanged images are skipped.
+    """
+    if raw or not needs_variants(instance):
+        return
+    if not instance.image:
+        # Image removed: no file work, clear the variants right away
+        update_product_images(instance)
+        return
+    if instance.image_status == Product.IMAGE_PENDING:
+        return  # a queued job will pick up the current image
+    instance.image_status = Product.IMAGE_PENDING
+    Product.objects.filter(pk=instance.pk).update(image_status=Product.IMAGE_PENDING, updated_at=timezone.now())
+    build_product_images.enqueue(product_id=str(instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    """
+    Category names are part of the indexed keywords, so a renamed
+    category re-indexes its products. Other saves (moves, path/depth
+    updates) don't touch the index.
+    """
+    if raw or created or not instance.renamed():
+        return
+    reindex_queryset(Product.objects.filter(category=instance))
+
+
+@receiver(post_delete, sender=Product)
+def forget_deleted_product(sender, instance, **kwargs):
+    autocomplete.forget_product(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def forget_deleted_category(sender, instance, **kwargs):
+    autocomplete.forget_category(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+    Bump the model's cache version so cached catalog responses built from
+    the old data are never served again.
+    """
+    bump_version(sender._meta.label_lower)
@@ -0,0 +1,60 @@
+# backend/apps/products/tasks.py
+"""
+Background tasks of the products app (run by `manage.py run_worker`).
+
+Every image_status write also sets updated_at and bumps the product cache
+version: detail ETags are built from updated_at (apps/common/conditional.py),
+so clients holding a 'pending' response get the new status instead of a 304.
+"""
+
+from django.utils import timezone
+
+from apps.common.cache import bump_version
+from apps.common.jobs import task
+from .images import needs_variants, update_product_images
+from .models import Product
+
+
+def set_image_status(rows, **fields):
+    updated = rows.update(updated_at=timezone.now(), **fields)
+    if updated:
+        bump_version('products.product')
+    return updated
+
+
+def image_job_failed(job):
+    """
+    The job ran out of attempts: the product stops showing as 'processing'
+    and gets image_status 'failed' with the last error, unless its current
+    image already has variants (e.g. from a newer job).
+    """
+    product = Product.objects.filter(pk=job.payload.get('product_id')).only('pk', 'image', 'image_variants').first()
+    if product is None or not product.image or not needs_variants(product):
+        return
+    lines = job.last_error.strip().splitlines()
+    image_variants = {'source': product.image.name, 'error': lines[-1] if lines else 'Failed.', 'variants': []}
+    set_image_status(
+        Product.objects.filter(pk=product.pk, image=product.image.name),
+        image_variants=image_variants, image_status=Product.IMAGE_FAILED,
+    )
+
+
+@task('products.build_image_variants', timeout=600, max_attempts=3, on_failure=image_job_failed)
+def build_product_images(product_id):
+    """
+    Decodes the product's uploaded image and writes its resized JPEG/WebP
+    variants. Storage errors raise and the job is retried (image_job_failed
+    once attempts run out); an unreadable image ends as image_status 'failed'.
+    """
+    product = Product.objects.filter(pk=product_id).only('pk', 'image', 'image_variants', 'image_status').first()
+    if product is None:
+        return
+    if not needs_variants(product):
+        if product.image_status in (Product.IMAGE_PENDING, Product.IMAGE_PROCESSING):
+            set_image_status(
+                Product.objects.filter(pk=product.pk),
+                image_status=Product.IMAGE_READY if product.image else Product.IMAGE_NONE,
+            )
+        return
+    set_image_status(Product.objects.filter(pk=product.pk), image_status=Product.IMAGE_PROCESSING)
+    update_product_images(product)
@@ -1,3 +1,1185 @@
+# backend/apps/products/tests.py
+
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common.testing import QueryPlanAssertionsMixin, seed_catalog
+
+
+class ProductQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    EXPLAINs the queries the product/review endpoints actually run and
+    fails when one of them falls back to a full table scan.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_catalog()
+        cls.product = next(p for p in cls.data['products'] if p.is_active)
+        cls.category = cls.data['categories'][0]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_product_list_newest_first(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/shop/products/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_product_list_next_page(self):
+        next_url = self.client.get('/api/v1/shop/products/').json()['next']
+        with self.assertNoFullScans():
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_category_browse_by_price(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/shop/products/', {'category_name': self.category.name, 'ordering': 'price'})
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_search(self):
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/shop/products/', {'search': 'plan product'})
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_product_detail(self):
+        with self.assertNoFullScans():
+            response = self.client.get(f'/api/v1/shop/products/{self.product.pk}/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_my_products(self):
+        self.client.force_authenticate(self.data['seller'])
+        with self.assertNoFullScans():
+            response = self.client.get('/api/v1/shop/products/my-products/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_product_reviews(self):
+        with self.assertNoFullScans():
+            response = self.client.get(f'/api/v1/shop/products/{self.product.pk}/reviews/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_product_reviews_highest_rated(self):
+        with self.assertNoFullScans():
+            response = self.client.get(f'/api/v1/shop/products/{self.product.pk}/reviews/', {'sort': 'highest', 'rating': 5})
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_similar_products(self):
+        from apps.products.recommendations import rebuild_all
+        rebuild_all()
+        with self.assertNoFullScans():
+            response = self.client.get(f'/api/v1/shop/products/{self.product.pk}/similar/')
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def test_autocomplete_refresh(self):
+        from apps.products.autocomplete import Autocomplete
+        index = Autocomplete()
+        index.reload()  # the full load reads every row by design
+        with self.assertNoFullScans():
+            index.refresh()
+
+
+# ===============================================
+#  BEHAVIOUR
+# ===============================================
+class CatalogTestCase(TestCase):
+    """
+    A seller, two buyers and a small category tree; products are made per
+    test with make_product().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.products.models import Category
+        from apps.users.models import User
+        from ecommerce_api.roles import Role
+
+        cls.seller = User.objects.create_user(email='seller@example.com', username='seller', password='pass12345', role=Role.SELLER)
+        cls.buyer = User.objects.create_user(email='buyer@example.com', username='buyer', password='pass12345', role=Role.BUYER)
+        cls.other_buyer = User.objects.create_user(email='buyer2@example.com', username='buyer2', password='pass12345', role=Role.BUYER)
+        cls.electronics = Category.objects.create(name='Electronics', slug='electronics')
+        cls.phones = Category.objects.create(name='Phones', slug='phones', parent=cls.electronics)
+        cls.books = Category.objects.create(name='Books', slug='books')
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+
+    def make_product(self, name='Apple iPhone 15', price='500.00', **fields):
+        from apps.products.models import Product
+        fields.setdefault('category', self.phones)
+        fields.setdefault('stock', 10)
+        fields.setdefault('description', f'{name} description')
+        return Product.objects.create(name=name, price=Decimal(price), seller=self.seller, **fields)
+
+
+class RatingAggregateTests(CatalogTestCase):
+    def reviews_url(self, product):
+        return f'/api/v1/shop/products/{product.pk}/reviews/'
+
+    def assert_aggregates(self, product, count, rating_sum, average, stars):
+        from apps.products.models import RATING_STAR_FIELDS
+        product.refresh_from_db()
+        self.assertEqual(product.review_count, count)
+        self.assertEqual(product.rating_sum, rating_sum)
+        self.assertAlmostEqual(product.average_rating, average)
+        self.assertEqual({star: getattr(product, field) for star, field in RATING_STAR_FIELDS.items()}, stars)
+
+    def test_create_update_delete(self):
+        product = self.make_product()
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post(self.reviews_url(product), {'rating': 5, 'comment': 'Great'})
+        self.assertEqual(response.status_code, 201, response.content)
+        review_id = response.json()['id']
+        self.client.force_authenticate(self.other_buyer)
+        self.client.post(self.reviews_url(product), {'rating': 2})
+        self.assert_aggregates(product, 2, 7, 3.5, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+        self.client.force_authenticate(self.buyer)
+        response = self.client.patch(f'{self.reviews_url(product)}{review_id}/', {'rating': 3})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assert_aggregates(product, 2, 5, 2.5, {1: 0, 2: 1, 3: 1, 4: 0, 5: 0})
+
+        self.assertEqual(self.client.delete(f'{self.reviews_url(product)}{review_id}/').status_code, 204)
+        self.assert_aggregates(product, 1, 2, 2.0, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+
+    def test_rebuild_repairs_drift(self):
+        from apps.products.models import Product, Review
+        from apps.products.ratings import rebuild_rating_aggregates
+        product = self.make_product()
+        Review.objects.create(product=product, user=self.buyer, rating=4)
+        Review.objects.create(product=product, user=self.other_buyer, rating=1)
+        Product.objects.filter(pk=product.pk).update(review_count=9, rating_sum=1, average_rating=0.1)
+        self.assertEqual(rebuild_rating_aggregates([product.pk]), 1)
+        self.assert_aggregates(product, 2, 5, 2.5, {1: 1, 2: 0, 3: 0, 4: 1, 5: 0})
+
+
+class ProductSearchTests(CatalogTestCase):
+    def setUp(self):
+        from apps.products.search import vocabulary
+        super().setUp()
+        vocabulary.invalidate()
+        self.iphone = self.make_product('Apple iPhone 15')
+        self.case = self.make_product('Leather case', description='Fits the Apple iPhone 15')
+        self.novel = self.make_product('Mystery novel', category=self.books)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/v1/shop/products/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_prefix_terms_are_anded(self):
+        self.assertEqual(set(self.search('iph')), {str(self.iphone.pk), str(self.case.pk)})
+        self.assertEqual(self.search('leather iph'), [str(self.case.pk)])
+        self.assertEqual(self.search('books'), [str(self.novel.pk)])  # category name is a keyword
+        self.assertEqual(self.search('tablet'), [])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('iphone'), [str(self.iphone.pk), str(self.case.pk)])
+
+    def test_typo_is_corrected(self):
+        self.assertIn(str(self.iphone.pk), self.search('aple'))
+        self.assertIn(str(self.novel.pk), self.search('mystrey'))
+
+    def test_explicit_ordering_wins_over_rank(self):
+        self.case.price = Decimal('10.00')
+        self.case.save()
+        self.assertEqual(self.search('iphone', ordering='price'), [str(self.case.pk), str(self.iphone.pk)])
+
+    def test_query_without_words_is_not_a_search(self):
+        everything = self.search('')
+        self.assertEqual(len(everything), 3)
+        for query in ('"', '-', '+', '%', '  '):
+            self.assertEqual(self.search(query), everything, query)
+        response = self.client.get('/api/v1/shop/products/facets/', {'search': '"'})
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_only_category_renames_reindex(self):
+        from unittest import mock
+        from apps.products.models import Category
+
+        with mock.patch('apps.products.signals.reindex_queryset') as reindex:
+            # A move (path/depth rewrite) and a plain re-save
+            phones = Category.objects.get(pk=self.phones.pk)
+            phones.parent = self.books
+            phones.save()
+            Category.objects.get(pk=self.books.pk).save()
+            reindex.assert_not_called()
+
+        phones.name = 'Smartphones'
+        phones.save()
+        self.assertEqual(set(self.search('smartph')), {str(self.iphone.pk), str(self.case.pk)})
+        # Saved again under the new name: nothing to reindex
+        with mock.patch('apps.products.signals.reindex_queryset') as reindex:
+            phones.save()
+            reindex.assert_not_called()
+
+
+class KeysetPaginationTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apps.products.models import Product
+        super().setUpTestData()
+        # 30 products (2.5 pages), prices with ties so `id` has to break them
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', description='-', price=Decimal(100 + i % 3), category=cls.phones, seller=cls.seller)
+            for i in range(30)
+        ])
+
+    def walk(self, url, params=None, link='next'):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            data = response.json()
+            pages.append([row['id'] for row in data['results']])
+            if not data[link]:
+                return pages, data
+            response = self.client.get(data[link])
+
+    def test_next_pages_cover_every_row_once(self):
+        from apps.products.models import Product
+        for ordering, order_by in (('', ('-created_at', '-id')), ('price', ('price', 'id')), ('-price', ('-price', '-id'))):
+            pages, _ = self.walk('/api/v1/shop/products/', {'ordering': ordering} if ordering else None)
+            self.assertEqual([len(page) for page in pages], [12, 12, 6])
+            expected = [str(pk) for pk in Product.objects.order_by(*order_by).values_list('pk', flat=True)]
+            self.assertEqual(sum(pages, []), expected, ordering)
+
+    def test_previous_pages_walk_back(self):
+        forward, last = self.walk('/api/v1/shop/products/', {'ordering': 'price'})
+        self.assertIsNone(last['next'])
+        backward, first = self.walk(last['previous'], link='previous')
+        self.assertEqual(backward, forward[-2::-1])
+        self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/v1/shop/products/', {'cursor': 'garbage'}).status_code, 404)
+        # A cursor from another ordering doesn't apply
+        next_url = self.client.get('/api/v1/shop/products/', {'ordering': 'price'}).json()['next']
+        cursor = next_url.split('cursor=')[1].split('&')[0]
+        self.assertEqual(self.client.get('/api/v1/shop/products/', {'cursor': cursor}).status_code, 404)
+
+    def test_page_number_fallback(self):
+        data = self.client.get('/api/v1/shop/products/', {'page': 3}).json()
+        self.assertEqual(data['count'], 30)
+        self.assertEqual(len(data['results']), 6)
+
+
+class CatalogCacheTests(CatalogTestCase):
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_hit_after_miss_and_normalized_query(self):
+        self.make_product()
+        self.assertEqual(self.get('/api/v1/shop/products/', {'ordering': 'price'})['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/api/v1/shop/products/', {'ordering': 'price'})['X-Cache'], 'HIT')
+        # Empty values dropped: same entry
+        self.assertEqual(self.get('/api/v1/shop/products/?ordering=price&search=')['X-Cache'], 'HIT')
+        self.assertEqual(self.get('/api/v1/shop/products/', {'ordering': '-price'})['X-Cache'], 'MISS')
+
+    def test_product_change_invalidates(self):
+        product = self.make_product(price='500.00')
+        url = f'/api/v1/shop/products/{product.pk}/'
+        self.get(url)
+        product.price = Decimal('450.00')
+        product.save()
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(Decimal(response.json()['price']), Decimal('450.00'))
+
+    def test_review_and_category_changes_invalidate(self):
+        product = self.make_product()
+        self.get('/api/v1/shop/products/')
+        self.client.force_authenticate(self.buyer)
+        self.client.post(f'/api/v1/shop/products/{product.pk}/reviews/', {'rating': 4})
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get('/api/v1/shop/products/')['X-Cache'], 'MISS')
+
+        self.get('/api/v1/shop/categories/')
+        self.books.name = 'Novels'
+        self.books.save()
+        response = self.get('/api/v1/shop/categories/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Novels', [row['name'] for row in response.json()['results']])
+
+    def test_delete_invalidates(self):
+        product = self.make_product()
+        self.assertEqual(len(self.get('/api/v1/shop/products/').json()['results']), 1)
+        product.delete()
+        self.assertEqual(self.get('/api/v1/shop/products/').json()['results'], [])
+
+    def test_stats(self):
+        from apps.users.models import User
+        self.get('/api/v1/shop/products/')
+        self.get('/api/v1/shop/products/')
+        self.assertEqual(self.client.get('/api/v1/cache-stats/').status_code, 401)
+        self.client.force_authenticate(User.objects.create_user(email='staff@example.com', username='staff', password=None, is_staff=True))
+        self.assertEqual(self.client.get('/api/v1/cache-stats/').json(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+        self.assertEqual(self.client.delete('/api/v1/cache-stats/').status_code, 204)
+        self.assertEqual(self.client.get('/api/v1/cache-stats/').json()['hits'], 0)
+
+
+class ConditionalGetTests(CatalogTestCase):
+    def test_list_not_modified_until_a_change(self):
+        old = self.make_product('Old phone')
+        self.make_product('New phone')
+        response = self.client.get('/api/v1/shop/products/')
+        etag = response['ETag']
+        # Answered by the probe when the response isn't cached, and from the cached validators
+        from unittest import mock
+        from apps.products.views import ProductViewSet
+        with mock.patch.object(ProductViewSet, 'cache_actions', ()):
+            self.assertEqual(self.client.get('/api/v1/shop/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get('/api/v1/shop/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache']), (304, 'HIT'))
+        # Other query strings have their own ETag
+        self.assertNotEqual(self.client.get('/api/v1/shop/products/', {'ordering': 'price'})['ETag'], etag)
+
+        # Deleting an older row leaves max(updated_at) as it was
+        old.delete()
+        response = self.client.get('/api/v1/shop/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_and_last_modified(self):
+        product = self.make_product()
+        url = f'/api/v1/shop/products/{product.pk}/'
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        product.stock = 3
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_category_change_changes_product_etag(self):
+        product = self.make_product()
+        url = f'/api/v1/shop/products/{product.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.phones.name = 'Mobiles'
+        self.phones.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category']['name'], 'Mobiles')
+
+    def test_missing_product_has_no_validators(self):
+        response = self.client.get('/api/v1/shop/products/not-a-uuid/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class FacetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_product('Budget phone', price='999.00', average_rating=4.5)
+        self.make_product('Midrange phone', price='1000.00', average_rating=3.2)
+        self.make_product('Flagship phone', price='12000.00', average_rating=2.0)
+        self.make_product('Cookbook', price='450.00', category=self.books, average_rating=4.0)
+        self.make_product('Hidden phone', price='500.00', is_active=False)
+
+    def facets(self, **params):
+        response = self.client.get('/api/v1/shop/products/facets/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return (
+            data['total'],
+            {row['name']: row['count'] for row in data['categories']},
+            [row['count'] for row in data['price']],
+            {row['min_rating']: row['count'] for row in data['rating']},
+        )
+
+    def test_unfiltered(self):
+        total, categories, price, rating = self.facets()
+        self.assertEqual(total, 4)
+        self.assertEqual(categories, {'Phones': 3, 'Books': 1})
+        # Bounds are inclusive on both sides, like min_price / max_price
+        self.assertEqual(price, [3, 1, 0, 1])
+        self.assertEqual(rating, {4: 2, 3: 3, 2: 4, 1: 4})
+
+    def test_own_filter_is_left_out(self):
+        total, categories, price, rating = self.facets(category_name='Phones', min_price=1000)
+        self.assertEqual(total, 2)
+        # Categories ignore category_name, but keep the price filter
+        self.assertEqual(categories, {'Phones': 2})
+        # Prices ignore min_price, but keep the category filter
+        self.assertEqual(price, [2, 1, 0, 1])
+        self.assertEqual(rating, {4: 0, 3: 1, 2: 2, 1: 2})
+
+    def test_search_and_invalid_filter(self):
+        total, categories, _, _ = self.facets(search='phone')
+        self.assertEqual((total, categories), (3, {'Phones': 3}))
+        response = self.client.get('/api/v1/shop/products/facets/', {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CategorySubtreeTests(CatalogTestCase):
+    def products(self, **params):
+        response = self.client.get('/api/v1/shop/products/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['name'] for row in response.json()['results']}
+
+    def test_subtree_filter(self):
+        from apps.products.models import Category
+        android = Category.objects.create(name='Android', slug='android', parent=self.phones)
+        self.make_product('Laptop', category=self.electronics)
+        self.make_product('iPhone')
+        self.make_product('Pixel', category=android)
+        self.make_product('Novel', category=self.books)
+
+        self.assertEqual(self.products(category='electronics'), {'Laptop'})
+        self.assertEqual(self.products(category='electronics', include_descendants=1), {'Laptop', 'iPhone', 'Pixel'})
+        self.assertEqual(self.products(category='phones', include_descendants=1), {'iPhone', 'Pixel'})
+        self.assertEqual(self.products(category='unknown', include_descendants=1), set())
+
+        # Moving a subtree rewrites the descendants' paths
+        self.phones.parent = self.books
+        self.phones.save()
+        self.assertEqual(self.products(category='books', include_descendants=1), {'Novel', 'iPhone', 'Pixel'})
+        self.assertEqual(self.products(category='electronics', include_descendants=1), {'Laptop'})
+        android.refresh_from_db()
+        self.assertEqual(android.depth, 2)
+
+    def test_tree_endpoints_and_cycles(self):
+        tree = self.client.get('/api/v1/shop/categories/tree/').json()['results']
+        self.assertEqual([root['name'] for root in tree], ['Books', 'Electronics'])
+        self.assertEqual([child['name'] for child in tree[1]['children']], ['Phones'])
+        flat = self.client.get('/api/v1/shop/categories/').json()['results']
+        self.assertEqual([(row['name'], row['depth']) for row in flat], [('Books', 0), ('Electronics', 0), ('Phones', 1)])
+
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(f'/api/v1/shop/categories/{self.electronics.pk}/', {'parent': str(self.phones.pk)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.json())
+
+
+class SparseFieldsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product(sale_price=Decimal('450.00'))
+
+    def get(self, url, **params):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        sql = '\n'.join(query['sql'] for query in queries.captured_queries if 'FROM "products_product"' in query['sql'])
+        return response, sql
+
+    def test_list_fields(self):
+        response, sql = self.get('/api/v1/shop/products/', fields='id,name,discount_percent')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['results'], [{'id': str(self.product.pk), 'name': self.product.name, 'discount_percent': 10}])
+        # Only the columns behind the chosen fields are read
+        self.assertNotIn('"products_product"."description"', sql)
+        self.assertNotIn('JOIN "products_category"', sql)
+
+    def test_detail_nested_fields_and_exclude(self):
+        url = f'/api/v1/shop/products/{self.product.pk}/'
+        response, _ = self.get(url, fields='name,category.slug')
+        self.assertEqual(response.json(), {'name': self.product.name, 'category': {'slug': 'phones'}})
+
+        response, sql = self.get(url, exclude='description,seller,reviews,created_by,updated_by')
+        data = response.json()
+        self.assertNotIn('description', data)
+        self.assertNotIn('seller', data)
+        self.assertIn('reviews_url', data)
+        self.assertNotIn('"products_product"."description"', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({'fields': 'id,colour'}, {'exclude': 'category.colour'}, {'fields': 'name.first'}):
+            response, _ = self.get('/api/v1/shop/products/', **params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('fields', response.json())
+        response, _ = self.get('/api/v1/shop/products/', fields='id,colour')
+        self.assertEqual(response.json()['fields'], 'Unknown field(s): colour')
+
+    def test_next_page_with_fields(self):
+        for i in range(13):
+            self.make_product(f'Phone {i}')
+        response, _ = self.get('/api/v1/shop/products/', fields='id', ordering='price')
+        data = self.client.get(response.json()['next']).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(set(data['results'][0]), {'id'})
+
+
+class CompiledListTests(CatalogTestCase):
+    """
+    The compiled values_list() path must render exactly what the regular
+    serializers render.
+    """
+
+    def setUp(self):
+        from apps.products.models import Review
+        super().setUp()
+        self.product = self.make_product(sale_price=Decimal('450.00'), image='products/ab/' + 'ab' * 32 + '.jpg')
+        self.make_product('Uncategorized', category=None)
+        self.make_product('Retired', is_active=False)
+        Review.objects.create(product=self.product, user=self.buyer, rating=4, comment='Good')
+        Review.objects.create(product=self.product, user=self.other_buyer, rating=2)
+
+    def assert_same_output(self, view_class, url, **params):
+        from unittest import mock
+        from django.core.cache import cache
+        compiled = self.client.get(url, params)
+        self.assertEqual(compiled.status_code, 200, compiled.content)
+        cache.clear()
+        with mock.patch.object(view_class, 'compiled_actions', ()):
+            regular = self.client.get(url, params)
+        self.assertEqual(compiled.json(), regular.json())
+        self.assertTrue(compiled.json()['results'])
+
+    def test_product_lists(self):
+        from apps.common.compiled import compile_serializer
+        from apps.products.models import Product
+        from apps.products.serializers import ProductListSerializer
+        from apps.products.views import ProductViewSet
+        self.assertIsNotNone(compile_serializer(ProductListSerializer(), Product))
+        self.assert_same_output(ProductViewSet, '/api/v1/shop/products/')
+        self.assert_same_output(ProductViewSet, '/api/v1/shop/products/', ordering='price', fields='id,category.name,images')
+        self.client.force_authenticate(self.seller)
+        self.assert_same_output(ProductViewSet, '/api/v1/shop/products/my-products/')
+
+    def test_review_list(self):
+        from apps.products.views import ReviewViewSet
+        self.assert_same_output(ReviewViewSet, f'/api/v1/shop/products/{self.product.pk}/reviews/', sort='highest')
+
+    def test_compiled_serializers_are_bounded(self):
+        from collections import OrderedDict
+        from unittest import mock
+        from apps.common import compiled
+
+        selections = ['id', 'id,name', 'id,price', 'name,price', 'id']
+        with mock.patch.object(compiled, 'MAX_COMPILED', 2), mock.patch.object(compiled, '_compiled', OrderedDict()):
+            for fields in selections:
+                response = self.client.get('/api/v1/shop/products/', {'fields': fields})
+                self.assertEqual(set(response.json()['results'][0]), set(fields.split(',')))
+                self.assertLessEqual(len(compiled._compiled), 2)
+
+
+class ReviewListTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apps.products.models import Product, Review
+        from apps.products.ratings import rebuild_rating_aggregates
+        from apps.users.models import User
+        super().setUpTestData()
+        cls.product = Product.objects.create(name='Reviewed phone', description='-', price=Decimal('300.00'), category=cls.phones, seller=cls.seller)
+        cls.ratings = [5, 3, 1, 4, 5, 2, 4]
+        reviews = Review.objects.bulk_create([
+            Review(
+                product=cls.product, rating=rating, comment=f'Review {i}',
+                user=User.objects.create_user(email=f'reviewer{i}@example.com', username=f'reviewer{i}', password=None),
+            )
+            for i, rating in enumerate(cls.ratings)
+        ])
+        # One minute apart, so "newest" has no ties
+        start = timezone.now() - timedelta(hours=1)
+        for i, review in enumerate(reviews):
+            Review.objects.filter(pk=review.pk).update(created_at=start + timedelta(minutes=i))
+        rebuild_rating_aggregates([cls.product.pk])
+
+    def reviews(self, **params):
+        response = self.client.get(f'/api/v1/shop/products/{self.product.pk}/reviews/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, **params):
+        data = self.reviews(**params)
+        comments = [row['comment'] for row in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            comments += [row['comment'] for row in data['results']]
+        return comments
+
+    def test_detail_embeds_latest_reviews(self):
+        from apps.products.serializers import EMBEDDED_REVIEWS
+        data = self.client.get(f'/api/v1/shop/products/{self.product.pk}/').json()
+        self.assertEqual([row['comment'] for row in data['reviews']], [f'Review {i}' for i in range(6, 6 - EMBEDDED_REVIEWS, -1)])
+        self.assertEqual(set(data['reviews'][0]['user']), {'id', 'username', 'first_name'})
+        self.assertEqual(data['review_count'], 7)
+        self.assertEqual(data['rating_histogram'], {'1': 1, '2': 1, '3': 1, '4': 2, '5': 2})
+        self.assertTrue(data['reviews_url'].endswith(f'/api/v1/shop/products/{self.product.pk}/reviews/'))
+
+    def test_sort_modes(self):
+        newest = [f'Review {i}' for i in range(6, -1, -1)]
+        self.assertEqual(self.walk(), newest)
+        self.assertEqual(self.walk(sort='unknown'), newest)
+        by_rating = sorted(range(7), key=lambda i: (-self.ratings[i], -i))
+        self.assertEqual(self.walk(sort='highest'), [f'Review {i}' for i in by_rating])
+        by_rating = sorted(range(7), key=lambda i: (self.ratings[i], -i))
+        self.assertEqual(self.walk(sort='lowest'), [f'Review {i}' for i in by_rating])
+
+    def test_paging_rating_filter_and_summary(self):
+        from apps.common.pagination import KeysetPagination
+        from unittest import mock
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            self.assertEqual(self.walk(sort='highest'), ['Review 4', 'Review 0', 'Review 6', 'Review 3', 'Review 1', 'Review 5', 'Review 2'])
+            data = self.reviews(rating=4)
+        self.assertEqual([row['rating'] for row in data['results']], [4, 4])
+        self.assertEqual(data['summary'], {
+            'average_rating': 24 / 7, 'review_count': 7,
+            'histogram': {'1': 1, '2': 1, '3': 1, '4': 2, '5': 2},
+        })
+
+    def test_unknown_product(self):
+        self.assertEqual(self.client.get('/api/v1/shop/products/00000000-0000-0000-0000-000000000000/reviews/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/shop/products/nope/reviews/').status_code, 404)
+
+
+class ReviewImportTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product()
+
+    def import_reviews(self, lines, *args):
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as file:
+            file.write('\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines))
+        self.addCleanup(os.remove, file.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_reviews', file.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def rows(self):
+        product = str(self.product.pk)
+        return [
+            {'product_id': product, 'user_id': self.buyer.pk, 'rating': 5, 'comment': 'Old review', 'created_at': '2019-05-01T10:00:00Z'},
+            {'product_id': product, 'user_email': 'BUYER2@example.com', 'rating': 2},
+            {'product_id': product, 'user_id': self.buyer.pk, 'rating': 6},
+            {'product_id': '00000000-0000-0000-0000-000000000000', 'user_id': self.buyer.pk, 'rating': 4},
+            {'product_id': product, 'user_email': 'nobody@example.com', 'rating': 4},
+            {'product_id': product, 'rating': 4},
+            '{not json',
+        ]
+
+    def test_import_with_invalid_rows(self):
+        from apps.products.models import Review
+        out, err = self.import_reviews(self.rows(), '--batch-size', '3')
+        self.assertIn('read=7, created=2, updated=0, skipped=0, invalid=5', out)
+        for line in (3, 4, 5, 6, 7):
+            self.assertIn(f'line {line}:', err)
+
+        review = Review.objects.get(user=self.buyer)
+        self.assertEqual((review.rating, review.created_at.year), (5, 2019))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.review_count, self.product.rating_sum, self.product.rating_5_count), (2, 7, 1))
+
+    def test_conflicts_skip_or_update(self):
+        from apps.products.models import Review
+        Review.objects.create(product=self.product, user=self.buyer, rating=1)
+        row = {'product_id': str(self.product.pk), 'user_id': self.buyer.pk, 'rating': 4}
+        out, _ = self.import_reviews([row])
+        self.assertIn('created=0, updated=0, skipped=1', out)
+        self.assertEqual(Review.objects.get().rating, 1)
+        out, _ = self.import_reviews([row], '--on-conflict', 'update')
+        self.assertIn('created=0, updated=1, skipped=0', out)
+        self.assertEqual(Review.objects.get().rating, 4)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.average_rating, 4)
+
+    def test_dry_run_writes_nothing(self):
+        from apps.products.models import Review
+        out, _ = self.import_reviews(self.rows(), '--dry-run')
+        self.assertIn('Dry run: read=7, created=2', out)
+        self.assertFalse(Review.objects.exists())
+
+
+class ProductImportTests(CatalogTestCase):
+    def upload(self, content, name='catalog.csv', **params):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.client.force_authenticate(self.seller)
+        url = '/api/v1/shop/products/import/' + ('?dry_run=1' if params.get('dry_run') else '')
+        return self.client.post(url, {'file': SimpleUploadedFile(name, content.encode('utf-8'))}, format='multipart')
+
+    def test_create_then_update_present_columns(self):
+        from apps.products.models import Product
+        response = self.upload(
+            'sku,name,description,price,sale_price,category,stock\n'
+            'SKU-1,Pixel 9,Google phone,699.00,,phones,5\n'
+            'SKU-2,Kindle,E-reader,99.00,89.00,books,7\n'
+            'SKU-3,Broken,No price,,,phones,1\n'
+            'SKU-4,Lost,Unknown category,10.00,,tablets,1\n'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual((data['created'], data['updated'], data['invalid']), (2, 0, 2))
+        self.assertEqual([error['line'] for error in data['errors']], [4, 5])
+        self.assertIn('price', data['errors'][0]['error'])
+        self.assertEqual(data['errors'][1]['error'], 'Unknown category tablets')
+        pixel = Product.objects.get(sku='SKU-1')
+        self.assertEqual((pixel.seller, pixel.created_by, pixel.category, pixel.stock), (self.seller, self.seller, self.phones, 5))
+
+        # Only the given columns change; new products are searchable right away
+        response = self.upload(
+            'sku,name,description,price,category,stock\n'
+            'SKU-1,Pixel 9,Google phone,649.00,phones,2\n'
+        )
+        self.assertEqual(response.json()['updated'], 1)
+        kindle = Product.objects.get(sku='SKU-2')
+        self.assertEqual(kindle.sale_price, Decimal('89.00'))
+        pixel.refresh_from_db()
+        self.assertEqual((pixel.price, pixel.stock), (Decimal('649.00'), 2))
+        self.client.force_authenticate(None)
+        names = [row['name'] for row in self.client.get('/api/v1/shop/products/', {'search': 'kindle'}).json()['results']]
+        self.assertEqual(names, ['Kindle'])
+
+    def test_jsonl_dry_run(self):
+        from apps.products.models import Product
+        response = self.upload(
+            '{"sku": "J-1", "name": "Tablet", "description": "-", "price": "300", "category": "electronics"}\n'
+            'not json\n',
+            name='catalog.jsonl', dry_run=True,
+        )
+        data = response.json()
+        self.assertEqual((data['dry_run'], data['created'], data['invalid']), (True, 1, 1))
+        self.assertFalse(Product.objects.exists())
+
+    def test_rejected_requests(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.post('/api/v1/shop/products/import/', {}, format='multipart').status_code, 403)
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.post('/api/v1/shop/products/import/', {}, format='multipart').status_code, 400)
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        response = self.client.post(
+            '/api/v1/shop/products/import/', {'file': SimpleUploadedFile('catalog.xml', b'<xml/>'), 'format': 'xml'},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('format', response.json())
+
+
+class ProductExportTests(CatalogTestCase):
+    def export(self, **params):
+        self.client.force_authenticate(self.seller)
+        response = self.client.get('/api/v1/shop/products/my-products/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_and_jsonl(self):
+        import csv
+        import json
+        first = self.make_product('Pixel, 9', sku='SKU-1', sale_price=Decimal('9.99'))
+        self.make_product('Retired', is_active=False, category=None)
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.csv"')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual([row['name'] for row in rows], ['Pixel, 9', 'Retired'])
+        self.assertEqual((rows[0]['id'], rows[0]['sku'], rows[0]['category'], rows[0]['sale_price']), (str(first.pk), 'SKU-1', 'phones', '9.99'))
+        self.assertEqual((rows[1]['category'], rows[1]['sku'], rows[1]['is_active']), ('', '', 'False'))
+
+        response, content = self.export(file_format='jsonl')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows[1]['category'], None)
+        self.assertEqual(rows[0]['price'], '500.00')
+
+    def test_only_own_products_and_permissions(self):
+        from apps.products.models import Product
+        Product.objects.create(name='Not mine', description='-', price=1, seller=self.buyer)
+        self.make_product('Mine')
+        _, content = self.export()
+        self.assertEqual(len(content.splitlines()), 2)
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.get('/api/v1/shop/products/my-products/export/', {'file_format': 'xls'}).status_code, 400)
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get('/api/v1/shop/products/my-products/export/').status_code, 403)
+
+    def test_rows_are_read_in_keyset_chunks(self):
+        from apps.common.export import iterate_rows
+        from apps.products.models import Product
+        for i in range(7):
+            self.make_product(f'Product {i}')
+        rows = list(iterate_rows(Product.objects.all(), ['name'], chunk_size=2))
+        self.assertEqual(rows, [(f'Product {i}',) for i in range(7)])
+
+
+class ImageTestCase(CatalogTestCase):
+    """
+    Uploads and derivatives go to a throwaway MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def image_file(self, size=(800, 400), mode='RGBA', name='photo.png', image_format='PNG'):
+        from io import BytesIO
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ImageVariantTests(ImageTestCase):
+    """
+    The worker is not running here, so update_product_images() is called directly.
+    """
+
+    def test_variants_are_built(self):
+        from django.core.files.storage import default_storage
+        from apps.products.images import update_product_images
+        from apps.products.models import Product
+
+        product = self.make_product(image=self.image_file())
+        self.assertEqual(Product.objects.get(pk=product.pk).image_status, Product.IMAGE_PENDING)
+        variants = update_product_images(product)
+
+        self.assertEqual((variants['width'], variants['height']), (800, 400))
+        self.assertEqual([(v['width'], v['height']) for v in variants['variants']], [(160, 80), (320, 160), (640, 320)])
+        for variant in variants['variants']:
+            self.assertTrue(variant['webp'].endswith(f"{variants['hash'][:40]}-{variant['width']}w.webp"))
+            self.assertTrue(default_storage.exists(variant['jpeg']))
+            self.assertTrue(default_storage.exists(variant['webp']))
+        product.refresh_from_db()
+        self.assertEqual((product.image_status, product.image_variants), (Product.IMAGE_READY, variants))
+
+        card = self.client.get('/api/v1/shop/products/').json()['results'][0]['images']
+        self.assertEqual(card['width'], 320)
+        self.assertEqual([part.rsplit(' ', 1)[1] for part in card['srcset'].split(', ')], ['160w', '320w'])
+        self.assertIn('-160w.webp 160w', card['webp_srcset'])
+        detail = self.client.get(f'/api/v1/shop/products/{product.pk}/').json()
+        self.assertEqual((detail['image_status'], detail['images']['width']), ('ready', 640))
+
+    def test_small_image_is_not_upscaled(self):
+        from apps.products.images import update_product_images
+
+        product = self.make_product(image=self.image_file(size=(100, 50), mode='RGB', name='tiny.jpg', image_format='JPEG'))
+        variants = update_product_images(product)
+        self.assertEqual([v['width'] for v in variants['variants']], [100])
+        # No LIST_WIDTHS variant: the only one is used
+        card = self.client.get('/api/v1/shop/products/').json()['results'][0]['images']
+        self.assertEqual(card['width'], 100)
+
+    def test_same_photo_is_resized_once(self):
+        from unittest import mock
+        from apps.products import images
+
+        first = self.make_product(image=self.image_file())
+        second = self.make_product(name='Apple iPhone 15 Pro', image=self.image_file(name='copy.png'))
+        self.assertEqual(first.image.name, second.image.name)
+        first_variants = images.update_product_images(first)
+        with mock.patch.object(images, 'encode', wraps=images.encode) as encode:
+            second_variants = images.update_product_images(second)
+        encode.assert_not_called()
+        self.assertEqual(first_variants['variants'], second_variants['variants'])
+
+    def test_unreadable_image_fails(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.products.images import update_product_images
+        from apps.products.models import Product
+
+        product = self.make_product(image=SimpleUploadedFile('broken.jpg', b'not an image'))
+        variants = update_product_images(product)
+        self.assertEqual(variants['variants'], [])
+        self.assertIn('Unreadable image', variants['error'])
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_FAILED)
+        self.assertIsNone(self.client.get('/api/v1/shop/products/').json()['results'][0]['images'])
+
+    def test_removing_the_image_clears_variants(self):
+        from apps.products.images import update_product_images
+        from apps.products.models import Product
+
+        product = self.make_product(image=self.image_file())
+        update_product_images(product)
+        product.image = None
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual((product.image_status, product.image_variants), (Product.IMAGE_NONE, {}))
+
+
+class ImageJobTests(ImageTestCase):
+    """
+    The queued build_image_variants job, run by a burst Worker.
+    """
+
+    def run_jobs(self):
+        from apps.common.jobs import Worker
+        from apps.common.models import Job
+
+        # Retries are scheduled in the future; make them due right away
+        Job.objects.filter(status=Job.QUEUED).update(run_at=timezone.now())
+        return Worker(name='test').run(burst=True)
+
+    def test_upload_is_processed_by_the_worker(self):
+        from apps.common.models import Job
+        from apps.products.models import Product
+
+        product = self.make_product(image=self.image_file())
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.payload), ('products.build_image_variants', {'product_id': str(product.pk)}))
+        self.assertEqual(self.run_jobs(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_READY)
+        self.assertEqual(len(product.image_variants['variants']), 3)
+        self.assertFalse(Job.objects.exists())
+
+    def test_detail_etag_changes_with_the_image_status(self):
+        product = self.make_product(image=self.image_file())
+        url = f'/api/v1/shop/products/{product.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.json()['image_status'], 'pending')
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.run_jobs()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['image_status'], 'ready')
+        self.assertEqual(response.json()['images']['width'], 640)
+
+    def test_storage_errors_are_retried_then_dead_lettered(self):
+        from unittest import mock
+        from apps.common.models import Job
+        from apps.products.models import Product
+
+        product = self.make_product(image=self.image_file())
+        with mock.patch('apps.products.tasks.update_product_images', side_effect=OSError('disk full')):
+            self.run_jobs()
+            job = Job.objects.get()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+            self.assertGreater(job.run_at, timezone.now())
+            self.assertIn('disk full', job.last_error)
+            product.refresh_from_db()
+            self.assertEqual(product.image_status, Product.IMAGE_PROCESSING)
+
+            self.run_jobs()
+            self.run_jobs()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_FAILED)
+        self.assertEqual(product.image_variants, {'source': product.image.name, 'error': 'OSError: disk full', 'variants': []})
+        self.assertEqual(self.client.get(f'/api/v1/shop/products/{product.pk}/').json()['image_status'], 'failed')
+        # A failed job is not picked up again
+        self.assertEqual(self.run_jobs(), 0)
+
+    def test_expired_lock_on_last_attempt_is_dead_lettered(self):
+        from apps.common.jobs import Worker
+        from apps.common.models import Job
+        from apps.products.models import Product
+
+        product = self.make_product(image=self.image_file())
+        Product.objects.filter(pk=product.pk).update(image_status=Product.IMAGE_PROCESSING)
+        Job.objects.update(status=Job.RUNNING, attempts=3, locked_by='dead', locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(Worker(name='test').run(burst=True), 0)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, Product.IMAGE_FAILED)
+        self.assertIn('Visibility timeout', product.image_variants['error'])
+
+    def test_replaced_image_is_not_marked_failed(self):
+        from apps.common.models import Job
+        from apps.products.images import update_product_images
+        from apps.products.tasks import image_job_failed
+
+        product = self.make_product(image=self.image_file())
+        job = Job.objects.get()
+        update_product_images(product)
+        job.last_error = 'OSError: disk full'
+        image_job_failed(job)
+        product.refresh_from_db()
+        self.assertEqual(product.image_status, 'ready')
+
+
+class RecommendationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.phone = self.make_product('Apple iPhone 15')
+        self.case = self.make_product('iPhone Case', price='10.00')
+        self.charger = self.make_product('USB Charger', price='20.00')
+        self.book = self.make_product('Phone Photography', price='15.00', category=self.books)
+
+    def order(self, user, *products):
+        from apps.orders.models import Order, OrderItem
+
+        order = Order.objects.create(user=user, total_amount=sum(product.price for product in products))
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price_at_purchase=product.price)
+        return order
+
+    def similar(self, product, **params):
+        response = self.client.get(f'/api/v1/shop/products/{product.pk}/similar/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()['results']]
+
+    def test_rebuild_and_similar(self):
+        from apps.products.models import SimilarProduct
+        from apps.products.recommendations import rebuild_all
+        from apps.wishlist.models import WishlistItem
+
+        self.order(self.buyer, self.phone, self.case)
+        self.order(self.other_buyer, self.phone, self.case, self.charger)
+        WishlistItem.objects.create(user=self.buyer, product=self.phone)
+        WishlistItem.objects.create(user=self.buyer, product=self.book)
+
+        self.assertEqual(self.similar(self.phone), [])
+        self.assertEqual(rebuild_all(), 4)
+        self.assertEqual(
+            list(SimilarProduct.objects.filter(product=self.phone).order_by('-score')
+                 .values_list('similar__name', 'score', 'bought_together', 'wishlisted_together')),
+            [('iPhone Case', 2.0, 2, 0), ('USB Charger', 1.0, 1, 0), ('Phone Photography', 0.5, 0, 1)],
+        )
+        # The cached empty answer is invalidated by the rebuild
+        self.assertEqual(self.similar(self.phone), ['iPhone Case', 'USB Charger', 'Phone Photography'])
+        self.assertEqual(self.similar(self.phone, limit=1), ['iPhone Case'])
+        self.assertEqual(self.similar(self.book), ['Apple iPhone 15'])
+
+    def test_inactive_neighbours_and_unknown_products(self):
+        import uuid
+        from apps.products.recommendations import rebuild_all
+
+        self.order(self.buyer, self.phone, self.case, self.charger)
+        self.case.is_active = False
+        self.case.save()
+        rebuild_all()
+        self.assertEqual(self.similar(self.phone), ['USB Charger'])
+        for pk in (self.case.pk, uuid.uuid4(), 'not-a-uuid'):
+            self.assertEqual(self.client.get(f'/api/v1/shop/products/{pk}/similar/').status_code, 404)
+
+    def test_refresh_recounts_new_orders_only(self):
+        from apps.orders.models import OrderItem
+        from apps.products.models import RecommendationState, SimilarProduct
+        from apps.products.recommendations import refresh
+
+        self.order(self.buyer, self.phone, self.case)
+        # First run: full rebuild
+        self.assertEqual(refresh(), 2)
+        OrderItem.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        RecommendationState.objects.update(
+            orders_until=timezone.now() - timedelta(hours=1), wishlists_until=timezone.now() - timedelta(hours=1),
+        )
+
+        recent = self.order(self.other_buyer, self.charger, self.phone)
+        in_flight = self.order(self.other_buyer, self.book, self.case)
+        OrderItem.objects.filter(order=recent).update(created_at=timezone.now() - timedelta(minutes=30))
+        # in_flight is newer than REFRESH_LAG: left for the next run
+        self.assertEqual(refresh(), 2)
+        # Recounted over all of the phone's orders, old and new (tied scores)
+        self.assertCountEqual(self.similar(self.phone), ['iPhone Case', 'USB Charger'])
+        self.assertEqual(self.similar(self.charger), ['Apple iPhone 15'])
+        self.assertFalse(SimilarProduct.objects.filter(product=self.book).exists())
+        self.assertTrue(in_flight.items.exists())
+
+
+class AutocompleteTests(CatalogTestCase):
+    def setUp(self):
+        from apps.products.autocomplete import autocomplete
+
+        super().setUp()
+        self.index = autocomplete
+        # The index is per process: start every test from a fresh load
+        self.index.loaded_at = None
+        self.iphone = self.make_product('Apple iPhone 15 (Blue)', review_count=2)
+        self.pro = self.make_product('Apple iPhone 15 Pro', review_count=9)
+        self.watch = self.make_product('Apple Watch', category=self.electronics)
+        self.make_product('Hidden Apple', is_active=False)
+
+    def suggest(self, q, **params):
+        response = self.client.get('/api/v1/shop/products/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def names(self, q, **params):
+        return [item['name'] for item in self.suggest(q, **params)['products']]
+
+    def test_prefixes_and_popularity(self):
+        self.assertEqual(self.names('app'), ['Apple iPhone 15 Pro', 'Apple iPhone 15 (Blue)', 'Apple Watch'])
+        self.assertEqual(self.names('IPH'), ['Apple iPhone 15 Pro', 'Apple iPhone 15 (Blue)'])
+        self.assertEqual(self.names('15 b'), ['Apple iPhone 15 (Blue)'])
+        self.assertEqual(self.names('app', limit=1), ['Apple iPhone 15 Pro'])
+        self.assertEqual(self.names('blue'), [])  # fourth word: not indexed
+        data = self.suggest('pho')
+        self.assertEqual(data['categories'], [{'id': str(self.phones.pk), 'name': 'Phones', 'slug': 'phones'}])
+        self.assertEqual(self.suggest('  '), {'query': '  ', 'products': [], 'categories': []})
+
+    def test_warm_lookups_skip_the_database(self):
+        self.names('app')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('watch'), ['Apple Watch'])
+
+    def test_refresh_patches_changes_in(self):
+        import time
+
+        self.names('app')
+        self.make_product('Apple iPad', review_count=20)
+        self.watch.name = 'Smart Watch'
+        self.watch.save()
+        self.pro.is_active = False
+        self.pro.save()
+        # Still within refresh_interval: the loaded arrays answer
+        self.assertEqual(self.names('app'), ['Apple iPhone 15 Pro', 'Apple iPhone 15 (Blue)', 'Apple Watch'])
+
+        self.index.checked_at = time.monotonic() - self.index.refresh_interval
+        self.assertEqual(self.names('app'), ['Apple iPad', 'Apple iPhone 15 (Blue)'])
+        self.assertEqual(self.names('sma'), ['Smart Watch'])
+
+    def test_deleted_rows_are_forgotten(self):
+        self.names('app')
+        self.watch.delete()
+        self.books.delete()
+        self.assertEqual(self.names('watch'), [])
+        self.assertEqual(self.suggest('boo')['categories'], [])
+
+
+class DedupeMediaTests(ImageTestCase):
+    def write_media(self, name, content):
+        import os
+        from django.conf import settings
+
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+    def test_renames_shared_files_and_changes_detail_etags(self):
+        import os
+        from io import StringIO
+        from django.conf import settings
+        from django.core.management import call_command
+        from apps.products.models import Product
+
+        content = self.image_file().read()
+        products = [self.make_product(), self.make_product('Apple iPhone 15 Pro')]
+        for index, product in enumerate(products):
+            name = f'products/upload-{index}.png'
+            self.write_media(name, content)
+            Product.objects.filter(pk=product.pk).update(image=name)
+        url = f'/api/v1/shop/products/{products[0].pk}/'
+        etag = self.client.get(url)['ETag']
+
+        call_command('dedupe_media', stdout=StringIO())
+        names = set(Product.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertRegex(name, r'^products/([0-9a-f]{2})/\1[0-9a-f]{62}\.png$')
+        # One file kept, the two originals deleted
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'products')), [name.split('/')[1]])
 
-# Create your tests here.
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['image'].endswith(name))
@@ -0,0 +1,44 @@
+# backend/apps/products/tree.py
+"""
+Builds the category tree for the category endpoints from a single query.
+Rows come ordered by Category.path, so every parent precedes its children.
+"""
+
+from .models import Category
+
+NODE_FIELDS = ('id', 'name', 'slug', 'parent', 'depth')
+
+
+def category_rows(queryset=None):
+    queryset = Category.objects.all() if queryset is None else queryset
+    return list(queryset.order_by('path').values(*NODE_FIELDS))
+
+
+def build_tree(rows):
+    """
+    Nested [{..., 'children': [...]}] roots, siblings sorted by name.
+    """
+    nodes = {row['id']: {**row, 'children': []} for row in rows}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent'])
+        # A parent outside `rows` (filtered queryset) makes the node a root
+        (parent['children'] if parent else roots).append(node)
+    for node in nodes.values():
+        node['children'].sort(key=lambda child: child['name'].lower())
+    roots.sort(key=lambda root: root['name'].lower())
+    return roots
+
+
+def flatten_tree(roots):
+    """
+    Depth-first list of the nodes without `children`, so a parent is
+    directly followed by its subtree (indent with `depth`).
+    """
+    flat = []
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        flat.append({key: value for key, value in node.items() if key != 'children'})
+        stack.extend(reversed(node['children']))
+    return flat
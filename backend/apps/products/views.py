@@ -2,9 +2,14 @@
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from functools import partial
+import io
 
-from .models import Category, Product, Review
+from .models import RATING_STAR_FIELDS, Category, Product, Review
 from .serializers import (
     CategorySerializer, 
     ProductListSerializer, 
@@ -12,39 +17,89 @@ from .serializers import (
     ProductWriteSerializer,
     ReviewSerializer
 )
+from apps.common.cache import CachedResponseMixin
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.pagination import KeysetPagination
+from apps.common.sparse import SparseFieldsMixin
+from apps.common.compiled import CompiledListMixin
+from apps.common.bulk import FORMATS, guess_format
+from apps.common.export import export_response
 from ecommerce_api.permissions import IsSeller, IsOwnerOrReadOnly, IsBuyer # Assuming this path is correct
-from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from .filters import ProductFilter # Apni nayi filter class ko import karein
+from .filters import ProductFilter, ProductSearchFilter, RankedOrderingFilter, ReviewFilter, ReviewSortFilter # Apni nayi filter class ko import karein
+from .ratings import apply_review_change
+from .product_import import ProductImporter
+from .recommendations import TOP_K, similar_product_ids
+from .autocomplete import autocomplete as autocomplete_index
+from .facets import ProductFacets
+from .tree import build_tree, category_rows, flatten_tree
 # ===============================================
 #  CATEGORY VIEWSET
 # ===============================================
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for categories.
     - Anyone can view.
     - Only Admins (or authenticated staff) can create/edit.
+    - list returns every category (no pagination) in tree order with `depth`;
+      /categories/tree/ returns the same nodes nested under `children`.
+    - list/retrieve/tree responses are cached until a category changes,
+      and answer If-None-Match / If-Modified-Since with 304.
     """
     queryset = Category.objects.all() # Show all categories for selection
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    cache_dependencies = ('products.category',)
+    cache_actions = ('list', 'retrieve', 'tree')
+    conditional_actions = ('list', 'retrieve', 'tree')
+
+    def list(self, request, *args, **kwargs):
+        handler = partial(self.conditional_response, self.list_response)
+        return self.cached_response(handler, request, *args, **kwargs)
+
+    def list_response(self, request, *args, **kwargs):
+        nodes = flatten_tree(build_tree(category_rows(self.filter_queryset(self.get_queryset()))))
+        return Response({'count': len(nodes), 'results': nodes})
+
+    # --- /categories/tree/ : the full nested tree in one query ---
+    @action(detail=False, methods=['GET'])
+    def tree(self, request):
+        handler = partial(self.conditional_response, self.tree_response)
+        return self.cached_response(handler, request)
+
+    def tree_response(self, request):
+        rows = category_rows(self.filter_queryset(self.get_queryset()))
+        return Response({'count': len(rows), 'results': build_tree(rows)})
 
 
 # ===============================================
 #  PRODUCT VIEWSET (UPDATED)
 # ===============================================
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     API endpoint for products.
     Manages different serializers and permissions based on the request action.
+    Public list/retrieve responses are cached until a product, review or category changes,
+    and carry ETag / Last-Modified validators (updated_at of the product and its category).
+    Read actions accept ?fields= / ?exclude=; columns and joins follow the chosen fields.
+    Lists render through the compiled values_list() path (apps/common/compiled.py).
     """
     queryset = Product.objects.filter(is_active=True).select_related('category', 'seller')
     
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?search= full-text index se aata hai (see apps/products/search.py)
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, RankedOrderingFilter]
     filterset_class = ProductFilter 
-    search_fields = ['name', 'description', 'category__name', 'seller__username']
+    pagination_class = KeysetPagination
+    cache_dependencies = ('products.product', 'products.review', 'products.category')
+    cache_actions = ('list', 'retrieve', 'facets', 'similar')
+    conditional_actions = ('list', 'retrieve', 'facets')
+    sparse_actions = ('list', 'retrieve', 'my_products', 'similar')
+    compiled_actions = ('list', 'my_products')
+    # Review changes touch Product.updated_at (apps/products/ratings.py)
+    last_modified_related = ('category__updated_at',)
     
-    ordering_fields = ['price', 'created_at', 'name']
+    ordering_fields = ['price', 'created_at', 'name', 'average_rating', 'review_count']
     ordering = ['-created_at']
     filterset_fields = {
         'category__name': ['exact'],
@@ -58,7 +113,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update']:
             return ProductWriteSerializer
         # The 'my_products' action will also use the compact list view.
-        elif self.action in ['list', 'my_products']:
+        elif self.action in ['list', 'my_products', 'similar']:
             return ProductListSerializer
         return ProductDetailSerializer # Default for 'retrieve'
 
@@ -70,8 +125,8 @@ class ProductViewSet(viewsets.ModelViewSet):
             self.permission_classes = [permissions.IsAuthenticated, IsSeller]
         elif self.action in ['update', 'partial_update', 'destroy']:
             self.permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-        # Custom permission for the 'my_products' action.
-        elif self.action == 'my_products':
+        # Custom permission for the seller's own catalog actions.
+        elif self.action in ['my_products', 'export_products', 'bulk_import']:
             self.permission_classes = [permissions.IsAuthenticated, IsSeller]
         else: # 'list', 'retrieve'
             self.permission_classes = [permissions.AllowAny]
@@ -91,6 +146,101 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user)
 
 
+    # --- /products/facets/ : sidebar counts for the current filters ---
+    @action(detail=False, methods=['GET'])
+    def facets(self, request):
+        """
+        Returns product counts per category, price range and rating bucket
+        for the same filters/search as the list endpoint, e.g.
+        /products/facets/?search=phone&min_price=1000
+        Cached per normalized filter set like the list itself.
+        """
+        handler = partial(self.conditional_response, self.facets_response)
+        return self.cached_response(handler, request)
+
+    def facets_response(self, request):
+        return Response(ProductFacets(self, request).to_representation(), status=status.HTTP_200_OK)
+
+    # --- /products/{id}/similar/ : customers also bought / also wishlisted ---
+    @action(detail=True, methods=['GET'])
+    def similar(self, request, pk=None):
+        """
+        Up to ?limit= (default 10, max TOP_K) active products that are most
+        often bought or wishlisted together with this one, best first.
+        Read from the precomputed SimilarProduct table (apps/products/recommendations.py).
+        """
+        return self.cached_response(self.similar_response, request, pk=pk)
+
+    def similar_response(self, request, pk=None):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), TOP_K)
+        except ValueError:
+            limit = 10
+        try:
+            exists = Product.objects.filter(pk=pk, is_active=True).exists()
+        except (ValueError, ValidationError):
+            exists = False
+        if not exists:
+            raise NotFound('Product not found.')
+        # All TOP_K are read so inactive neighbours can be skipped
+        ids = similar_product_ids(pk, TOP_K)
+        products = {
+            product.pk: product
+            for product in self.sparse_queryset(Product.objects.filter(pk__in=ids, is_active=True).select_related('category'))
+        }
+        results = [products[product_id] for product_id in ids if product_id in products][:limit]
+        data = self.get_serializer(results, many=True).data
+        return Response({'count': len(data), 'results': data})
+
+    # --- /products/autocomplete/?q= : header search-box suggestions ---
+    @action(detail=False, methods=['GET'])
+    def autocomplete(self, request):
+        """
+        Up to ?limit= (default 8, max 20) product names and 3 categories
+        starting with ?q= (at any of the first words), most popular first.
+        Answered from the per-process prefix index in apps/products/autocomplete.py,
+        without a database query.
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 20)
+        except ValueError:
+            limit = 8
+        query = request.query_params.get('q', '')[:100]
+        response = Response({'query': query, **autocomplete_index.suggest(query, limit=limit)})
+        # Same prefix from the same browser while the user types and deletes
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    # --- /products/import/ : seller's bulk create/update by SKU ---
+    @action(detail=False, methods=['POST'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Upserts the seller's products from an uploaded CSV or JSONL `file`
+        (one row per SKU, category by slug), streamed and written in batches.
+        ?dry_run=1 only validates. Returns the counts and the invalid rows.
+        Large catalogs can also use `manage.py import_products`.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or guess_format(upload.name)
+        if file_format not in FORMATS:
+            return Response({'format': [f"Choose one of: {', '.join(FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        importer = ProductImporter(request.user, dry_run=dry_run)
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            stats = importer.run(stream, file_format)
+        except UnicodeDecodeError:
+            # Batches before the bad bytes are already saved
+            stats = importer.stats
+            stats.add_error(stats.read + 1, 'The file is not UTF-8 text; import stopped here.')
+        data = stats.as_dict()
+        data['dry_run'] = dry_run
+        data['errors'] = [{'line': line, 'error': message} for line, message in sorted(stats.errors)]
+        return Response(data, status=status.HTTP_200_OK)
+
     # --- NEW CUSTOM ACTION for /my-products/ ---
     @action(detail=False, methods=['GET'], url_path='my-products')
     def my_products(self, request):
@@ -102,27 +252,50 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Unlike the main queryset, this one includes inactive products as well,
         # so the seller can see and manage all their listings.
         seller_products = Product.objects.filter(seller=request.user).order_by('-created_at')
-        
-        # We need to handle pagination to avoid sending huge amounts of data.
-        page = self.paginate_queryset(seller_products)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        seller_products = self.sparse_queryset(seller_products)
+        # Paginated like the main list (compiled path when possible)
+        return self.list_queryset(seller_products)
 
-        # If pagination is not configured, serialize the entire queryset.
-        serializer = self.get_serializer(seller_products, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    # --- /products/my-products/export/ : the seller's whole catalog as one file ---
+    # Columns match /products/import/, so an export can be edited and re-imported.
+    export_fields = [
+        ('id', 'id'),
+        ('sku', 'sku'),
+        ('name', 'name'),
+        ('description', 'description'),
+        ('price', 'price'),
+        ('sale_price', 'sale_price'),
+        ('category', 'category__slug'),
+        ('stock', 'stock'),
+        ('is_active', 'is_active'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    @action(detail=False, methods=['GET'], url_path='my-products/export')
+    def export_products(self, request):
+        """
+        Streams every product of the seller (inactive ones too) as CSV or
+        JSONL (?file_format=csv|jsonl), instead of paging through my-products.
+        """
+        return export_response(request, Product.objects.filter(seller=request.user), self.export_fields, 'products')
 
 
 # ===============================================
 #  REVIEW VIEWSET (Nested under Products)
 # ===============================================
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     API endpoint for product reviews.
     This is a nested resource under a product.
+    - list: ?sort=newest|highest|lowest, ?rating=N, keyset pagination.
+      Every page carries the product's `summary` (average, count and star
+      histogram) read from the denormalized Product counters.
     """
     serializer_class = ReviewSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, ReviewSortFilter]
+    filterset_class = ReviewFilter
 
     def get_permissions(self):
         """
@@ -148,6 +321,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return Review.objects.filter(product_id=product_pk)
         return Review.objects.none() # Return empty if no product_pk
 
+    def list(self, request, *args, **kwargs):
+        summary = self.get_rating_summary()
+        response = super().list(request, *args, **kwargs)
+        response.data['summary'] = summary
+        return response
+
+    def get_rating_summary(self):
+        """
+        Average, count and star histogram of the product, one primary key
+        lookup on Product (no aggregate over the review table).
+        """
+        fields = ['average_rating', 'review_count', *RATING_STAR_FIELDS.values()]
+        try:
+            row = Product.objects.filter(pk=self.kwargs.get('product_pk')).values(*fields).first()
+        except (ValidationError, ValueError):
+            row = None
+        if row is None:
+            raise NotFound('Product not found.')
+        return {
+            'average_rating': row['average_rating'],
+            'review_count': row['review_count'],
+            'histogram': {str(star): row[field] for star, field in RATING_STAR_FIELDS.items()},
+        }
+
     def perform_create(self, serializer):
         """
         Automatically associate the review with the product from the URL
@@ -155,4 +352,28 @@ class ReviewViewSet(viewsets.ModelViewSet):
         """
         product_pk = self.kwargs.get('product_pk')
         product = Product.objects.get(pk=product_pk)
-        serializer.save(user=self.request.user, product=product)
\ No newline at end of file
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user, product=product)
+            apply_review_change(product.pk, new_rating=review.rating)
+
+    def perform_update(self, serializer):
+        """
+        Keep the product's rating aggregates in step with the edited rating.
+        The old rating is read under a row lock: two concurrent edits of one
+        review would otherwise both subtract the same old rating.
+        """
+        with transaction.atomic():
+            old_rating = Review.objects.select_for_update().values_list('rating', flat=True).get(pk=serializer.instance.pk)
+            review = serializer.save()
+            apply_review_change(review.product_id, old_rating=old_rating, new_rating=review.rating)
+
+    def perform_destroy(self, instance):
+        """
+        Remove the review's rating from the product's aggregates.
+        """
+        with transaction.atomic():
+            old_rating = Review.objects.select_for_update().filter(pk=instance.pk).values_list('rating', flat=True).first()
+            if old_rating is None:
+                return  # Deleted by a concurrent request, which already counted it
+            apply_review_change(instance.product_id, old_rating=old_rating)
+            instance.delete()
\ No newline at end of file
@@ -0,0 +1,21 @@
+# backend/apps/seller/filters.py
+
+from django_filters.rest_framework import CharFilter, DateTimeFilter, FilterSet
+from apps.orders.models import Order
+
+
+class SellerOrderFilter(FilterSet):
+    # ?status=Pending or ?status=Pending,Processing
+    status = CharFilter(method='filter_status')
+
+    # Date range on the order date; plain dates (2025-01-31) mean midnight
+    created_after = DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = DateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'created_after', 'created_before']
+
+    def filter_status(self, queryset, name, value):
+        statuses = [status.strip() for status in value.split(',') if status.strip()]
+        return queryset.filter(status__in=statuses)
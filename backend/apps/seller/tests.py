@@ -1,3 +1,58 @@
+# backend/apps/seller/tests.py
+
+import csv
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+
+class SellerOrderExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product
+        from apps.users.models import User
+        from ecommerce_api.roles import Role
+
+        cls.seller = User.objects.create_user(email='export-seller@example.com', username='export-seller', password=None, role=Role.SELLER)
+        other_seller = User.objects.create_user(email='other-seller@example.com', username='other-seller', password=None, role=Role.SELLER)
+        cls.buyer = User.objects.create_user(email='export-buyer@example.com', username='export-buyer', password=None, role=Role.BUYER)
+        mine = Product.objects.create(name='Mine', description='-', price=Decimal('20.00'), sku='M-1', seller=cls.seller)
+        theirs = Product.objects.create(name='Theirs', description='-', price=Decimal('5.00'), seller=other_seller)
+
+        cls.pending = Order.objects.create(user=cls.buyer, total_amount=Decimal('45.00'))
+        OrderItem.objects.create(order=cls.pending, product=mine, quantity=2, price_at_purchase=Decimal('20.00'))
+        OrderItem.objects.create(order=cls.pending, product=theirs, quantity=1, price_at_purchase=Decimal('5.00'))
+        shipped = Order.objects.create(user=cls.buyer, total_amount=Decimal('20.00'), status='Shipped')
+        OrderItem.objects.create(order=shipped, product=mine, quantity=1, price_at_purchase=Decimal('20.00'))
+        unrelated = Order.objects.create(user=cls.buyer, total_amount=Decimal('5.00'))
+        OrderItem.objects.create(order=unrelated, product=theirs, quantity=1, price_at_purchase=Decimal('5.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def export(self, **params):
+        response = self.client.get('/api/v1/seller/orders/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return list(csv.DictReader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+
+    def test_only_the_sellers_items(self):
+        rows = self.export()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['product_name'] for row in rows}, {'Mine'})
+        first = next(row for row in rows if row['order_id'] == str(self.pending.pk))
+        self.assertEqual(
+            (first['buyer_email'], first['sku'], first['quantity'], first['price_at_purchase'], first['status']),
+            ('export-buyer@example.com', 'M-1', '2', '20.00', 'Pending'),
+        )
+
+    def test_list_filters_apply(self):
+        rows = self.export(status='Shipped')
+        self.assertEqual([row['status'] for row in rows], ['Shipped'])
+        self.assertEqual(self.export(created_after='2999-01-01'), [])
 
-# Create your tests here.
+    def test_buyers_are_refused(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get('/api/v1/seller/orders/export/').status_code, 403)
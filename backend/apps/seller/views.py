@@ -10,6 +10,12 @@ from rest_framework.decorators import action
 from django.db.models import Sum, Count, F, Value, DecimalField, Q
 from apps.orders.models import Order, OrderItem
 from apps.orders.serializers import OrderSerializer, OrderItemSerializer # Import serializers
+from apps.common.pagination import KeysetPagination
+from apps.common.sparse import SparseFieldsMixin
+from apps.common.compiled import CompiledListMixin
+from apps.common.export import export_response
+from django_filters.rest_framework import DjangoFilterBackend
+from .filters import SellerOrderFilter
 
 class SellerDashboardStatsAPIView(APIView):
     """
@@ -64,12 +70,17 @@ class SellerDashboardStatsAPIView(APIView):
 
 
 # --- NEW VIEWSET FOR SELLER ORDER MANAGEMENT ---
-class SellerOrderViewSet(viewsets.ReadOnlyModelViewSet):
+class SellerOrderViewSet(SparseFieldsMixin, CompiledListMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for sellers to view and manage orders containing their products.
+    Supports ?fields= / ?exclude= like the buyer's order list, and
+    ?status= / ?created_after= / ?created_before= (list and export).
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SellerOrderFilter
 
     def get_queryset(self):
         """
@@ -88,6 +99,33 @@ class SellerOrderViewSet(viewsets.ReadOnlyModelViewSet):
             Q(items__product__seller=user)
         ).distinct().order_by('-created_at')
 
+    # --- /seller/orders/export/ : one line per order item of this seller ---
+    export_fields = [
+        ('order_id', 'order_id'),
+        ('order_date', 'order__created_at'),
+        ('status', 'order__status'),
+        ('buyer_email', 'order__user__email'),
+        ('item_id', 'id'),
+        ('product_id', 'product_id'),
+        ('sku', 'product__sku'),
+        ('product_name', 'product__name'),
+        ('quantity', 'quantity'),
+        ('price_at_purchase', 'price_at_purchase'),
+    ]
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request):
+        """
+        Streams the seller's order items as CSV or JSONL (?file_format=csv|jsonl)
+        for fulfilment reconciliation; other sellers' items of the same
+        orders are left out. Takes the same filters as the list.
+        """
+        if request.user.role != 'seller':
+            return Response({"error": "You do not have permission to view this data."}, status=status.HTTP_403_FORBIDDEN)
+        orders = self.filter_queryset(Order.objects.all())
+        items = OrderItem.objects.filter(product__seller=request.user, order__in=orders.values('pk'))
+        return export_response(request, items, self.export_fields, 'orders')
+
     @action(detail=True, methods=['patch'], url_path='update-status')
     def update_status(self, request, pk=None):
         """
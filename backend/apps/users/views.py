@@ -8,6 +8,7 @@ from django.contrib.auth import authenticate
 
 from .models import User
 from .serializers import UserSerializer
+from apps.orders.cart import merge_guest_cart
 from ecommerce_api.permissions import IsOwnerOrReadOnly # Ye permission humne pehle banayi thi
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -38,12 +39,15 @@ class UserViewSet(viewsets.ModelViewSet):
         user = serializer.save()
         token = RefreshToken.for_user(user)
 
-        return Response({
+        response = Response({
             'message': "User created successfully. You are now logged in.",
             'data': serializer.data,
             'refresh': str(token),
             'access': str(token.access_token),
         }, status=status.HTTP_201_CREATED)
+        # Guest cart (cookie) ab user ke cart mein
+        merge_guest_cart(request, user, response)
+        return response
 
     @action(detail=False, methods=['POST'], url_path='login')
     def login(self, request):
@@ -58,12 +62,14 @@ class UserViewSet(viewsets.ModelViewSet):
         token = RefreshToken.for_user(user)
         user_data = self.get_serializer(user).data
 
-        return Response({
+        response = Response({
             'message': "Login successful",
             'refresh': str(token),
             'access': str(token.access_token),
             'user': user_data
         }, status=status.HTTP_200_OK)
+        merge_guest_cart(request, user, response)
+        return response
 
     @action(detail=False, methods=['POST'], permission_classes=[IsAuthenticated], url_path='logout')
     def logout(self, request):
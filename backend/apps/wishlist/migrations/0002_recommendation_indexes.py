@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0013_similar_products"),
+        ("wishlist", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wishlistitem",
+            index=models.Index(fields=["created_at"], name="wishlistitem_created_idx"),
+        ),
+    ]
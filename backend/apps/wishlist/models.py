@@ -15,6 +15,10 @@ class WishlistItem(BaseModel):
         # A user can only have a specific product in their wishlist once.
         unique_together = ('user', 'product')
         ordering = ['-created_at']
+        indexes = [
+            # Wishlist additions since the last recommendations refresh
+            models.Index(fields=['created_at'], name='wishlistitem_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} in {self.user.username}'s wishlist"
\ No newline at end of file
@@ -1,9 +1,13 @@
 # backend/apps/wishlist/views.py
 from rest_framework import viewsets, permissions, mixins
+from apps.common.sparse import SparseFieldsMixin
+from apps.common.compiled import CompiledListMixin
 from .models import WishlistItem
 from .serializers import WishlistItemSerializer, WishlistCreateSerializer
 
 class WishlistViewSet(
+    SparseFieldsMixin,
+    CompiledListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -11,7 +15,7 @@ class WishlistViewSet(
 ):
     """
     ViewSet for managing a user's wishlist.
-    - list: Returns all items in the user's wishlist.
+    - list: Returns all items in the user's wishlist (?fields= / ?exclude= supported).
     - create: Adds a product to the user's wishlist.
     - destroy: Removes a product from the user's wishlist.
     """
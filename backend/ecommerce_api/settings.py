@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,13 +29,16 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
-CORS_ALLOWED_ORIGINS = [
-    "http://localhost:5173",  # Aapka Vite React frontend
-    "http://127.0.0.1:5173",
-    "http://192.168.1.4:3000",
-]
-
-CORS_ALLOW_ALL_ORIGINS = True
+# Sirf yahi origins API call kar sakte hain (comma separated in .env), e.g.
+# CORS_ALLOWED_ORIGINS=https://shop.example.com,https://www.shop.example.com
+CORS_ALLOWED_ORIGINS = config(
+    'CORS_ALLOWED_ORIGINS',
+    default='http://localhost:5173,http://127.0.0.1:5173,http://192.168.1.4:3000',  # Aapka Vite React frontend
+    cast=Csv(),
+)
+# The guest cart is a cookie (apps/orders/cart.py); the frontend sends it withCredentials.
+# Credentials are only ever allowed for the origins above, never for every origin.
+CORS_ALLOW_CREDENTIALS = True
 
 
 INSTALLED_APPS = [
@@ -143,6 +146,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Default: bounded local-memory cache (LRU eviction after MAX_ENTRIES, per process).
+# Multiple workers ke liye shared backend zaroori hai (cached cart ids, catalog
+# cache versions are invalidated only in the cache they live in), e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='ecommerce-api'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+    }
+}
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int),
+    }
+
+# Public catalog responses (products, categories) ka cache timeout, in seconds.
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -179,6 +207,26 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploaded media (product images)
+# https://docs.djangoproject.com/en/5.2/topics/files/
+# Uploads ki apni directory (backend/media/products/...), source code se alag:
+# /media/ is served in production too, so MEDIA_ROOT must never contain code or settings.
+MEDIA_URL = "media/"
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+# Only these MEDIA_ROOT subdirectories are served by apps.common.media
+MEDIA_PUBLIC_DIRS = ('products/',)
+# Let the web server send the file: 'X-Accel-Redirect' (nginx, internal location
+# MEDIA_SENDFILE_PREFIX + path) or 'X-Sendfile' (Apache, absolute path). Empty = Django streams it.
+MEDIA_SENDFILE_HEADER = config('MEDIA_SENDFILE_HEADER', default='')
+MEDIA_SENDFILE_PREFIX = config('MEDIA_SENDFILE_PREFIX', default='/protected-media/')
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    # Product images are stored under their SHA-256, identical uploads once (apps/common/storage.py)
+    "product_images": {"BACKEND": "apps.common.storage.ContentAddressedStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
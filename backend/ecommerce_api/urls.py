@@ -1,9 +1,10 @@
 # ecommerce_api/urls.py
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from apps.common.media import serve_media
+from apps.common.views import CacheStatsAPIView
 
 # API URL patterns
 # Hum saare API endpoints ko /api/v1/ prefix ke neeche rakhenge.
@@ -21,6 +22,10 @@ api_urlpatterns = [
     path('sales/', include('apps.orders.urls')),
     path('seller/', include('apps.seller.urls')),
     path('wishlist/', include('apps.wishlist.urls')),
+
+    # Catalog response cache ke hit/miss counters (staff only)
+    # URL: /api/v1/cache-stats/
+    path('cache-stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
 ]
 
 # Main URL patterns for the whole project
@@ -34,6 +39,8 @@ urlpatterns = [
     # Add other top-level URLs here if needed
 ]
 
-# Ye development ke time media files (jaise product images) ko serve karne ke liye zaroori hai.
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Media files (product images): cache headers, Range and X-Accel-Redirect/X-Sendfile
+# support in apps/common/media.py, so this route is used outside DEBUG as well.
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', serve_media, name='media'),
+]
\ No newline at end of file
@@ -7,6 +7,7 @@ import { Search, ShoppingCart, User, MapPin, Phone, Mail, LogOut, Package } from
 // Custom Hooks
 import { useAuth } from '../context/AuthContext';
 import { useCart } from '../context/CartContext'; // Import useCart
+import { productService } from '../services/apiService';
 
 // Child Components
 import AuthForm from './auth/AuthForm';
@@ -15,6 +16,8 @@ const Header = () => {
   // --- CONTEXT & HOOKS ---
   const { user, isAuthenticated, logout } = useAuth();
   const [searchTerm, setSearchTerm] = useState('');
+  const [suggestions, setSuggestions] = useState({ products: [], categories: [] });
+  const [showSuggestions, setShowSuggestions] = useState(false);
   const { getTotalItems } = useCart(); // Get getTotalItems from CartContext
   const navigate = useNavigate();
 
@@ -44,6 +47,25 @@ const Header = () => {
     return () => window.removeEventListener('scroll', handleScroll);
   }, []);
 
+  // Effect for search suggestions: debounced, and a newer keystroke cancels the older request
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (!query) {
+      setSuggestions({ products: [], categories: [] });
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      productService.autocomplete(query, { signal: controller.signal })
+        .then((response) => setSuggestions(response.data))
+        .catch(() => {}); // aborted or failed: keep the old suggestions
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchTerm]);
+
   // --- HANDLER FUNCTIONS ---
   const handleOpenLoginModal = () => {
     setIsLoginMode(true);
@@ -58,6 +80,7 @@ const Header = () => {
 
   const handleSearchSubmit = (e) => {
     e.preventDefault();
+    setShowSuggestions(false);
     if (searchTerm.trim()) {
       // Navigate to the home page (or a dedicated search page) with the search query
       // This will trigger the useEffect in HomePage to re-fetch products
@@ -69,6 +92,11 @@ const Header = () => {
   };
 
 
+  const handleSuggestionClick = (path) => {
+    setShowSuggestions(false);
+    navigate(path);
+  };
+
   const closeAuthModal = () => setIsAuthFormOpen(false);
 
   return (
@@ -105,7 +133,9 @@ const Header = () => {
                   <input
                     type="text"
                     value={searchTerm}
-                    onChange={(e) => setSearchTerm(e.target.value)}
+                    onChange={(e) => { setSearchTerm(e.target.value); setShowSuggestions(true); }}
+                    onFocus={() => setShowSuggestions(true)}
+                    onBlur={() => setShowSuggestions(false)}
                     placeholder="Search products, suppliers, categories..."
                     className="w-full px-4 py-3 pl-12 pr-4 border-2 border-gray-300 rounded-lg focus:outline-none focus:border-blue-500 focus:ring-2 focus:ring-blue-200 transition-all"
                   />
@@ -113,6 +143,36 @@ const Header = () => {
                   <button type="submit" className="absolute right-2 top-1/2 transform -translate-y-1/2 bg-blue-600 text-white px-6 py-2 rounded-md hover:bg-blue-700 transition-colors">
                     Search
                   </button>
+                  {showSuggestions && (suggestions.categories.length > 0 || suggestions.products.length > 0) && (
+                    <ul className="absolute z-50 left-0 right-0 mt-1 bg-white border border-gray-200 rounded-lg shadow-lg overflow-hidden">
+                      {suggestions.categories.map((category) => (
+                        <li key={`category-${category.id}`}>
+                          <button
+                            type="button"
+                            onMouseDown={(e) => e.preventDefault()} // keep focus so onClick still fires
+                            onClick={() => handleSuggestionClick(`/?category_name=${encodeURIComponent(category.name)}`)}
+                            className="w-full text-left px-4 py-2 hover:bg-gray-100 text-sm"
+                          >
+                            <span className="font-medium text-gray-900">{category.name}</span>
+                            <span className="ml-2 text-gray-500">in Categories</span>
+                          </button>
+                        </li>
+                      ))}
+                      {suggestions.products.map((product) => (
+                        <li key={`product-${product.id}`}>
+                          <button
+                            type="button"
+                            onMouseDown={(e) => e.preventDefault()}
+                            onClick={() => handleSuggestionClick(`/product/${product.id}`)}
+                            className="w-full text-left px-4 py-2 hover:bg-gray-100 text-sm text-gray-700 flex items-center"
+                          >
+                            <Search className="w-4 h-4 mr-2 text-gray-400" />
+                            {product.name}
+                          </button>
+                        </li>
+                      ))}
+                    </ul>
+                  )}
                 </form>
               </div>
 
@@ -45,11 +45,18 @@ const ProductCard = ({ product }) => {
 
       {/* Product Image Section */}
       <div className="relative overflow-hidden">
-        <img
-          src={product.image || 'https://via.placeholder.com/300x200?text=No+Image'} // Placeholder for missing images
-          alt={product.name}
-          className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300"
-        />
+        {/* Resized WebP/JPEG variants when the backend has them, else the original upload */}
+        <picture>
+          {product.images && <source type="image/webp" srcSet={product.images.webp_srcset} sizes="(min-width: 768px) 320px, 100vw" />}
+          <img
+            src={product.images?.src || product.image || 'https://via.placeholder.com/300x200?text=No+Image'} // Placeholder for missing images
+            srcSet={product.images?.srcset}
+            sizes="(min-width: 768px) 320px, 100vw"
+            loading="lazy"
+            alt={product.name}
+            className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300"
+          />
+        </picture>
         {discountPercentage > 0 && (
           <div className="absolute top-2 left-2 bg-red-500 text-white px-2 py-1 rounded-md text-xs font-semibold">
             {discountPercentage}% OFF
@@ -22,6 +22,7 @@ export const API_ENDPOINTS = {
         UPDATE_PRODUCT: (productId) => `${API_BASE_URL}/shop/products/${productId}/`,
         DELETE_PRODUCT: (productId) => `${API_BASE_URL}/shop/products/${productId}/`,
         GET_MY_PRODUCTS: `${API_BASE_URL}/shop/products/my-products/`,
+        AUTOCOMPLETE: `${API_BASE_URL}/shop/products/autocomplete/`,
         GET_REVIEWS: (productId) => `${API_BASE_URL}/shop/products/${productId}/reviews/`,
         CREATE_REVIEW: (productId) => `${API_BASE_URL}/shop/products/${productId}/reviews/`,
 
@@ -31,6 +32,8 @@ export const API_ENDPOINTS = {
     SALES: {
         // Cart Endpoints
         GET_CART: `${API_BASE_URL}/sales/cart/`,
+        GET_CART_SUMMARY: `${API_BASE_URL}/sales/cart/summary/`,
+        BATCH_CART: `${API_BASE_URL}/sales/cart/batch/`,
         ADD_TO_CART: `${API_BASE_URL}/sales/cart/add-item/`,
         UPDATE_CART_ITEM: (itemId) => `${API_BASE_URL}/sales/cart/update-item/${itemId}/`,
         REMOVE_FROM_CART: (itemId) => `${API_BASE_URL}/sales/cart/remove-item/${itemId}/`,
@@ -9,19 +9,35 @@ export const useCart = () => useContext(CartContext);
 
 export const CartProvider = ({ children }) => {
     const [cart, setCart] = useState(null); // Will hold the entire cart object from backend
+    // Item count + total for the header badge; the full cart is only fetched by the cart page
+    const [summary, setSummary] = useState({ item_count: 0, total: '0.00' });
     const [loading, setLoading] = useState(false);
     const { isAuthenticated } = useAuth();
     const { showToast } = useToast();
 
-    const fetchCart = useCallback(async () => {
-        if (!isAuthenticated) {
-            setCart(null); // Clear cart if user logs out
-            return;
+    // Keep the badge in step with every full cart the backend returns
+    const applyCart = (data) => {
+        setCart(data);
+        setSummary({ item_count: data.item_count, total: data.total });
+    };
+
+    // Guests have a cart too (kept in a cookie by the backend), so these run
+    // logged in or not; isAuthenticated only makes them re-run on login/logout,
+    // when the guest cart has been merged into the user's cart
+    const fetchSummary = useCallback(async () => {
+        try {
+            const response = await cartService.getSummary();
+            setSummary(response.data);
+        } catch (error) {
+            console.error("Failed to fetch cart summary", error);
         }
+    }, [isAuthenticated]);
+
+    const fetchCart = useCallback(async () => {
         setLoading(true);
         try {
             const response = await cartService.getCart();
-            setCart(response.data);
+            applyCart(response.data);
         } catch (error) {
             console.error("Failed to fetch cart", error);
             // Don't show toast on initial load failure
@@ -30,20 +46,16 @@ export const CartProvider = ({ children }) => {
         }
     }, [isAuthenticated]);
 
-    // Fetch cart when user logs in or on initial app load
+    // Fetch the badge numbers on initial app load and whenever the user logs in or out
     useEffect(() => {
-        fetchCart();
-    }, [fetchCart]);
+        setCart(null);
+        fetchSummary();
+    }, [fetchSummary]);
 
     const addToCart = async (product) => {
-        if (!isAuthenticated) {
-            showToast('Please log in to add items to your cart.', 'info');
-            // Here you could trigger the login modal
-            return;
-        }
         try {
             const response = await cartService.addToCart(product.id, 1);
-            setCart(response.data); // Update cart state with response from backend
+            applyCart(response.data); // Update cart state with response from backend
             showToast(`'${product.name}' added to cart!`, 'success');
         } catch (error) {
             showToast('Could not add item to cart.', 'error');
@@ -60,18 +72,25 @@ export const CartProvider = ({ children }) => {
         }
     };
 
-    const getTotalItems = () => {
-        if (!cart || !cart.items) return 0;
-        return cart.items.reduce((total, item) => total + item.quantity, 0);
+    // Totals come from the backend (computed in SQL), not summed here
+    // "Buy again": every line of a past order in one request
+    const buyAgain = async (orderId) => {
+        try {
+            const response = await cartService.batch({ order_id: orderId });
+            applyCart(response.data);
+            const skipped = response.data.skipped.length;
+            showToast(
+                skipped ? `Items added to cart. ${skipped} product(s) are no longer available.` : 'Items added to cart!',
+                skipped ? 'info' : 'success'
+            );
+        } catch (error) {
+            showToast('Could not add the order to your cart.', 'error');
+        }
     };
 
-    const getCartTotal = () => {
-        if (!cart || !cart.items) return 0;
-        return cart.items.reduce((total, item) => {
-            const price = parseFloat(item.product.sale_price || item.product.price);
-            return total + price * item.quantity;
-        }, 0);
-    };
+    const getTotalItems = () => summary.item_count;
+
+    const getCartTotal = () => parseFloat(cart ? cart.total : summary.total);
 
     const value = {
         cart,
@@ -80,6 +99,7 @@ export const CartProvider = ({ children }) => {
         fetchCart,
         addToCart,
         removeFromCart,
+        buyAgain,
         getTotalItems,
         getCartTotal,
     };
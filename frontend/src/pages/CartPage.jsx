@@ -1,11 +1,12 @@
 // src/pages/CartPage.jsx
 
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 
 // --- Custom Hooks & Services ---
 import { useCart } from '../context/CartContext';
 import { useToast } from '../context/ToastContext';
+import { useAuth } from '../context/AuthContext';
 import { orderService } from '../services/apiService';
 
 // --- UI Components & Icons ---
@@ -13,13 +14,24 @@ import { Trash2, Loader2, ShoppingBag } from 'lucide-react';
 
 const CartPage = () => {
     // --- State and Context ---
-    const { cartItems, removeFromCart, getCartTotal, loading: cartLoading, fetchCart } = useCart();
+    const { cart, cartItems, removeFromCart, getCartTotal, loading: cartLoading, fetchCart } = useCart();
     const [isCheckingOut, setIsCheckingOut] = useState(false);
     const navigate = useNavigate();
     const { showToast } = useToast();
+    const { isAuthenticated } = useAuth();
+
+    // The app only keeps the badge summary; load the full cart here
+    useEffect(() => {
+        fetchCart();
+    }, [fetchCart]);
 
     // --- Handlers ---
     const handleCheckout = async () => {
+        // Guest cart is merged into the user's cart on login
+        if (!isAuthenticated) {
+            showToast('Please log in to checkout. Your cart will be kept.', 'info');
+            return;
+        }
         setIsCheckingOut(true);
         try {
             await orderService.createOrder();
@@ -84,7 +96,7 @@ const CartPage = () => {
                             </div>
                             <div className="text-right">
                                 <p className="font-semibold text-lg text-gray-800">
-                                    ₹{((item.product.sale_price || item.product.price) * item.quantity).toLocaleString('en-IN')}
+                                    ₹{parseFloat(item.line_total).toLocaleString('en-IN')}
                                 </p>
                                 <button onClick={() => handleRemoveItem(item.id)} className="text-red-500 hover:text-red-700 mt-1" title="Remove Item">
                                     <Trash2 size={18} />
@@ -96,6 +108,18 @@ const CartPage = () => {
 
                 {/* Cart Summary */}
                 <div className="p-4 bg-gray-50 rounded-b-lg">
+                    {parseFloat(cart?.discount) > 0 && (
+                        <>
+                            <div className="flex justify-between items-center text-gray-600 mb-1">
+                                <span>Subtotal</span>
+                                <span>₹{parseFloat(cart.subtotal).toLocaleString('en-IN')}</span>
+                            </div>
+                            <div className="flex justify-between items-center text-green-600 mb-2">
+                                <span>Discount</span>
+                                <span>-₹{parseFloat(cart.discount).toLocaleString('en-IN')}</span>
+                            </div>
+                        </>
+                    )}
                     <div className="flex justify-between items-center font-bold text-xl text-gray-800">
                         <span>Total</span>
                         <span>₹{getCartTotal().toLocaleString('en-IN')}</span>
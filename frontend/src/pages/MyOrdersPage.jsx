@@ -3,11 +3,13 @@ import React, { useState, useEffect } from 'react';
 import { orderService } from '../services/apiService';
 import { Loader2 } from 'lucide-react';
 import { useToast } from '../context/ToastContext';
+import { useCart } from '../context/CartContext';
 
 const MyOrdersPage = () => {
     const [orders, setOrders] = useState([]);
     const [loading, setLoading] = useState(true);
     const { showToast } = useToast();
+    const { buyAgain } = useCart();
 
     useEffect(() => {
         const fetchOrders = async () => {
@@ -58,8 +60,14 @@ const MyOrdersPage = () => {
                                     </div>
                                 ))}
                             </div>
-                            <div className="text-right font-bold mt-4 pt-4 border-t">
-                                Total: ₹{parseFloat(order.total_amount).toLocaleString()}
+                            <div className="flex justify-between items-center font-bold mt-4 pt-4 border-t">
+                                <button
+                                    onClick={() => buyAgain(order.id)}
+                                    className="bg-blue-600 text-white px-4 py-2 rounded-lg hover:bg-blue-700 transition-colors text-sm font-semibold"
+                                >
+                                    Buy Again
+                                </button>
+                                <span>Total: ₹{parseFloat(order.total_amount).toLocaleString()}</span>
                             </div>
                         </div>
                     ))}
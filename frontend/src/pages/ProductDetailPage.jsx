@@ -89,11 +89,16 @@ const ProductDetailPage = () => {
                 <div className="bg-white p-8 rounded-lg shadow-lg grid grid-cols-1 md:grid-cols-2 gap-8">
                     {/* Image Gallery */}
                     <div>
-                        <img
-                            src={product.image || 'https://via.placeholder.com/500x500?text=No+Image'}
-                            alt={product.name}
-                            className="w-full h-auto object-cover rounded-lg"
-                        />
+                        <picture>
+                            {product.images && <source type="image/webp" srcSet={product.images.webp_srcset} sizes="(min-width: 768px) 50vw, 100vw" />}
+                            <img
+                                src={product.images?.src || product.image || 'https://via.placeholder.com/500x500?text=No+Image'}
+                                srcSet={product.images?.srcset}
+                                sizes="(min-width: 768px) 50vw, 100vw"
+                                alt={product.name}
+                                className="w-full h-auto object-cover rounded-lg"
+                            />
+                        </picture>
                     </div>
 
                     {/* Product Information */}
@@ -5,6 +5,8 @@ import { API_ENDPOINTS } from '../config/apiConfig';
 // Central Axios instance
 const api = axios.create({
     headers: { 'Content-Type': 'application/json' },
+    // Guest cart cookie goes along with cart requests
+    withCredentials: true,
 });
 
 // Interceptor to add auth token
@@ -39,6 +41,8 @@ export const productService = {
     getProducts: (params) => api.get(API_ENDPOINTS.SHOP.GET_PRODUCTS, { params }),
 
     getProductById: (productId) => api.get(API_ENDPOINTS.SHOP.GET_PRODUCT_DETAIL(productId)),
+    // Header search-box suggestions (in-memory prefix index, no list query)
+    autocomplete: (query, config = {}) => api.get(API_ENDPOINTS.SHOP.AUTOCOMPLETE, { params: { q: query }, ...config }),
     createProduct: (productDataAsFormData) => {
         return api.post(API_ENDPOINTS.SHOP.CREATE_PRODUCT, productDataAsFormData, {
             headers: { 'Content-Type': 'multipart/form-data' },
@@ -57,6 +61,9 @@ export const productService = {
 // --- Cart Service ---
 export const cartService = {
     getCart: () => api.get(API_ENDPOINTS.SALES.GET_CART),
+    getSummary: () => api.get(API_ENDPOINTS.SALES.GET_CART_SUMMARY),
+    // Several changes in one request: { operations: [...] } or { order_id } ("buy again")
+    batch: (payload) => api.post(API_ENDPOINTS.SALES.BATCH_CART, payload),
     addToCart: (productId, quantity) => api.post(API_ENDPOINTS.SALES.ADD_TO_CART, { product_id: productId, quantity }),
     removeFromCart: (itemId) => api.delete(API_ENDPOINTS.SALES.REMOVE_FROM_CART(itemId)),
 };